@@ -0,0 +1,327 @@
+"""Batch PGN annotator: engine evals and move grades for archived games.
+
+Games are read lazily from the input PGN and annotated on a pool of worker
+processes, one Stockfish each. Every move gets a `[%eval]` comment and,
+when it lost ground, the same grade the app's live move judgment shows
+(centipawn loss against the engine's multipv lines), with ?! / ? / ?? for
+Questionable and Poor moves. With --llm-comments Gemini adds a sentence to
+the Poor ones.
+
+    python annotate.py games.pgn annotated.pgn --engine /path/to/stockfish --depth 14
+    python annotate.py games.pgn annotated.pgn --resume    # Continue an interrupted run
+
+Output is written in input order. Every --checkpoint-every games the run
+records how far it got in `<output>.checkpoint`; --resume truncates the
+output to that point and seeks the input straight past the games already
+done.
+"""
+import argparse
+import io
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import util
+
+import chess
+import chess.engine
+import chess.pgn
+
+from llm_scheduler import TokenBucket
+from move_judge import centipawns, judge_move, lines_from_infos
+
+# One engine per worker process, opened by init_worker
+_engine = None
+
+GRADE_NAGS = {"Questionable": chess.pgn.NAG_DUBIOUS_MOVE, "Poor": chess.pgn.NAG_MISTAKE}
+BLUNDER_CP = 300  # A Poor move losing at least this much is marked ?? instead of ?
+
+
+def init_worker(engine_path, hash_mb, verbose):
+    """Process pool initializer: open this worker's engine."""
+    global _engine
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is handled by the main process, which checkpoints
+    if not verbose:
+        sys.stdout = open(os.devnull, "w")
+    _engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+    _engine.configure({"Threads": 1, "Hash": hash_mb})
+    # Runs before the worker joins its threads at exit, which would otherwise wait on the engine's loop forever
+    util.Finalize(None, close_worker, exitpriority=10)
+
+
+def close_worker():
+    """Quit the worker's engine when the process exits."""
+    if _engine:
+        try:
+            _engine.quit()
+        except Exception:
+            pass
+
+
+def eval_comment(score):
+    """`[%eval ...]` from White's point of view, in pawns or as a mate count."""
+    white = score.white()
+    if white.is_mate() and white.mate() == 0:
+        return ""  # Checkmate on the board, nothing to evaluate
+    if white.is_mate():
+        return f"[%eval #{white.mate()}]"
+    return f"[%eval {white.score() / 100:.2f}]"
+
+
+def pgn_note(judgment):
+    """The judgment's chat line without the leading SAN, which the PGN already shows."""
+    return judgment.summary().split(" - ", 1)[1]
+
+
+def final_score(board):
+    """Score of a position with no move left to analyse, relative to the side to move."""
+    if board.is_checkmate():
+        return chess.engine.PovScore(chess.engine.Mate(0), board.turn)
+    return chess.engine.PovScore(chess.engine.Cp(0), board.turn)
+
+
+def analyse_position(board, limit, multipv, game):
+    """(move, PovScore) lines of `board`, best first."""
+    if board.is_game_over():
+        return [(None, final_score(board))]
+    infos = _engine.analyse(board, limit, multipv=multipv, game=game,  # A new `game` sends ucinewgame
+                            info=chess.engine.INFO_SCORE | chess.engine.INFO_PV)
+    return lines_from_infos(infos)
+
+
+def annotate_game(index, pgn_text, depth, seconds, multipv):
+    """Worker task: annotate one game; returns (index, annotated PGN, per-move records)."""
+    game = chess.pgn.read_game(io.StringIO(pgn_text))
+    if game is None:
+        return index, "", []
+    limit = chess.engine.Limit(depth=depth, time=seconds)
+    search_game = object()
+
+    board = game.board()
+    node = game
+    lines = analyse_position(board, limit, multipv, search_game)
+    records = []
+    while node.variations:
+        child = node.variations[0]
+        move = child.move
+        after = board.copy(stack=False)
+        after.push(move)
+        # The next position's best line is the score after this move, no extra search needed
+        after_lines = analyse_position(after, limit, multipv, search_game)
+        score_after = after_lines[0][1] if after_lines else None
+
+        judgment = judge_move(board, move, lines, score_after) if lines and lines[0][0] else None
+        comment = eval_comment(score_after) if score_after else ""
+        if judgment and judgment.grade in GRADE_NAGS:
+            # Only inaccuracies and worse get a note, small losses in good moves would flood the PGN
+            comment += f" {pgn_note(judgment)}"
+            nag = GRADE_NAGS[judgment.grade]
+            if nag == chess.pgn.NAG_MISTAKE and judgment.cp_loss >= BLUNDER_CP:
+                nag = chess.pgn.NAG_BLUNDER
+            child.nags.add(nag)
+        elif judgment and judgment.only_move:
+            comment += f" {pgn_note(judgment)}"
+            child.nags.add(chess.pgn.NAG_GOOD_MOVE)
+        child.comment = (child.comment + " " + comment.strip()).strip()
+        if judgment:
+            records.append({"ply": board.ply(), "fen": board.fen(), "move": move.uci(), "san": judgment.san,
+                            "grade": judgment.grade, "cp_loss": judgment.cp_loss, "best": judgment.best_san,
+                            "eval_cp": centipawns(score_after, chess.WHITE) if score_after else None})
+
+        board = after  # No move stack needed, the node keeps the game
+        node, lines = child, after_lines
+    game.headers["Annotator"] = "Stockfish"
+    return index, str(game), records
+
+
+def iter_games(handle):
+    """(input offset after the game, PGN text) for every game, read one at a time."""
+    while True:
+        game = chess.pgn.read_game(handle)
+        if game is None:
+            return
+        yield handle.tell(), str(game)
+
+
+def load_model(fake_gemini):
+    """The Gemini model, or the benchmark's fake one."""
+    if fake_gemini:
+        from bench.fake_gemini import FakeModel
+        return FakeModel(latency=0.05)
+    import google.generativeai as genai
+    from dotenv import load_dotenv
+    load_dotenv()
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    return genai.GenerativeModel(os.getenv("GEMINI_MODEL", "gemini-1.5-pro"))
+
+
+def add_llm_comments(pgn_text, records, model, bucket):
+    """Ask Gemini for one sentence on every Poor move, within the rate limit."""
+    poor = {record["ply"]: record for record in records if record["grade"] == "Poor"}
+    if not poor:
+        return pgn_text
+    game = chess.pgn.read_game(io.StringIO(pgn_text))
+    board = game.board()
+    for node in game.mainline():
+        record = poor.get(board.ply())
+        board.push(node.move)
+        if not record:
+            continue
+        delay = bucket.delay()
+        if delay:
+            time.sleep(delay)
+        bucket.take()
+        prompt = f"""As a chess coach, explain in one sentence why {record['san']} was a mistake in this position:
+
+FEN: {record['fen']}
+
+The engine preferred {record['best']}; {record['san']} lost {record['cp_loss']} centipawns."""
+        try:
+            node.comment += " " + model.generate_content(prompt).text.strip()
+        except Exception as e:
+            print(f"❌ Gemini comment failed: {e}")
+    return str(game)
+
+
+def read_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_checkpoint(path, checkpoint):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate PGN games with engine evals and move grades.")
+    parser.add_argument("input", help="PGN file to annotate")
+    parser.add_argument("output", help="Annotated PGN to write")
+    parser.add_argument("--engine", default=os.getenv("STOCKFISH_PATH", "stockfish"), help="UCI engine binary")
+    parser.add_argument("--depth", type=int, default=12, help="Search depth per position")
+    parser.add_argument("--time", type=float, help="Seconds per position, on top of --depth")
+    parser.add_argument("--multipv", type=int, default=3, help="Lines per position, to spot only moves")
+    parser.add_argument("--hash", type=int, default=64, help="Engine hash per worker in MB")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes, one engine each")
+    parser.add_argument("--checkpoint-every", type=int, default=50, help="Games between checkpoints")
+    parser.add_argument("--resume", action="store_true", help="Continue from the output's checkpoint")
+    parser.add_argument("--limit", type=int, help="Stop after this many games")
+    parser.add_argument("--llm-comments", action="store_true", help="Add a Gemini sentence to every Poor move")
+    parser.add_argument("--fake-gemini", action="store_true", help="Use a local fake Gemini model")
+    parser.add_argument("--gemini-rpm", type=float, default=float(os.getenv("GEMINI_RPM", "15")),
+                        help="Gemini requests per minute (0: no limit)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the output of the workers")
+    args = parser.parse_args()
+
+    checkpoint_path = args.output + ".checkpoint"
+    checkpoint = {"input": os.path.abspath(args.input), "games": 0, "input_offset": 0, "output_offset": 0}
+    if args.resume:
+        saved = read_checkpoint(checkpoint_path)
+        if saved and saved.get("input") == checkpoint["input"]:
+            checkpoint = saved
+            print(f"♻️ Resuming after {checkpoint['games']} games")
+        else:
+            print("❌ No checkpoint for this input, starting from the beginning")
+
+    model = load_model(args.fake_gemini) if args.llm_comments else None
+    bucket = TokenBucket(args.gemini_rpm / 60, burst=3)
+
+    handle = open(args.input, encoding="utf-8-sig", errors="replace")
+    handle.seek(checkpoint["input_offset"])
+    output = open(args.output, "r+" if checkpoint["output_offset"] else "w", encoding="utf-8")
+    output.seek(checkpoint["output_offset"])
+    output.truncate()  # Drop games written after the last checkpoint, they are redone
+
+    games = iter_games(handle)
+    next_index = checkpoint["games"]  # Index of the next game to submit
+    write_index = next_index  # Index of the next game to write, output stays in input order
+    first_index = next_index
+    offsets = {}  # index -> input offset after that game
+    sources = {}  # index -> original PGN, written unannotated if its worker fails
+    done = {}  # index -> (annotated PGN, records) waiting for earlier games
+    totals = {"games": 0, "moves": 0, "grades": {}}
+    start = time.perf_counter()
+    exhausted = False
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.engine, args.hash, args.verbose)) as pool:
+        try:
+            pending = set()
+            futures = {}  # future -> game index
+            while True:
+                # Keep a few games per worker in flight, never the whole file
+                while not exhausted and len(pending) < args.workers * 2:
+                    item = None
+                    if args.limit is None or next_index - first_index < args.limit:
+                        item = next(games, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    offsets[next_index], pgn_text = item
+                    sources[next_index] = pgn_text
+                    future = pool.submit(annotate_game, next_index, pgn_text, args.depth, args.time, args.multipv)
+                    futures[future] = next_index
+                    pending.add(future)
+                    next_index += 1
+                if not pending:
+                    break
+
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = futures.pop(future)
+                    try:
+                        _, pgn_text, records = future.result()
+                    except Exception as e:
+                        print(f"❌ Annotating game {index + 1} failed, copying it unannotated: {e}")
+                        pgn_text, records = sources[index], []
+                    done[index] = (pgn_text, records)
+
+                while write_index in done:
+                    pgn_text, records = done.pop(write_index)
+                    if model and pgn_text:
+                        pgn_text = add_llm_comments(pgn_text, records, model, bucket)
+                    if pgn_text:
+                        output.write(pgn_text + "\n\n")
+                    totals["games"] += 1
+                    totals["moves"] += len(records)
+                    for record in records:
+                        totals["grades"][record["grade"]] = totals["grades"].get(record["grade"], 0) + 1
+                    checkpoint["input_offset"] = offsets.pop(write_index)
+                    del sources[write_index]
+                    write_index += 1
+                    checkpoint["games"] = write_index
+                    if write_index % args.checkpoint_every == 0:
+                        output.flush()
+                        os.fsync(output.fileno())
+                        checkpoint["output_offset"] = output.tell()
+                        write_checkpoint(checkpoint_path, checkpoint)
+                        elapsed = time.perf_counter() - start
+                        print(f"  {write_index} games, {totals['moves'] / elapsed:.1f} moves/sec")
+        except KeyboardInterrupt:
+            # The last checkpoint stands, --resume redoes whatever was written after it
+            print("⏹️ Interrupted, continue with --resume")
+            pool.shutdown(wait=False, cancel_futures=True)
+            output.close()
+            handle.close()
+            return
+
+    output.flush()
+    checkpoint["output_offset"] = output.tell()
+    write_checkpoint(checkpoint_path, checkpoint)
+    output.close()
+    handle.close()
+
+    elapsed = time.perf_counter() - start
+    grades = ", ".join(f"{grade} {count}" for grade, count in sorted(totals["grades"].items()))
+    print(f"✅ Annotated {totals['games']} games ({totals['moves']} moves) in {elapsed:.0f}s: {grades}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,38 @@
 import tkinter as tk
 from tkinter import messagebox, Frame, Text, Scrollbar
-from PIL import Image, ImageTk
+from PIL import ImageTk
 import chess
 import chess.engine
 import google.generativeai as genai
+import json
 import os
+import queue
+import sys
+import threading
+import time
 from dotenv import load_dotenv
+from engine_cache import EngineCache
+from chat_stream import ChatStreamer
+from engine_worker import EnginePool
+from game_history import GameJournal
+from game_session import GameSession, TABLEBASE_DRAW
+from llm_cache import LLMCache
+from llm_scheduler import LLMScheduler
+from move_judge import centipawns, judge_move, lines_from_infos
+from opening_book import OpeningBook
+from sprite_atlas import SpriteAtlas
+from startup_profile import StartupProfiler
+from tablebase import Tablebase
+from tracing import Tracer, traced
 
 # Load environment variables
 load_dotenv()
 
 class ChessGUI:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
         self.root = root
+        self.profiler = profiler or StartupProfiler()  # Timings for --profile-startup
         self.root.title("Adaptive Chess Bot")
-        self.board = chess.Board()
-        self.previous_move = None  # Store last move
         
         # Add AI feature flags
         self.show_commentary = tk.BooleanVar(value=False)
@@ -24,23 +41,51 @@ class ChessGUI:
         
         # Set Stockfish path
         self.STOCKFISH_PATH = r"C:\Users\RAhul\Downloads\stockfish-windows-x86-64-avx2\stockfish\stockfish-windows-x86-64-avx2.exe"
+
+        # Several supervised Stockfish processes so hints and replies can search side by side
+        self.ENGINE_POOL_SIZE = int(os.getenv("ENGINE_POOL_SIZE", "2"))
+        self.ENGINE_OPTIONS = {"Hash": 64, "Threads": 1}
+        self.ENGINE_TIMEOUT = 10  # Seconds past the search limit before a hung engine is killed
+        self.AI_MOVE_RETRIES = 3  # Failed searches in a row before AI play is suspended
+        self.ai_move_failures = 0
+        self.ai_suspended = False  # The engine is gone: the game waits, a click on the board retries
         
-        # Track game history
-        self.move_history = []  # Store all moves in the game
-        self.position_history = []  # Store FEN positions after each move
-        
-        # Track wins for adaptive AI
-        self.user_wins = 0
-        self.ai_wins = 0
+        # Prompt context grows one SAN move at a time and stays within a token budget
+        self.PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "800"))
         
-        # Flag to control suggestion visibility
-        self.show_suggestions = True
+        # Engine results come back from the worker thread through this queue
+        self.ui_callbacks = queue.Queue()
+        self.UI_POLL_MS = 20
+        self.ai_thinking = False  # Blocks human input while the AI search runs
+
+        # Moves clicked while the AI thinks, tried in order against its reply the moment it lands
+        self.MAX_PREMOVES = 3
+        self.PREMOVE_COLOR = "#E07A5F"  # Coral overlay for queued premoves
+        self.premoves = []
 
-        # AI ELO rating for Stockfish (set to a minimum of 1320)
-        self.ai_elo = 1320  # Default AI ELO (can be adjusted for difficulty)
+        # Ponder on the human's turn; the same analysis feeds the hint and the AI reply
+        self.PONDER_MULTIPV = 3  # Candidate human moves searched in parallel
+        self.PONDER_MIN_DEPTH = 8  # Shallower ponder lines are not trusted for a hit
+        self.PONDER_HIT_TIME = 0.2  # Reply budget when the hash is already warm
+        self.ponder_job = None  # Ponder search for the current position
+        self.last_ponder = None  # Ponder search stopped by the human's last move
+        self.next_ponder = None  # Ponder of the position after the expected AI reply, runs during the reply
 
-        # Initialize Gemini API
-        self.initialize_gemini_api()
+        # Moves are graded from full-strength multipv analysis, Gemini only explains the grade
+        self.JUDGE_LIMIT = chess.engine.Limit(depth=12)
+        self.JUDGE_MULTIPV = 3  # Enough lines to spot an only move
+        self.JUDGE_MIN_DEPTH = 10  # Ponder lines this deep stand in for a judge search
+        self.last_judgment = None  # MoveJudgment of the last graded move, for "Explain Move"
+        self.reply_worker = None  # Engine searching the AI reply, judge searches keep off it
+        self.deferred_judge_searches = []  # Judge searches that found no free engine, sent once the reply is in
+
+        # Analysis mode draws the ponder lines as an eval bar and arrows, polled at a fixed frame rate
+        self.show_analysis = tk.BooleanVar(value=False)
+        self.ANALYSIS_FPS = 10  # However fast the engine streams, the canvas changes at most this often
+        self.ANALYSIS_COLORS = ["#15781B", "#2E86C1", "#AF7AC5"]  # Arrow per multipv line, best first
+        self.analysis_refresh_job = None  # after() id of the next analysis frame
+        self.analysis_seen = None  # (job, updates) drawn last, so an idle stream costs no redraw
+        self.analysis_drawn = {}  # canvas item -> what it shows, only changed items are touched
 
         # Define colors and dimensions to match the screenshot
         self.SQUARE_SIZE = 60
@@ -51,14 +96,63 @@ class ChessGUI:
         self.HIGHLIGHT_COLOR = "#FFFF00"  # Yellow highlight for selected square
         self.MOVE_HIGHLIGHT = "#A3D8F4"  # Light blue highlight for possible moves
         self.BG_COLOR = "#2C3E50"  # Dark blue-gray background
-        
-        # Configure the root window
-        self.root.configure(bg=self.BG_COLOR)
-        self.root.resizable(False, False)
-        
-        # Load images
+
+        self.MIN_SQUARE_SIZE = 30  # The board can grow with the window but not shrink below this
+
+        # Load images: decoding starts first so it overlaps everything below
+        self.sprite_atlas = SpriteAtlas("images")  # Pre-scaled sprites per size bucket, kept in images/atlas
+        self.sprite_bucket = SpriteAtlas.bucket_for(int(self.SQUARE_SIZE * 0.9))
+        self.sprite_cache = {}  # bucket -> {piece key: PhotoImage}, so resizing back is instant
         self.piece_images = {}
         self.load_images()
+
+        with self.profiler.phase("caches, book, tablebase"):
+            # Engine results keyed on position, Elo and limit; set ENGINE_CACHE_PATH to keep them between sessions
+            self.AI_SEARCH_LIMIT = chess.engine.Limit(time=1)
+            self.engine_cache = EngineCache(path=os.getenv("ENGINE_CACHE_PATH"))
+
+            # Polyglot opening book answers the first plies before the engine is involved
+            self.OPENING_BOOK_PATH = os.getenv("OPENING_BOOK_PATH", "book.bin")
+            self.opening_book = OpeningBook(self.OPENING_BOOK_PATH)
+
+            # Optional Syzygy tables (SYZYGY_PATH, os.pathsep separated) give exact endgames without a search
+            self.SYZYGY_PATH = os.getenv("SYZYGY_PATH")
+            self.tablebase = Tablebase(self.SYZYGY_PATH)
+
+        # Board, history, results and AI ELO (set to a minimum of 1320) live in a UI-free session
+        # Every move goes to the journal, so a closed or crashed session picks up where it stopped
+        self.GAME_JOURNAL_PATH = os.getenv("GAME_JOURNAL_PATH", "game_journal.bin")
+        self.session = GameSession(self.opening_book, self.tablebase, self.engine_cache,
+                                   token_budget=self.PROMPT_TOKEN_BUDGET, search_limit=self.AI_SEARCH_LIMIT,
+                                   journal=GameJournal(self.GAME_JOURNAL_PATH))
+        with self.profiler.phase("resume game"):
+            if self.session.resume():
+                print(f"♻️ Resumed the saved game at ply {self.session.board.ply()}, AI ELO {self.session.ai_elo}")
+
+        # Latency spans per ply (engine, Gemini, redraws, the AI move delay); set TRACE_EXPORT_PATH to save them
+        self.tracer = Tracer(ply_source=lambda: self.session.board.ply(), echo=bool(os.getenv("TRACE_ECHO")))
+        self.TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")  # .json: Chrome trace, otherwise JSON lines
+        self.show_perf_overlay = tk.BooleanVar(value=False)
+        self.perf_overlay_job = None  # after() id of the next overlay refresh
+        self.ply_started = None  # When the human's move was played, for the whole-ply span
+        self.ai_move_requested = None  # When the delayed AI move was scheduled
+
+        # Initialize Gemini API; the model is picked on first use and remembered in GEMINI_MODEL_CACHE
+        self.insight_suggestion = None  # (fen, text) suggestion that came with the last ply insight
+        self.llm_cache = LLMCache(os.getenv("LLM_CACHE_PATH", "llm_cache.db"))  # Repeat prompts answered locally
+        self.GEMINI_MODELS = ['gemini-1.5-pro', 'gemini-1.5-pro-latest', 'gemini-pro']  # In order of preference
+        self.GEMINI_MODEL_CACHE = os.getenv("GEMINI_MODEL_CACHE", ".gemini_model")
+        # Requests go out by priority within GEMINI_RPM, and are dropped once their ply has passed
+        self.llm_scheduler = LLMScheduler(self.post_to_ui, lambda: self.session.generation,
+                                          rate_per_minute=float(os.getenv("GEMINI_RPM", "15")),
+                                          burst=int(os.getenv("GEMINI_BURST", "3")), tracer=self.tracer)
+        self.llm_scheduler.start()
+        with self.profiler.phase("gemini configure"):
+            self.initialize_gemini_api()
+
+        # Configure the root window
+        self.root.configure(bg=self.BG_COLOR)
+        self.root.resizable(True, True)
         
         # Create main frame with minimal padding to match screenshot
         main_frame = Frame(root, bg=self.BG_COLOR, padx=10, pady=10)
@@ -66,7 +160,7 @@ class ChessGUI:
         
         # Create board frame
         board_frame = Frame(main_frame, bg=self.BG_COLOR)
-        board_frame.pack(side=tk.LEFT, padx=(0, 10))
+        board_frame.pack(side=tk.LEFT, padx=(0, 10), fill=tk.BOTH, expand=True)
         
         # Create chat frame
         chat_frame = Frame(main_frame, bg=self.BG_COLOR)
@@ -83,30 +177,45 @@ class ChessGUI:
         # Create send button
         send_button = tk.Button(chat_frame, text="Send", command=self.send_message, bg="#3498DB", fg="white")
         send_button.pack(side=tk.RIGHT)
+
+        # Create stop button for a reply that is still streaming
+        stop_button = tk.Button(chat_frame, text="Stop", command=self.stop_stream, bg="#E74C3C", fg="white")
+        stop_button.pack(side=tk.RIGHT, padx=(0, 5))
+
+        # Gemini replies stream into the chat from a background thread
+        self.chat_streamer = ChatStreamer(self.root, self.chat_display, tracer=self.tracer)
         
         # Create suggestion button
         suggestion_button = tk.Button(chat_frame, text="Get Suggestion", command=self.get_ai_suggestion, bg="#2ECC71", fg="white")
         suggestion_button.pack(side=tk.LEFT)
+
+        # Create explain button, Gemini puts the last move's grade into words
+        explain_button = tk.Button(chat_frame, text="Explain Move", command=self.explain_last_move, bg="#9B59B6", fg="white")
+        explain_button.pack(side=tk.LEFT, padx=(5, 0))
         
         # Chess canvas
         self.canvas = tk.Canvas(board_frame, width=self.BOARD_SIZE, height=self.BOARD_SIZE,
-                               highlightthickness=0)
-        self.canvas.pack()
+                               highlightthickness=0, bg=self.BG_COLOR)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.create_board_items()
+        self.pending_resize = None  # after() id of a resize waiting for the drag to settle
+        self.canvas.bind("<Configure>", self.on_canvas_resize)
 
         # Info panel layout that matches the screenshot
         info_frame = Frame(main_frame, bg=self.BG_COLOR, pady=10)
         info_frame.pack(fill=tk.X)
         
-        # Initialize Stockfish engine
-        self.initialize_stockfish()
+        # Initialize Stockfish engine; the processes start in the background
+        with self.profiler.phase("stockfish launch"):
+            self.initialize_stockfish()
         
         # User info (left side as in screenshot)
-        self.user_label = tk.Label(info_frame, text=f"You (White): {self.user_wins} wins", 
+        self.user_label = tk.Label(info_frame, text=f"You (White): {self.session.user_wins} wins", 
                                   fg="white", bg=self.BG_COLOR, font=("Arial", 10))
         self.user_label.pack(side=tk.LEFT)
         
         # AI info (right side as in screenshot)
-        self.ai_label = tk.Label(info_frame, text=f"AI (Black): {self.ai_wins} wins", 
+        self.ai_label = tk.Label(info_frame, text=f"AI (Black): {self.session.ai_wins} wins", 
                                 fg="white", bg=self.BG_COLOR, font=("Arial", 10))
         self.ai_label.pack(side=tk.RIGHT)
         
@@ -179,14 +288,65 @@ class ChessGUI:
                       activebackground=self.BG_COLOR,
                       activeforeground="white").pack(side=tk.LEFT, padx=5)
 
+        tk.Checkbutton(ai_features_frame, text="Analysis", 
+                      variable=self.show_analysis,
+                      command=self.toggle_analysis,
+                      fg="white", bg=self.BG_COLOR,
+                      selectcolor="#1A2638",
+                      activebackground=self.BG_COLOR,
+                      activeforeground="white").pack(side=tk.LEFT, padx=5)
+
+        tk.Checkbutton(ai_features_frame, text="Perf Overlay", 
+                      variable=self.show_perf_overlay,
+                      command=self.toggle_perf_overlay,
+                      fg="white", bg=self.BG_COLOR,
+                      selectcolor="#1A2638",
+                      activebackground=self.BG_COLOR,
+                      activeforeground="white").pack(side=tk.LEFT, padx=5)
+
         self.draw_board()
 
         # Bind mouse click event
         self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Button-3>", self.clear_premoves)  # Right click drops queued premoves
         self.selected_square = None
 
+        # Start delivering engine results on the Tk thread
+        self.root.after(self.UI_POLL_MS, self.process_ui_callbacks)
+        if self.session.board.turn == chess.BLACK:
+            # Resumed while the AI was to move
+            self.ai_thinking = True
+            self.root.after(500, self.ai_move)
+        else:
+            self.start_pondering()
+        self.root.after_idle(self.on_first_paint)
+
+    def on_first_paint(self):
+        """Runs once the window is up; prints the startup profile when the background work is done."""
+        self.profiler.mark("first paint")
+        self.profiler.report_when_done(self.root)
+
+    def post_to_ui(self, callback):
+        """Schedule a callback from a worker thread to run on the Tk thread."""
+        self.ui_callbacks.put(callback)
+
+    def process_ui_callbacks(self):
+        """Run callbacks posted by worker threads, then poll again."""
+        while True:
+            try:
+                callback = self.ui_callbacks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback()
+            except Exception as e:
+                print(f"❌ Error in UI callback: {e}")
+        self.root.after(self.UI_POLL_MS, self.process_ui_callbacks)
+
     def initialize_gemini_api(self):
-        """Initialize the Gemini API with proper configuration"""
+        """Configure the Gemini API; the model is resolved in the background and on first use"""
+        self.model = None
+        self.model_lock = threading.Lock()
         try:
             GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
             if not GOOGLE_API_KEY:
@@ -194,13 +354,27 @@ class ChessGUI:
             
             print("Configuring Gemini API...")
             genai.configure(api_key=GOOGLE_API_KEY)
-            
-            # Get available models
-            print("Checking available models...")
-            for m in genai.list_models():
-                print(f"Found model: {m.name}")
-            
-            print("Creating Gemini model...")
+            self.profiler.background("gemini model", self.warm_up_model)
+        except Exception as e:
+            error_msg = f"Error configuring Gemini API: {str(e)}"
+            print(f"❌ {error_msg}")
+            messagebox.showerror("Error", f"Failed to initialize AI model: {str(e)}")
+
+    def warm_up_model(self):
+        """Background thread: resolve the model before the first prompt needs it."""
+        try:
+            self.get_model()
+        except Exception as e:
+            error = str(e)
+            print(f"❌ Error configuring Gemini API: {error}")
+            self.post_to_ui(lambda: messagebox.showerror("Error", f"Failed to initialize AI model: {error}"))
+
+    def get_model(self):
+        """Return the Gemini model, picking the first available version on the first call"""
+        with self.model_lock:
+            if self.model is not None:
+                return self.model
+
             generation_config = {
                 "temperature": 0.9,
                 "top_p": 1,
@@ -214,35 +388,49 @@ class ChessGUI:
                 {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
                 {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
             ]
-            
-            # Try different model versions in order of preference
-            model_versions = ['gemini-1.5-pro', 'gemini-1.5-pro-latest', 'gemini-pro']
-            self.model = None
+
+            # The model that worked last time is trusted without another round trip
+            cached_name = self.read_cached_model_name()
+            model_versions = ([cached_name] if cached_name else []) + \
+                [name for name in self.GEMINI_MODELS if name != cached_name]
             last_error = None
             
             for model_name in model_versions:
                 try:
-                    print(f"Trying model: {model_name}")
-                    self.model = genai.GenerativeModel(model_name=model_name,
-                                                   generation_config=generation_config,
-                                                   safety_settings=safety_settings)
-                    # Test the model
-                    response = self.model.generate_content('Test connection')
-                    print(f"Successfully connected to {model_name}")
-                    break
+                    if model_name != cached_name:
+                        # A metadata lookup checks availability without paying for a generation
+                        print(f"Trying model: {model_name}")
+                        genai.get_model(f"models/{model_name}")
+                    model = genai.GenerativeModel(model_name=model_name,
+                                                  generation_config=generation_config,
+                                                  safety_settings=safety_settings)
                 except Exception as e:
                     print(f"Failed to initialize {model_name}: {str(e)}")
                     last_error = e
                     continue
+                if model_name != cached_name:
+                    self.write_cached_model_name(model_name)
+                print(f"✅ Using Gemini model {model_name}")
+                self.model = model
+                return model
             
-            if self.model is None:
-                raise Exception(f"Failed to initialize any model. Last error: {str(last_error)}")
-            
-            print("✅ Gemini API connection successful!")
-        except Exception as e:
-            error_msg = f"Error configuring Gemini API: {str(e)}"
-            print(f"❌ {error_msg}")
-            messagebox.showerror("Error", f"Failed to initialize AI model: {str(e)}")
+            raise Exception(f"Failed to initialize any model. Last error: {str(last_error)}")
+
+    def read_cached_model_name(self):
+        """Model name remembered from an earlier run, or None."""
+        try:
+            with open(self.GEMINI_MODEL_CACHE) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def write_cached_model_name(self, model_name):
+        """Remember the model that worked so the next start skips the lookup."""
+        try:
+            with open(self.GEMINI_MODEL_CACHE, "w") as f:
+                f.write(model_name)
+        except OSError as e:
+            print(f"❌ Could not save Gemini model name: {e}")
 
     def toggle_suggestions(self):
         """Toggle the visibility of move suggestions."""
@@ -253,28 +441,59 @@ class ChessGUI:
             self.textbox.insert(tk.END, "Suggestions are turned off")
 
     def load_images(self):
-        """Loads chess piece images and resizes them."""
-        pieces = {
-            "p": "pawn", "n": "knight", "b": "bishop",
-            "r": "rook", "q": "queen", "k": "king"
-        }
-        colors = {"b": "black", "w": "white"}
-
-        for piece, name in pieces.items():
-            for color, color_name in colors.items():
-                path = f"images/{color_name}-{name}.png"
-                try:
-                    print(f"🔍 Loading {path}...")
-                    img = Image.open(path).convert("RGBA")  
-                    img = img.resize((int(self.SQUARE_SIZE * 0.9), int(self.SQUARE_SIZE * 0.9)), Image.LANCZOS)  # Resize
-                    self.piece_images[f"{piece}{color}"] = ImageTk.PhotoImage(img)
-                except Exception as e:
-                    print(f"❌ Error loading {path}: {e}")
+        """Loads the chess piece sprites for the current size in the background."""
+        bucket = self.sprite_bucket
+        self.profiler.background("sprites decode", lambda: self.decode_images(bucket))
 
-    def draw_board(self):
-        """Draws the chess board and pieces."""
-        self.canvas.delete("all")
+    def decode_images(self, bucket):
+        """Background thread: PIL work only, the Tk images are made on the UI thread."""
+        decoded = self.sprite_atlas.load(bucket)
+        self.post_to_ui(lambda: self.install_images(bucket, decoded))
+
+    def install_images(self, bucket, decoded):
+        """Turns the decoded sprites into Tk images and shows them if the board is still that size."""
+        with self.profiler.phase("sprites upload"):
+            self.sprite_cache[bucket] = {piece_key: ImageTk.PhotoImage(img) for piece_key, img in decoded.items()}
+            if bucket == self.sprite_bucket:
+                self.use_sprites(bucket)
+
+    def use_sprites(self, bucket):
+        """Swaps every drawn piece over to the Tk images of `bucket`."""
+        self.piece_images = self.sprite_cache[bucket]
+        for item, piece_key in self.piece_items.values():
+            self.canvas.itemconfigure(item, image=self.piece_images[piece_key])
+        self.update_pieces()
+
+    def on_canvas_resize(self, event):
+        """Relayout once the window has stopped changing size for a moment."""
+        if self.pending_resize:
+            self.root.after_cancel(self.pending_resize)
+        self.pending_resize = self.root.after(50, self.resize_board, event.width, event.height)
+
+    def resize_board(self, width, height):
+        """Fits the board to the canvas: moves the existing items and swaps in sprites of the new size."""
+        self.pending_resize = None
+        square_size = max(min(width, height) // 8, self.MIN_SQUARE_SIZE)
+        if square_size == self.SQUARE_SIZE:
+            return
+        self.SQUARE_SIZE = square_size
+        self.BOARD_SIZE = square_size * 8
+        self.layout_board()
+
+        bucket = SpriteAtlas.bucket_for(int(square_size * 0.9))
+        if bucket != self.sprite_bucket:
+            self.sprite_bucket = bucket
+            if bucket in self.sprite_cache:
+                self.use_sprites(bucket)
+            else:
+                self.load_images()  # Old sprites stay up until the new ones arrive
+
+    def create_board_items(self):
+        """Creates the canvas items that never go away: squares, coordinates and last-move overlays."""
         colors = [self.LIGHT_SQUARE, self.DARK_SQUARE]
+        self.square_items = []  # (canvas item, row, col) for every square
+        self.file_label_items = []  # (canvas item, col) along the bottom row
+        self.rank_label_items = []  # (canvas item, row) down the left column
 
         # Draw board squares
         for row in range(8):
@@ -282,82 +501,178 @@ class ChessGUI:
                 color = colors[(row + col) % 2]
                 x1, y1 = col * self.SQUARE_SIZE, row * self.SQUARE_SIZE
                 x2, y2 = x1 + self.SQUARE_SIZE, y1 + self.SQUARE_SIZE
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
+                item = self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="", tags="square")
+                self.square_items.append((item, row, col))
                 
                 # Add small coordinate labels inside squares
                 if row == 7:  # Bottom row (files a-h)
                     file_label = chr(97 + col)  # a-h
-                    self.canvas.create_text(x1 + 8, y2 - 8, text=file_label, 
-                                          fill="black" if color == self.LIGHT_SQUARE else "white",
-                                          font=("Arial", 8), anchor=tk.SW)
+                    item = self.canvas.create_text(x1 + 8, y2 - 8, text=file_label, 
+                                                 fill="black" if color == self.LIGHT_SQUARE else "white",
+                                                 font=("Arial", 8), anchor=tk.SW, tags="coords")
+                    self.file_label_items.append((item, col))
                 
                 if col == 0:  # Leftmost column (ranks 1-8)
                     rank_label = str(8 - row)  # 8-1
-                    self.canvas.create_text(x1 + 8, y1 + 8, text=rank_label,
-                                          fill="black" if color == self.LIGHT_SQUARE else "white", 
-                                          font=("Arial", 8), anchor=tk.NW)
+                    item = self.canvas.create_text(x1 + 8, y1 + 8, text=rank_label,
+                                                 fill="black" if color == self.LIGHT_SQUARE else "white", 
+                                                 font=("Arial", 8), anchor=tk.NW, tags="coords")
+                    self.rank_label_items.append((item, row))
+
+        # Previous move overlays (light blue, semi-transparent), moved around instead of recreated
+        self.last_move_items = [
+            self.canvas.create_rectangle(0, 0, 0, 0, fill="#A3D8F4", stipple="gray50",
+                                         state=tk.HIDDEN, tags="lastmove")
+            for _ in range(2)
+        ]
+
+        self.piece_items = {}  # square -> (canvas item, piece key) currently drawn
+
+        # Analysis mode overlays, hidden until it is switched on: eval bar on the right edge, one arrow per line
+        self.eval_bar_items = (
+            self.canvas.create_rectangle(0, 0, 0, 0, fill="#404040", outline="", state=tk.HIDDEN, tags="analysis"),
+            self.canvas.create_rectangle(0, 0, 0, 0, fill="#F5F5F5", outline="", state=tk.HIDDEN, tags="analysis"),
+            self.canvas.create_text(0, 0, font=("Arial", 8, "bold"), state=tk.HIDDEN, tags="analysis"),
+        )
+        self.arrow_items = [
+            self.canvas.create_line(0, 0, 0, 0, fill=color, arrow=tk.LAST, capstyle=tk.ROUND,
+                                    stipple="" if rank == 0 else "gray75", state=tk.HIDDEN, tags="analysis")
+            for rank, color in enumerate(self.ANALYSIS_COLORS)
+        ]
+
+    def layout_board(self):
+        """Moves every existing canvas item to the current SQUARE_SIZE; nothing is recreated."""
+        size = self.SQUARE_SIZE
+        for item, row, col in self.square_items:
+            self.canvas.coords(item, col * size, row * size, (col + 1) * size, (row + 1) * size)
+        for item, col in self.file_label_items:
+            self.canvas.coords(item, col * size + 8, 8 * size - 8)
+        for item, row in self.rank_label_items:
+            self.canvas.coords(item, 8, row * size + 8)
+        for square, (item, _) in self.piece_items.items():
+            self.canvas.coords(item, *self.square_center(square))
+
+        self.draw_board()  # Last-move overlays; drops highlights drawn at the old size
+        self.draw_premoves()
+        self.analysis_seen = None  # Next frame redraws the overlays at the new size
+        if self.selected_square is not None:
+            self.highlight_moves(self.selected_square)
+
+    def square_bbox(self, square):
+        """Canvas rectangle covering a square."""
+        col, row = chess.square_file(square), 7 - chess.square_rank(square)
+        return (col * self.SQUARE_SIZE, row * self.SQUARE_SIZE,
+                (col + 1) * self.SQUARE_SIZE, (row + 1) * self.SQUARE_SIZE)
+
+    def square_center(self, square):
+        """Canvas point at the centre of a square."""
+        col, row = chess.square_file(square), 7 - chess.square_rank(square)
+        return (col * self.SQUARE_SIZE + self.SQUARE_SIZE//2,
+                row * self.SQUARE_SIZE + self.SQUARE_SIZE//2)
+
+    @traced("draw_board")
+    def draw_board(self):
+        """Brings the canvas in line with the board, touching only what changed."""
+        self.clear_highlights()
 
         # Highlight previous move as in screenshot (light blue squares)
-        if self.previous_move:
-            from_square = self.previous_move.from_square
-            to_square = self.previous_move.to_square
-            
-            from_col, from_row = chess.square_file(from_square), 7 - chess.square_rank(from_square)
-            to_col, to_row = chess.square_file(to_square), 7 - chess.square_rank(to_square)
-            
-            # Highlight previous move squares with a semi-transparent overlay
-            self.canvas.create_rectangle(
-                from_col * self.SQUARE_SIZE, from_row * self.SQUARE_SIZE,
-                (from_col+1) * self.SQUARE_SIZE, (from_row+1) * self.SQUARE_SIZE,
-                fill="#A3D8F4", stipple="gray50"
-            )
-            
-            self.canvas.create_rectangle(
-                to_col * self.SQUARE_SIZE, to_row * self.SQUARE_SIZE,
-                (to_col+1) * self.SQUARE_SIZE, (to_row+1) * self.SQUARE_SIZE,
-                fill="#A3D8F4", stipple="gray50"
-            )
-
-        # Draw pieces
-        for square, piece in self.board.piece_map().items():
-            row, col = divmod(square, 8)
-            piece_key = f"{piece.symbol().lower()}{'b' if piece.color else 'w'}"
-            if piece_key in self.piece_images:
-                self.canvas.create_image(
-                    col * self.SQUARE_SIZE + self.SQUARE_SIZE//2, 
-                    (7 - row) * self.SQUARE_SIZE + self.SQUARE_SIZE//2, 
-                    image=self.piece_images[piece_key]
-                )
+        if self.session.previous_move:
+            for item, square in zip(self.last_move_items,
+                                    (self.session.previous_move.from_square, self.session.previous_move.to_square)):
+                self.canvas.coords(item, *self.square_bbox(square))
+                self.canvas.itemconfigure(item, state=tk.NORMAL)
+        else:
+            for item in self.last_move_items:
+                self.canvas.itemconfigure(item, state=tk.HIDDEN)
+
+        self.update_pieces()
 
         # Update status based on current game state
-        turn_color = "White" if self.board.turn == chess.WHITE else "Black"
+        turn_color = "White" if self.session.board.turn == chess.WHITE else "Black"
         status = f"Game Status: {turn_color} to move"
         
-        if self.board.is_check():
+        if self.session.state.is_check:
             status += " (CHECK)"
         
         self.status_label.config(text=status)
         
         # Update win counters
-        self.user_label.config(text=f"You (White): {self.user_wins} wins")
-        self.ai_label.config(text=f"AI (Black): {self.ai_wins} wins")
+        self.user_label.config(text=f"You (White): {self.session.user_wins} wins")
+        self.ai_label.config(text=f"AI (Black): {self.session.ai_wins} wins")
+
+    def update_pieces(self):
+        """Diffs the board against the drawn pieces and moves, reconfigures or creates only those that changed."""
+        wanted = {}
+        for square, piece in self.session.board.piece_map().items():
+            piece_key = f"{piece.symbol().lower()}{'b' if piece.color else 'w'}"
+            if piece_key in self.piece_images:
+                wanted[square] = piece_key
+
+        # Squares whose drawn piece is gone or different
+        vacated = {}
+        for square, (item, piece_key) in list(self.piece_items.items()):
+            if wanted.get(square) != piece_key:
+                del self.piece_items[square]
+                vacated.setdefault(piece_key, []).append(item)
+
+        for square, piece_key in wanted.items():
+            if square in self.piece_items:
+                continue
+            if vacated.get(piece_key):
+                # The same kind of piece left another square: slide that item over
+                item = vacated[piece_key].pop()
+                self.canvas.coords(item, *self.square_center(square))
+            elif any(vacated.values()):
+                # Promotion or capture reshuffle: reuse any spare item with a new image
+                item = next(items for items in vacated.values() if items).pop()
+                self.canvas.coords(item, *self.square_center(square))
+                self.canvas.itemconfigure(item, image=self.piece_images[piece_key])
+            else:
+                item = self.canvas.create_image(*self.square_center(square),
+                                                image=self.piece_images[piece_key], tags="piece")
+            self.piece_items[square] = (item, piece_key)
+
+        # Captured pieces
+        for items in vacated.values():
+            for item in items:
+                self.canvas.delete(item)
+
+        self.canvas.tag_raise("piece", "lastmove")
+
+    def clear_highlights(self):
+        """Removes the selection and legal-move layer without touching the board."""
+        self.canvas.delete("highlight")
 
     def on_click(self, event):
         """Handles piece selection and movement."""
         col = event.x // self.SQUARE_SIZE
         row = event.y // self.SQUARE_SIZE
+        if not (0 <= col < 8 and 0 <= row < 8):
+            return  # Spare canvas beside a board that is narrower than the window
         square = chess.square(col, 7 - row)
 
-        piece = self.board.piece_at(square)
+        piece = self.session.board.piece_at(square)
+
+        # Ignore clicks once the game is over; while the AI searches its reply they queue premoves
+        if self.session.adjudicated or self.session.state.is_game_over:
+            return
+        if self.ai_suspended:
+            self.ai_suspended = False
+            self.ai_thinking = True
+            self.ai_move()
+            return
+        if self.ai_thinking:
+            self.on_premove_click(square)
+            return
 
         if self.selected_square is None:
             # Select a piece if it's the player's turn
-            if piece and piece.color == self.board.turn:
+            if piece and piece.color == self.session.board.turn:
                 self.selected_square = square
-                print(f"🔵 Selected {chess.square_name(square)}")
+                self.tracer.event("click.select", square=chess.square_name(square))
                 self.highlight_moves(square)
             else:
-                print("❌ Not your piece!")
+                self.tracer.event("click.not_own_piece", square=chess.square_name(square))
         else:
             # Check if clicking the same square (deselect)
             if self.selected_square == square:
@@ -369,52 +684,136 @@ class ChessGUI:
             move = chess.Move(self.selected_square, square)
             
             # Check for promotion
-            if self.is_pawn_promotion(move):
+            if self.session.state.is_promotion(self.selected_square, square):
                 move = self.handle_promotion(move)
                 if not move:  # User canceled promotion
                     self.selected_square = None
                     self.draw_board()
                     return
             
-            if move in self.board.legal_moves:
-                print(f"✅ Moving {chess.square_name(self.selected_square)} → {chess.square_name(square)}")
-                
-                # Store previous move before making new one
-                self.previous_move = move
-
-                self.board.push(move)
-                self.selected_square = None  # Reset selection
-                self.draw_board()
-                
-                # Add AI features after move
-                if self.show_commentary.get():
-                    self.get_game_commentary()
-                if self.show_move_judgment.get():
-                    self.judge_last_move()
-                if self.show_suggestions.get():
-                    self.show_best_move_tip()
-                    
-                self.root.after(500, self.ai_move)
-                
-                # After a successful move, update game history
-                self.update_game_history(move)
+            if self.session.state.is_legal(move):
+                self.play_human_move(move)
             else:
-                print("❌ Invalid move!")
+                self.tracer.event("click.illegal", move=move.uci())
                 self.selected_square = None  # Reset selection
                 self.draw_board()
 
-    def is_pawn_promotion(self, move):
-        """Check if move is a pawn promotion."""
-        piece = self.board.piece_at(move.from_square)
-        if not piece or piece.piece_type != chess.PAWN:
-            return False
+    def play_human_move(self, move):
+        """Plays a legal human move and hands the turn to the AI."""
+        # Keep what the ponder search found, the AI reply reuses it
+        if self.engine_pool:
+            self.last_ponder = self.engine_pool.stop_ponder(self.ponder_job)
+            self.cache_ponder_result(self.last_ponder)
+        self.ponder_job = None
+
+        self.ply_started = time.perf_counter()
+        self.tracer.event("move.human", move=move.uci())
+        self.session.push_move(move)
+        self.start_next_ponder()
+        self.selected_square = None  # Reset selection
+        self.ai_thinking = True
+        self.draw_board()
+        
+        # Add AI features after move
+        if self.show_move_judgment.get():
+            self.judge_last_move()
+        self.request_ply_insight()
+        if self.show_suggestions.get():
+            self.textbox.delete(1.0, tk.END)  # Old hint no longer applies
             
-        # Check if pawn is moving to the last rank
-        if (self.board.turn == chess.WHITE and chess.square_rank(move.to_square) == 7) or \
-           (self.board.turn == chess.BLACK and chess.square_rank(move.to_square) == 0):
-            return True
-        return False
-    
+        self.ai_move_requested = time.perf_counter()
+        self.root.after(500, self.ai_move)
+
+    def premove_board(self):
+        """The position the next premove starts from: queued premoves played, White always to move."""
+        board = self.session.board.copy(stack=False)
+        for move in self.premoves:
+            board.turn = chess.WHITE
+            board.push(move)
+        board.turn = chess.WHITE
+        return board
+
+    def premove_targets(self, board, square):
+        """Squares a premove from `square` could reach, whatever the AI replies.
+
+        Pseudo-legal moves plus pawn captures onto squares that are still
+        empty; the real legality test happens when the AI reply is on the board.
+        """
+        targets = {move.to_square for move in board.pseudo_legal_moves if move.from_square == square}
+        piece = board.piece_at(square)
+        if piece and piece.piece_type == chess.PAWN:
+            targets |= {target for target in board.attacks(square) if board.color_at(target) != chess.WHITE}
+        return targets
+
+    def on_premove_click(self, square):
+        """Selects and queues premoves while the AI is thinking."""
+        board = self.premove_board()
+        if self.selected_square is None:
+            if board.color_at(square) == chess.WHITE:
+                self.selected_square = square
+                self.tracer.event("premove.select", square=chess.square_name(square))
+                self.clear_highlights()
+                self.canvas.create_rectangle(*self.square_bbox(square), outline=self.PREMOVE_COLOR, width=3,
+                                             tags="highlight")
+            else:
+                self.clear_premoves()  # Clicking away cancels the queue
+            return
+
+        from_square, self.selected_square = self.selected_square, None
+        self.clear_highlights()
+        if from_square == square:
+            return
+        if square not in self.premove_targets(board, from_square) or len(self.premoves) >= self.MAX_PREMOVES:
+            self.tracer.event("premove.invalid", move=chess.Move(from_square, square).uci())
+            return
+
+        move = chess.Move(from_square, square)
+        if board.piece_type_at(from_square) == chess.PAWN and chess.square_rank(square) == 7:
+            move.promotion = chess.QUEEN  # No dialog while the reply may land any moment
+        self.premoves.append(move)
+        self.tracer.event("premove.queued", move=move.uci())
+        self.draw_premoves()
+
+    def draw_premoves(self):
+        """Overlays the queued premoves' squares."""
+        self.canvas.delete("premove")
+        for move in self.premoves:
+            for square in (move.from_square, move.to_square):
+                self.canvas.create_rectangle(*self.square_bbox(square), fill=self.PREMOVE_COLOR,
+                                             stipple="gray50", outline="", tags="premove")
+        if self.premoves:
+            self.canvas.tag_raise("piece", "premove")
+
+    def clear_premoves(self, event=None):
+        """Drops every queued premove."""
+        if self.premoves:
+            self.tracer.event("premove.cleared", count=len(self.premoves))
+        self.premoves.clear()
+        self.draw_premoves()
+
+    def try_premove(self):
+        """Plays the first queued premove right after the AI reply; True if it was legal."""
+        if self.session.state.is_game_over or self.session.adjudicated:
+            self.clear_premoves()
+            return False
+        move = self.premoves.pop(0)
+        if not self.session.state.is_legal(move):
+            self.tracer.event("premove.dropped", move=move.uci())
+            self.clear_premoves()
+            return False
+
+        # The ponder begun during the AI reply covers this position, so the premove stops it like a normal move
+        next_ponder, self.next_ponder = self.next_ponder, None
+        if next_ponder and not next_ponder.cancelled and next_ponder.fen == self.session.board.fen():
+            self.ponder_job = next_ponder
+        elif next_ponder:
+            self.engine_pool.stop_ponder(next_ponder)
+
+        self.tracer.event("premove.played", move=move.uci())
+        self.play_human_move(move)
+        self.draw_premoves()
+        return True
+
     def handle_promotion(self, move):
         """Handle pawn promotion with a dialog."""
         promotion_window = tk.Toplevel(self.root)
@@ -466,153 +865,322 @@ class ChessGUI:
         self.root.wait_window(promotion_window)
         return result[0]
 
+    @traced("highlight_moves")
     def highlight_moves(self, square):
         """Highlights possible moves with light blue dots."""
-        self.draw_board()
+        self.clear_highlights()
 
         # Highlight the selected square
-        col, row = chess.square_file(square), 7 - chess.square_rank(square)
-        self.canvas.create_rectangle(
-            col * self.SQUARE_SIZE, row * self.SQUARE_SIZE,
-            (col+1) * self.SQUARE_SIZE, (row+1) * self.SQUARE_SIZE,
-            outline="#FFFF00", width=3
-        )
+        self.canvas.create_rectangle(*self.square_bbox(square), outline="#FFFF00", width=3, tags="highlight")
 
-        # Get all legal moves for this piece
-        for move in self.board.legal_moves:
-            if move.from_square == square:
-                to_square = move.to_square
-                to_col, to_row = chess.square_file(to_square), 7 - chess.square_rank(to_square)
-
-                # If there's a piece at destination, highlight the square
-                if self.board.piece_at(to_square):
-                    self.canvas.create_rectangle(
-                        to_col * self.SQUARE_SIZE, to_row * self.SQUARE_SIZE,
-                        (to_col+1) * self.SQUARE_SIZE, (to_row+1) * self.SQUARE_SIZE,
-                        outline=self.MOVE_HIGHLIGHT, width=3
-                    )
-                else:
-                    # Draw a small dot for valid moves, matching screenshot color
-                    x, y = to_col * self.SQUARE_SIZE + self.SQUARE_SIZE//2, to_row * self.SQUARE_SIZE + self.SQUARE_SIZE//2
-                    self.canvas.create_oval(x-8, y-8, x+8, y+8, fill=self.MOVE_HIGHLIGHT, outline="")
+        # Get all legal moves for this piece (promotions share a target square)
+        for to_square in {move.to_square for move in self.session.state.moves_from.get(square, [])}:
+            # If there's a piece at destination, highlight the square
+            if self.session.board.piece_at(to_square):
+                self.canvas.create_rectangle(*self.square_bbox(to_square),
+                                             outline=self.MOVE_HIGHLIGHT, width=3, tags="highlight")
+            else:
+                # Draw a small dot for valid moves, matching screenshot color
+                x, y = self.square_center(to_square)
+                self.canvas.create_oval(x-8, y-8, x+8, y+8, fill=self.MOVE_HIGHLIGHT, outline="",
+                                        tags="highlight")
 
     def ai_move(self):
         """AI makes a move using Stockfish with ELO scaling."""
-        if not self.board.is_game_over() and self.engine:
-            try:
-                self.engine.configure({"UCI_LimitStrength": True})
-                self.engine.configure({"UCI_Elo": self.ai_elo})
+        if self.ai_move_requested:
+            self.tracer.record("ai_move.delay", self.ai_move_requested, time.perf_counter())
+            self.ai_move_requested = None
+        if self.session.board.turn != chess.BLACK or self.session.adjudicated:  # Game was reset or ended meanwhile
+            return
+        if self.session.state.is_game_over:
+            self.ai_thinking = False
+            self.clear_premoves()
+            self.check_game_status()
+            return
 
-                # AI makes a move
-                result = self.engine.play(self.board, chess.engine.Limit(time=1))
-                self.previous_move = result.move  # Store the AI's move
-                self.board.push(result.move)
-                self.draw_board()
-                
-                # Add AI features after AI move
-                if self.show_commentary.get():
-                    self.get_game_commentary()
-                if self.show_move_judgment.get():
-                    self.judge_last_move()
-                if self.show_suggestions.get():
-                    self.show_best_move_tip()
-                    
-                self.check_game_status()
-                
-                # After AI makes a move, update game history
-                self.update_game_history(result.move)
+        # Book, tablebase or engine cache: answer without an engine round-trip
+        with self.tracer.span("ai_move.lookup") as details:
+            move, source = self.session.instant_ai_move()
+            details["source"] = source
+        if move:
+            self.play_instant_ai_move(move)
+            return
 
-            except Exception as e:
-                print("❌ Error during AI move:", e)
-                messagebox.showerror("Error", "An error occurred with the AI engine.")
-                self.engine.quit()  # Quit the engine if an error occurs
+        if not self.engine_pool:
+            self.ai_thinking = False
+            return
+
+        # Budget for this position and Elo; a ponder hit means the hash already holds it, a short search is enough
+        limit = self.session.plan_search()
+        if self.is_ponder_hit():
+            self.tracer.event("ai_move.ponder_hit")
+            limit = chess.engine.Limit(time=min(limit.time, self.PONDER_HIT_TIME), depth=limit.depth)
+        # Search on the engine that pondered, its hash is the warm one
+        worker = self.last_ponder.worker if self.last_ponder else None
+        self.last_ponder = None
+
+        self.ai_thinking = True
+        self.status_label.config(text="Game Status: AI is thinking...")
+        self.reply_worker = self.engine_pool.submit(
+            "reply", self.session.board, limit, self.on_ai_move_ready,
+            options={"UCI_LimitStrength": True, "UCI_Elo": self.session.ai_elo},
+            worker=worker, timeout=self.ENGINE_TIMEOUT + limit.time).worker
+
+    def play_instant_ai_move(self, move):
+        """Plays an AI move that needed no engine search (book, tablebase, cache)."""
+        self.last_ponder = None
+        self.ai_thinking = False
+        self.apply_ai_move(move)
+
+    def is_ponder_hit(self):
+        """Check whether the human played a move the ponder search had already explored."""
+        ponder = self.last_ponder
+        if not ponder or not self.session.board.move_stack:
+            return False
+        human_move = self.session.board.peek()
+        return (ponder.depth() >= self.PONDER_MIN_DEPTH and
+                ponder.predicted_reply(human_move) is not None)
+
+    def on_ai_move_ready(self, job, result, error):
+        """Applies the AI reply once the background search finishes."""
+        if job.fen != self.session.board.fen():
+            self.tracer.event("ai_move.stale", move=result.move.uci() if result else None)
+            return
+        self.reply_worker = None
+        if job.started:
+            self.tracer.record("engine.queue", job.submitted, job.started, worker=job.worker.name)
+            self.tracer.record("engine.play", job.started, job.finished, worker=job.worker.name,
+                               depth=result.info.get("depth", 0) if result else 0)
+
+        if error:
+            print("❌ Error during AI move:", error)
+            self.ai_move_failures += 1
+            if self.ai_move_failures < self.AI_MOVE_RETRIES:
+                # The pool has already respawned the engine, so retry instead of ending the game
+                self.status_label.config(text="Game Status: AI engine restarted, retrying...")
+                self.root.after(1000, self.ai_move)
+                return
+            # The engine cannot be brought back: suspend the game rather than play moves the engine never chose
+            self.ai_move_failures = 0
+            self.ai_thinking = False
+            self.ai_suspended = True
+            self.status_label.config(text="Game Status: AI engine unavailable - click the board to retry")
+            messagebox.showerror("Engine Error", f"Stockfish failed {self.AI_MOVE_RETRIES} times in a row "
+                                 f"({error}).\nThe game is paused; click the board to try the AI move again.")
+            return
+        self.ai_move_failures = 0
+        self.ai_thinking = False
+
+        # Cache under the nominal budget, a ponder-hit search stands in for the full one
+        self.engine_cache.put(job.board, job.options.get("UCI_Elo"), self.AI_SEARCH_LIMIT,
+                              result.move, result.info.get("score"), result.info.get("pv"),
+                              result.info.get("depth", 0))
+        self.apply_ai_move(result.move)
+
+    def apply_ai_move(self, move):
+        """Plays the AI's move on the board and runs the post-move features."""
+        # The reply's engine is free again for grading that had to wait
+        searches, self.deferred_judge_searches = self.deferred_judge_searches, []
+        for search in searches:
+            search()
+
+        self.session.push_move(move)  # Also becomes the previous move
+        self.draw_board()
+        
+        # Add AI features after AI move
+        if self.show_move_judgment.get():
+            self.judge_last_move()
+        self.request_ply_insight()
+            
+        self.check_game_status()
+        if self.ply_started:
+            self.tracer.record("ply", self.ply_started, time.perf_counter())
+            self.ply_started = None
+
+        # A queued premove goes straight back, without waiting for another click
+        if self.premoves and self.try_premove():
+            return
+        if self.selected_square is not None:
+            # A premove piece picked but not yet moved becomes a normal selection
+            if self.session.board.color_at(self.selected_square) == chess.WHITE:
+                self.highlight_moves(self.selected_square)
+            else:
+                self.selected_square = None
+
+        # Human's turn again: ponder, the hint follows from the analysis
+        self.start_pondering()
+
+    def start_pondering(self):
+        """Start analysing the human's position in the background."""
+        # Adopt the ponder started during the AI reply if the AI played the expected move
+        next_ponder, self.next_ponder = self.next_ponder, None
+        if next_ponder and (next_ponder.cancelled or next_ponder.fen != self.session.board.fen()):
+            # Another line was played, or a search took the engine: ponder afresh
+            self.engine_pool.stop_ponder(next_ponder)
+            next_ponder = None
+
+        if self.session.state.is_game_over or self.session.board.turn != chess.WHITE:
+            return
+        # Book and tablebase positions need no engine, the hint comes from them, unless analysis mode wants lines
+        if not self.show_analysis.get() and (self.session.get_book_move() or
+                                             self.tablebase.best_move(self.session.board)):
+            if next_ponder:
+                self.engine_pool.stop_ponder(next_ponder)
+            if self.show_suggestions.get():
+                self.show_best_move_tip()
+            return
+        if not self.engine_pool:
+            return
+
+        if next_ponder:
+            self.tracer.event("ponder.adopted", depth=next_ponder.depth())
+            self.ponder_job = next_ponder
+        else:
+            self.ponder_job = self.engine_pool.start_ponder(
+                self.session.board, self.on_ponder_update, multipv=self.PONDER_MULTIPV)
+        if self.show_suggestions.get():
+            self.show_best_move_tip()  # A cached hint shows before the first ponder depth
+
+    def start_next_ponder(self):
+        """While the AI searches its reply, ponder the position after the reply we expect on another engine."""
+        if not self.engine_pool or not self.last_ponder or self.session.state.is_game_over:
+            return
+        expected_reply = self.last_ponder.predicted_reply(self.session.board.peek())
+        if expected_reply is None:
+            return
+        board = self.session.board.copy()
+        board.push(expected_reply)
+        self.next_ponder = self.engine_pool.start_ponder(
+            board, self.on_ponder_update, multipv=self.PONDER_MULTIPV, exclude=self.last_ponder.worker)
+
+    def on_ponder_update(self, job):
+        """Refresh the hint whenever the ponder search completes a new depth."""
+        if job is self.ponder_job and self.show_suggestions.get():
+            self.show_best_move_tip()
 
     def show_best_move_tip(self):
         """Displays the best move suggestion for the human player."""
-        print("Attempting to show best move tip...")
-        print(f"Suggestions enabled: {self.show_suggestions.get()}")
-        
         if not self.show_suggestions.get():
-            print("Suggestions are turned off")
             return
         
-        print("Getting best move...")
         best_move = self.get_best_human_move()
         if best_move == chess.Move.null():
-            print("No valid move found")
             return
         
-        print(f"Best move found: {best_move}")
-        
         from_square = chess.square_name(best_move.from_square)
         to_square = chess.square_name(best_move.to_square)
         
         # Get the piece type
-        piece = self.board.piece_at(best_move.from_square)
+        piece = self.session.board.piece_at(best_move.from_square)
         if piece:
             piece_name = "Pawn" if piece.piece_type == chess.PAWN else chess.piece_name(piece.piece_type).capitalize()
             
             # Format exactly as in the screenshot
             move_text = f"Best move: {piece_name} from {from_square} to {to_square}"
             
+            self.textbox.delete(1.0, tk.END)
             self.textbox.insert(tk.END, move_text)
 
     def get_best_human_move(self):
-        """Uses Stockfish to analyze and return the best move for the human player."""
-        if self.engine and not self.board.is_game_over():
-            try:
-                # Analyze the current position for the best human move
-                result = self.engine.play(self.board, chess.engine.Limit(time=1))
-                return result.move
-            except Exception as e:
-                print("❌ Error analyzing the position:", e)
-                return chess.Move.null()
+        """Returns the best move for the human, from the ponder search or the cache, whichever went deeper."""
+        if self.session.state.is_game_over:
+            return chess.Move.null()
+
+        tablebase_move = self.tablebase.best_move(self.session.board)
+        if tablebase_move:
+            return tablebase_move
+
+        book_move = self.session.get_book_move()
+        if book_move:
+            return book_move
+
+        cached = self.engine_cache.get(self.session.board, None, "ponder")
+        job = self.ponder_job
+        if job and job.fen == self.session.board.fen():
+            best_move = job.best_move()
+            if best_move and (not cached or job.depth() >= cached.depth):
+                return best_move
+        if cached:
+            return cached.move
         return chess.Move.null()
 
+    def cache_ponder_result(self, job):
+        """Remember the best line of a finished ponder search for when the position comes back."""
+        if not job:
+            return
+        lines = job.snapshot()
+        if lines:
+            best = lines[0]
+            # The other lines let the judge grade the human's move without a new search
+            alternatives = lines_from_infos(lines[1:])
+            self.engine_cache.put(job.board, None, "ponder", best["pv"][0],
+                                  best.get("score"), best["pv"], best.get("depth", 0), alternatives)
+
+    def cache_analysis(self, board, infos):
+        """Store the lines of a judge search under JUDGE_LIMIT."""
+        lines = lines_from_infos(infos)
+        if lines:
+            best = infos[0]
+            self.engine_cache.put(board, None, self.JUDGE_LIMIT, lines[0][0], lines[0][1],
+                                  best["pv"], best.get("depth", 0), lines[1:])
+
+    def get_judgment_lines(self, board):
+        """Cached (move, score) lines of `board`, from a judge search or a deep enough ponder."""
+        cached = self.engine_cache.get(board, None, self.JUDGE_LIMIT)
+        if cached is None:
+            cached = self.engine_cache.get(board, None, "ponder")
+            if cached is not None and cached.depth < self.JUDGE_MIN_DEPTH:
+                cached = None
+        if cached is None or cached.score is None:
+            return None
+        return [(move, score) for move, score in cached.lines() if score is not None]
+
+    @traced("check_game_status")
     def check_game_status(self):
         """Check if the game is over and update win counts."""
-        if self.board.is_checkmate():
-            if self.board.turn == chess.WHITE:  # AI wins
-                self.ai_wins += 1
-                winner = "AI (Black)"
-            else:  # User wins
-                self.user_wins += 1
-                winner = "You (White)"
+        termination, winner = self.session.check_game_status()
+        if termination == chess.Termination.CHECKMATE:
+            winner = "AI (Black)" if winner == chess.BLACK else "You (White)"
 
             # Update labels immediately
-            self.user_label.config(text=f"You (White): {self.user_wins} wins")
-            self.ai_label.config(text=f"AI (Black): {self.ai_wins} wins")
+            self.user_label.config(text=f"You (White): {self.session.user_wins} wins")
+            self.ai_label.config(text=f"AI (Black): {self.session.ai_wins} wins")
             
             messagebox.showinfo("Game Over", f"Checkmate! {winner} wins.")
-            
-            # Adjust AI difficulty based on results
-            self.adjust_ai_difficulty()
 
-        elif self.board.is_stalemate():
+        elif termination == chess.Termination.STALEMATE:
             messagebox.showinfo("Game Over", "Stalemate! It's a draw.")
-        elif self.board.is_insufficient_material():
+        elif termination == chess.Termination.INSUFFICIENT_MATERIAL:
             messagebox.showinfo("Game Over", "Insufficient material! It's a draw.")
-        elif self.board.is_fifty_moves():
+        elif termination in (chess.Termination.FIFTY_MOVES, chess.Termination.SEVENTYFIVE_MOVES):
             messagebox.showinfo("Game Over", "Fifty-move rule! It's a draw.")
-        elif self.board.is_repetition():
+        elif termination in (chess.Termination.THREEFOLD_REPETITION, chess.Termination.FIVEFOLD_REPETITION):
             messagebox.showinfo("Game Over", "Threefold repetition! It's a draw.")
-
-    def adjust_ai_difficulty(self):
-        """Adjust AI difficulty based on game results."""
-        # If player is winning too much, increase AI difficulty
-        if self.user_wins > self.ai_wins + 2:
-            self.ai_elo = min(3000, self.ai_elo + 100)
-            print(f"🔼 Increasing AI difficulty to ELO {self.ai_elo}")
-        # If AI is winning too much, decrease difficulty
-        elif self.ai_wins > self.user_wins + 2:
-            self.ai_elo = max(1320, self.ai_elo - 100)
-            print(f"🔽 Decreasing AI difficulty to ELO {self.ai_elo}")
+        elif termination == TABLEBASE_DRAW:
+            messagebox.showinfo("Game Over", "Tablebase draw! It's a draw.")
+        else:
+            # Announce forced wins once few pieces remain
+            winner_color = self.session.tablebase_winner()
+            if winner_color is not None:
+                winner = "White" if winner_color == chess.WHITE else "Black"
+                self.status_label.config(text=f"{self.status_label.cget('text')} - tablebase win for {winner}")
 
     def reset_game(self):
         """Reset the game after checkmate or draw."""
-        self.board.reset()
+        self.session.reset()
         self.selected_square = None
-        self.previous_move = None
+        self.ai_thinking = False
+        self.clear_premoves()
+        self.ai_move_failures = 0
+        self.ai_suspended = False
+        self.last_ponder = None
+        self.reply_worker = None
+        self.deferred_judge_searches.clear()
+        if self.engine_pool:
+            self.cache_ponder_result(self.engine_pool.stop_ponder(self.ponder_job))
+            self.engine_pool.cancel_all()
+        self.ponder_job = None
+        self.next_ponder = None
         self.draw_board()
         
         self.status_label.config(text="Game Status: White to move")
@@ -620,46 +1188,205 @@ class ChessGUI:
         # Clear the textbox
         self.textbox.delete(1.0, tk.END)
         
-        # Only show suggestions if they're turned on
-        if self.show_suggestions.get():
-            self.show_best_move_tip()
-        else:
+        # Only show suggestions if they're turned on, the hint arrives from pondering
+        if not self.show_suggestions.get():
             self.textbox.insert(tk.END, "Suggestions are turned off")
+        self.start_pondering()
 
     def close_engine(self):
         """Safely close the Stockfish engine."""
         try:
-            if self.engine:
-                self.engine.quit()
+            pool, self.engine_pool = self.engine_pool, None
+            self.ponder_job = self.next_ponder = None
+            if pool:
                 print("🔻 Closing engine...")
+                pool.stop()
         except Exception as e:
             print("❌ Error closing Stockfish engine:", e)
 
     def on_close(self):
         """Handles closing the application."""
+        if self.TRACE_EXPORT_PATH:
+            try:
+                self.tracer.export(self.TRACE_EXPORT_PATH)
+                print(f"💾 Saved latency trace to {self.TRACE_EXPORT_PATH}")
+            except Exception as e:
+                print(f"❌ Error saving latency trace: {e}")
         self.close_engine()
+        self.llm_scheduler.stop()
+        self.session.journal.close()
+        self.engine_cache.save()
+        self.opening_book.close()
+        self.tablebase.close()
+        self.llm_cache.close()
         self.root.destroy()
 
-    def update_game_history(self, move):
-        """Update the game history after each move"""
-        self.move_history.append(str(move))
-        self.position_history.append(self.board.fen())
-
-    def get_game_context(self):
-        """Get formatted game context for Gemini API"""
-        context = "Game History:\n"
-        for i, (move, position) in enumerate(zip(self.move_history, self.position_history)):
-            turn = "White" if i % 2 == 0 else "Black"
-            context += f"Move {i+1}. {turn}: {move} (Position: {position})\n"
-        context += f"\nCurrent Position: {self.board.fen()}\n"
-        context += f"Current Turn: {'White' if self.board.turn else 'Black'}"
-        return context
+    @traced("gemini.ply_insight")
+    def request_ply_insight(self):
+        """Ask Gemini once per ply for commentary and, on the human's turn, a suggestion."""
+        if not self.show_commentary.get():
+            return
+        # The suggestion rides along for free and is kept for the "Get Suggestion" button
+        want_suggestion = self.show_suggestions.get() and self.session.board.turn == chess.WHITE
+
+        fields = ['"commentary": brief, engaging commentary on the position: evaluation, '
+                  'key tactical or strategic elements, threats or opportunities']
+        if want_suggestion:
+            fields.append('"suggestion": the best move for White in standard notation (e.g., e2e4) '
+                          'and one sentence explaining why')
+
+        try:
+            context = self.session.get_context()
+            field_list = "\n".join(f"- {field}" for field in fields)
+            prompt = f"""As a chess expert and commentator, look at this game:
+
+{context}
+
+Last move: {self.session.previous_move}
+
+Reply with only a JSON object with these keys:
+{field_list}
+Keep every value concise."""
+            
+            kind = "insight:" + ",".join(field.split('"')[1] for field in fields)
+            fen = self.session.board.fen()
+
+            def on_text(text):
+                # Route each field to its panel
+                insight = self.parse_insight(text)
+                if insight.get("commentary"):
+                    self.chat_display.insert(tk.END, f"\nCommentary: {insight['commentary']}\n")
+                if want_suggestion and insight.get("suggestion"):
+                    self.insight_suggestion = (fen, insight["suggestion"])
+                self.chat_display.see(tk.END)
+            self.generate_cached(kind, prompt, on_text,
+                                 on_error=lambda e: print(f"Error getting ply insight: {e}"))
+        except Exception as e:
+            print(f"Error getting ply insight: {e}")
+
+    def generate_cached(self, kind, prompt, on_text, user_text="", on_error=None):
+        """Calls Gemini through the scheduler unless the same kind of prompt was already answered for this position.
+
+        `on_text(text)` runs on the UI thread, and only while the position is still current.
+        """
+        cached = self.llm_cache.get(kind, self.session.board, self.session.previous_move, user_text)
+        if cached is not None:
+            self.tracer.event("gemini.cache_hit", kind=kind)
+            on_text(cached)
+            return
+
+        # Cache key parts as of now, the board moves on while the request waits
+        board, last_move = self.session.board.copy(stack=False), self.session.previous_move
+        ply = self.session.board.ply()
+
+        def generate():
+            start = time.perf_counter()
+            text = self.get_model().generate_content(prompt).text
+            self.tracer.record("gemini.generate", start, time.perf_counter(), ply, kind=kind)
+            return text
+
+        def on_reply(request, text, error):
+            self.tracer.record("gemini.queue", request.submitted, request.started, ply, kind=kind)
+            if error:
+                if on_error:
+                    on_error(error)
+                return
+            self.llm_cache.put(kind, board, last_move, text, user_text)
+            on_text(text)
+
+        self.llm_scheduler.submit(kind, generate, on_reply, ply_bound=not user_text)
+
+    def stream_to_chat(self, kind, label, prompt, user_text="", on_error=None):
+        """Streams a Gemini reply into the chat panel, or shows the cached one straight away."""
+        cached = self.llm_cache.get(kind, self.session.board, self.session.previous_move, user_text)
+        if cached is not None:
+            self.tracer.event("gemini.cache_hit", kind=kind)
+            self.chat_display.insert(tk.END, f"\n{label}: {cached}\n")
+            self.chat_display.see(tk.END)
+            return
+
+        # Cache key parts as of now, the board moves on while the reply streams
+        board, last_move = self.session.board.copy(stack=False), self.session.previous_move
+
+        ply = self.session.board.ply()
+        generation = self.session.generation
+
+        def send():
+            # Runs on a scheduler thread: the request goes out here, the chunks are read by the streamer
+            return time.perf_counter(), self.get_model().generate_content(prompt, stream=True)
+
+        def on_response(request, result, error):
+            self.tracer.record("gemini.queue", request.submitted, request.started, ply, kind=kind)
+            if error:
+                if on_error:
+                    on_error(error)
+                return
+            start, response = result
+
+            def open_stream():
+                first_chunk = True
+                for chunk in response:
+                    if first_chunk:
+                        self.tracer.record("gemini.first_chunk", start, time.perf_counter(), ply, kind=kind)
+                        first_chunk = False
+                    try:
+                        yield chunk.text
+                    except ValueError:  # Chunk without text (e.g. blocked by safety filters)
+                        continue
+                self.tracer.record("gemini.stream", start, time.perf_counter(), ply, kind=kind)
+
+            def on_done(text, error, stopped):
+                if error:
+                    if on_error:
+                        on_error(error)
+                elif not stopped:
+                    self.llm_cache.put(kind, board, last_move, text, user_text)
+
+            # The user's own chat is always shown; anything else only while its ply is current
+            is_stale = None if user_text else (lambda: self.session.generation != generation)
+            self.chat_streamer.start(label, open_stream, on_done, is_stale, lambda: self.close_response(response))
+
+        self.llm_scheduler.submit(kind, send, on_response, ply_bound=not user_text)
+
+    @staticmethod
+    def close_response(response):
+        """Cancel the gRPC/HTTP stream behind a streaming Gemini response."""
+        # The SDK keeps the transport iterator private; it has cancel() (gRPC) or close() (REST)
+        stream = getattr(response, "_iterator", response)
+        for name in ("cancel", "close"):
+            method = getattr(stream, name, None)
+            if method:
+                method()
+                return
+
+    def stop_stream(self):
+        """Stops the Gemini reply that is streaming into the chat."""
+        self.chat_streamer.stop()
+
+    def parse_insight(self, text):
+        """Pull the JSON object out of a Gemini reply; unparseable text is treated as commentary."""
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            try:
+                insight = json.loads(text[start:end + 1])
+                if isinstance(insight, dict):
+                    return {key: str(value) for key, value in insight.items() if value}
+            except ValueError:
+                pass
+        print("Ply insight was not valid JSON, showing it as commentary")
+        return {"commentary": text.strip()}
 
     def get_ai_suggestion(self):
         """Get a suggested move from Gemini AI with full game context"""
+        # This ply's insight already carried a suggestion: no second request
+        if self.insight_suggestion and self.insight_suggestion[0] == self.session.board.fen():
+            self.chat_display.insert(tk.END, f"\nAI Suggestion: {self.insight_suggestion[1]}\n")
+            self.chat_display.see(tk.END)
+            return
+
         try:
             # Create a prompt with full game context
-            context = self.get_game_context()
+            context = self.session.get_context()
             prompt = f"""As a chess expert, analyze this position briefly:
 
 {context}
@@ -669,13 +1396,10 @@ Provide only:
 2. One sentence explanation why this move is good.
 Be concise."""
             
-            # Get response from Gemini
-            response = self.model.generate_content(prompt)
-            suggestion = response.text
-            
-            # Display the suggestion in the chat
-            self.chat_display.insert(tk.END, f"\nAI Suggestion: {suggestion}\n")
-            self.chat_display.see(tk.END)
+            # Stream the suggestion into the chat
+            def on_error(e):
+                messagebox.showerror("Error", f"Failed to get AI suggestion: {str(e)}")
+            self.stream_to_chat("suggestion", "AI Suggestion", prompt, on_error=on_error)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to get AI suggestion: {str(e)}")
@@ -693,7 +1417,7 @@ Be concise."""
             self.chat_input.delete("1.0", tk.END)
             
             # Create a prompt with full game context
-            context = self.get_game_context()
+            context = self.session.get_context()
             prompt = f"""You are a chess assistant. Current game state:
 
 {context}
@@ -702,13 +1426,10 @@ User: {message}
 
 Provide a brief, direct response in 1-2 sentences."""
             
-            # Get response from Gemini
-            response = self.model.generate_content(prompt)
-            ai_response = response.text
-            
-            # Display AI response
-            self.chat_display.insert(tk.END, f"\nAI: {ai_response}\n")
-            self.chat_display.see(tk.END)
+            # Stream the AI response into the chat
+            def on_error(e):
+                messagebox.showerror("Error", f"Failed to send message: {str(e)}")
+            self.stream_to_chat("chat", "AI", prompt, user_text=message, on_error=on_error)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to send message: {str(e)}")
@@ -720,12 +1441,133 @@ Provide a brief, direct response in 1-2 sentences."""
             if not os.path.exists(self.STOCKFISH_PATH):
                 raise FileNotFoundError(f"Stockfish executable not found at: {self.STOCKFISH_PATH}")
             
-            self.engine = chess.engine.SimpleEngine.popen_uci(self.STOCKFISH_PATH)
-            print("✅ Stockfish engine loaded successfully!")
+            self.engine_pool = EnginePool(self.STOCKFISH_PATH, self.post_to_ui,
+                                          size=self.ENGINE_POOL_SIZE, options=self.ENGINE_OPTIONS,
+                                          request_timeout=self.ENGINE_TIMEOUT)
+            self.engine_pool.start()
+            self.profiler.background("stockfish spawn", self.wait_for_engines)
         except Exception as e:
             print(f"❌ Error loading Stockfish: {str(e)}")
             messagebox.showerror("Error", f"Stockfish engine could not be loaded: {str(e)}\nPlease verify the path: {self.STOCKFISH_PATH}")
-            self.engine = None
+            self.engine_pool = None
+
+    def wait_for_engines(self):
+        """Background thread: report once the engine processes are up, or that none could start."""
+        pool = self.engine_pool
+        if pool is None:
+            return
+        if pool.wait_ready():
+            print("✅ Stockfish engine loaded successfully!")
+        else:
+            message = f"Stockfish engine could not be started.\nPlease verify the path: {self.STOCKFISH_PATH}"
+            self.post_to_ui(lambda: messagebox.showerror("Error", message))
+
+    def toggle_analysis(self):
+        """Start or stop drawing the live analysis overlays."""
+        if self.analysis_refresh_job:
+            self.root.after_cancel(self.analysis_refresh_job)
+            self.analysis_refresh_job = None
+        self.analysis_seen = None
+        if self.show_analysis.get():
+            if self.ponder_job is None and not self.ai_thinking:
+                self.start_pondering()  # Book and tablebase positions were not being analysed
+            self.refresh_analysis()
+        else:
+            self.hide_analysis()
+
+    def refresh_analysis(self):
+        """One analysis frame: redraw from the ponder lines if they changed since the last frame."""
+        self.analysis_refresh_job = self.root.after(1000 // self.ANALYSIS_FPS, self.refresh_analysis)
+        job = self.ponder_job
+        if not job or job.fen != self.session.board.fen():
+            # The position moved on, the old lines no longer apply
+            if self.analysis_seen is not None:
+                self.hide_analysis()
+                self.analysis_seen = None
+            return
+        if self.analysis_seen == (job, job.updates):
+            return
+        self.analysis_seen = (job, job.updates)
+        self.draw_analysis(job.snapshot())
+
+    def draw_analysis(self, lines):
+        """Points the eval bar and the arrows at `lines`, touching only the items whose content changed."""
+        if not lines:
+            return
+        changed = False
+        score = lines[0].get("score")
+        if score is not None:
+            cp = max(-1000, min(1000, centipawns(score, chess.WHITE)))
+            white_share = 1 / (1 + 10 ** (-cp / 400))  # Expected score, so small edges show and big ones saturate
+            mate = score.white().mate()
+            label = f"M{abs(mate)}" if mate is not None else f"{cp / 100:+.1f}"
+            width = max(6, self.SQUARE_SIZE // 8)
+            x1, x2 = self.BOARD_SIZE - width, self.BOARD_SIZE
+            split = round(self.BOARD_SIZE * (1 - white_share))
+            background, white, text = self.eval_bar_items
+            changed |= self.update_analysis_item(background, (x1, 0, x2, self.BOARD_SIZE))
+            changed |= self.update_analysis_item(white, (x1, split, x2, self.BOARD_SIZE))
+            # Score label beside the bar, at the end of whoever is ahead
+            changed |= self.update_analysis_item(text, (x1 - 2, self.BOARD_SIZE - 2 if cp >= 0 else 2), text=label,
+                                      anchor=tk.SE if cp >= 0 else tk.NE, fill="black")
+
+        for rank, item in enumerate(self.arrow_items):
+            if rank >= len(lines):
+                changed |= self.update_analysis_item(item, None)
+                continue
+            move = lines[rank]["pv"][0]
+            changed |= self.update_analysis_item(item, self.square_center(move.from_square) + self.square_center(move.to_square),
+                                      width=max(2, self.SQUARE_SIZE // (6 + 3 * rank)))
+        if changed:
+            self.canvas.tag_raise("analysis")
+
+    def update_analysis_item(self, item, coords, **options):
+        """Moves and reconfigures one overlay item if what it should show differs from what it shows; True if it did."""
+        wanted = (coords, tuple(sorted(options.items())))
+        if self.analysis_drawn.get(item) == wanted:
+            return False
+        self.analysis_drawn[item] = wanted
+        if coords is None:
+            self.canvas.itemconfigure(item, state=tk.HIDDEN)
+        else:
+            self.canvas.coords(item, *coords)
+            self.canvas.itemconfigure(item, state=tk.NORMAL, **options)
+        return True
+
+    def hide_analysis(self):
+        """Hides the eval bar and arrows."""
+        self.canvas.itemconfigure("analysis", state=tk.HIDDEN)
+        self.analysis_drawn.clear()
+
+    def toggle_perf_overlay(self):
+        """Show or hide the p50/p95 per stage overlay on the board."""
+        if self.perf_overlay_job:
+            self.root.after_cancel(self.perf_overlay_job)
+            self.perf_overlay_job = None
+        if self.show_perf_overlay.get():
+            self.refresh_perf_overlay()
+        else:
+            self.canvas.delete("perf")
+
+    def refresh_perf_overlay(self):
+        """Redraw the overlay from the trace buffer, once a second while it is on."""
+        self.perf_overlay_job = None
+        if not self.show_perf_overlay.get():
+            return
+        lines = [f"{'stage':<20}{'p50':>7}{'p95':>8}{'n':>5}"]
+        for name, stat in sorted(self.tracer.stats().items()):
+            lines.append(f"{name:<20}{stat['p50_ms']:>7.1f}{stat['p95_ms']:>8.1f}{stat['n']:>5}")
+        if len(lines) == 1:
+            lines.append("(no spans yet)")
+
+        self.canvas.delete("perf")
+        text = self.canvas.create_text(self.BOARD_SIZE - 6, 6, text="\n".join(lines), anchor=tk.NE,
+                                       fill="white", font=("Consolas", 8), tags="perf")
+        x1, y1, x2, y2 = self.canvas.bbox(text)
+        background = self.canvas.create_rectangle(x1 - 4, y1 - 3, x2 + 4, y2 + 3, fill="black",
+                                                  stipple="gray50", outline="", tags="perf")
+        self.canvas.tag_lower(background, text)
+        self.perf_overlay_job = self.root.after(1000, self.refresh_perf_overlay)
 
     def toggle_commentary(self):
         """Toggle live game commentary"""
@@ -746,7 +1588,7 @@ Provide a brief, direct response in 1-2 sentences."""
     def get_game_commentary(self):
         """Get real-time commentary about the current game state"""
         try:
-            context = self.get_game_context()
+            context = self.session.get_context()
             prompt = f"""As a chess commentator, provide a brief, engaging commentary about the current game state:
 
 {context}
@@ -757,46 +1599,117 @@ Focus on:
 3. Potential threats or opportunities
 Keep it concise and engaging."""
             
-            response = self.model.generate_content(prompt)
-            commentary = response.text
-            
-            self.chat_display.insert(tk.END, f"\nCommentary: {commentary}\n")
-            self.chat_display.see(tk.END)
+            self.stream_to_chat("commentary", "Commentary", prompt,
+                                on_error=lambda e: print(f"Error getting commentary: {e}"))
             
         except Exception as e:
             print(f"Error getting commentary: {e}")
 
     def judge_last_move(self):
-        """Judge the last move made in the game"""
+        """Grade the last move from engine analysis: cached lines show at once, otherwise a short search runs"""
+        board = self.session.board
+        if not board.move_stack:
+            return
+        move = board.peek()
+        before = board.copy()
+        before.pop()
+
+        lines = self.get_judgment_lines(before)
+        if lines:
+            self.finish_judgment(before, move, lines)
+        elif self.engine_pool:
+            def on_lines(job, result, error):
+                if error or not result:
+                    print(f"Error judging move: {error}")
+                    return
+                self.cache_analysis(job.board, result)
+                if self.is_current_move(before, move):
+                    self.finish_judgment(before, move, lines_from_infos(result))
+            self.submit_judge_search(before, self.JUDGE_MULTIPV, on_lines)
+
+    def finish_judgment(self, before, move, lines):
+        """Show the grade, scoring the position after `move` first if no line covers it."""
+        judgment = judge_move(before, move, lines)
+        if judgment:
+            self.show_judgment(judgment)
+            return
+
+        after = before.copy()
+        after.push(move)
+        after_lines = self.get_judgment_lines(after)
+        if after_lines:
+            self.show_judgment(judge_move(before, move, lines, after_lines[0][1]))
+        elif self.engine_pool:
+            def on_score(job, result, error):
+                if error or not result or not lines_from_infos(result):
+                    print(f"Error judging move: {error}")
+                    return
+                if self.is_current_move(before, move):
+                    self.show_judgment(judge_move(before, move, lines, lines_from_infos(result)[0][1]))
+            self.submit_judge_search(after, 1, on_score)
+
+    def submit_judge_search(self, board, multipv, callback):
+        """Run a judge search on an engine that neither ponders nor plays the reply, or wait for one."""
+        job = self.engine_pool.submit("analyse", board, self.JUDGE_LIMIT, callback,
+                                      options={"UCI_LimitStrength": False}, multipv=multipv,
+                                      exclude=self.judge_exclude(), preempt=False)
+        if job is None:
+            # Grading never delays the reply or cuts a ponder short, it runs once the reply is in
+            self.deferred_judge_searches.append(lambda: self.submit_judge_search(board, multipv, callback))
+
+    def judge_exclude(self):
+        """Worker the AI reply runs on, or will: the one whose hash is warm from pondering."""
+        if self.reply_worker:
+            return self.reply_worker
+        return self.last_ponder.worker if self.last_ponder else None
+
+    def is_current_move(self, before, move):
+        """True while `move` played from `before` is still part of the game on the board."""
+        played = before.move_stack + [move]
+        return self.session.board.move_stack[:len(played)] == played and self.show_move_judgment.get()
+
+    def show_judgment(self, judgment):
+        """Print a grade in the chat and keep it for "Explain Move"."""
+        self.last_judgment = judgment
+        self.chat_display.insert(tk.END, f"\nMove Judgment: {judgment.summary()}\n")
+        self.chat_display.see(tk.END)
+
+    def explain_last_move(self):
+        """Ask Gemini to put the engine's grade of the last move into words"""
+        judgment = self.last_judgment
+        board = self.session.board
+        if not judgment or not board.move_stack or board.peek() != judgment.move:
+            self.chat_display.insert(tk.END, "\nTurn on Move Judgment and make a move to get an explanation\n")
+            self.chat_display.see(tk.END)
+            return
+
         try:
-            if not self.previous_move:
-                return
-                
-            context = self.get_game_context()
-            prompt = f"""As a chess expert, evaluate the last move made in this game:
+            context = self.session.get_context()
+            if judgment.move == judgment.best_move:
+                verdict = "It was the engine's top choice."
+            else:
+                verdict = f"It lost {judgment.cp_loss} centipawns; the engine preferred {judgment.best_san}."
+            prompt = f"""As a chess coach, explain this engine verdict on the last move of the game:
 
 {context}
 
-Last move: {self.previous_move}
+Last move: {judgment.san}, graded {judgment.grade}. {verdict}
 
-Provide a brief evaluation:
-1. Is it a good move? (Excellent/Good/Questionable/Poor)
-2. One sentence explanation why
-Keep it concise."""
+In one or two sentences, explain why. Do not change the grade."""
             
-            response = self.model.generate_content(prompt)
-            judgment = response.text
-            
-            self.chat_display.insert(tk.END, f"\nMove Judgment: {judgment}\n")
-            self.chat_display.see(tk.END)
+            self.stream_to_chat("explain", "Move Explanation", prompt,
+                                on_error=lambda e: print(f"Error explaining move: {e}"))
             
         except Exception as e:
-            print(f"Error judging move: {e}")
+            print(f"Error explaining move: {e}")
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    root.configure(bg="#2C3E50")
-    gui = ChessGUI(root)
+    profiler = StartupProfiler(enabled="--profile-startup" in sys.argv)
+    with profiler.phase("tk root"):
+        root = tk.Tk()
+        root.configure(bg="#2C3E50")
+    with profiler.phase("window build"):
+        gui = ChessGUI(root, profiler)
     
     # Bind the window close button (cross) to our custom on_close method
     root.protocol("WM_DELETE_WINDOW", gui.on_close)
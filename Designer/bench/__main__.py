@@ -0,0 +1,83 @@
+"""Benchmarks for rendering, prompt context and per-ply latency.
+
+Runs the real GUI against a fake UCI engine and a fake Gemini model, so
+no Stockfish or API key is needed. Tk needs a display; on a server use
+Xvfb. Run from the Designer directory:
+
+    xvfb-run -a python -m bench --save bench/baseline.json
+    xvfb-run -a python -m bench --compare bench/baseline.json
+
+--compare exits with status 1 when a p50 or p95 got slower than the
+baseline by more than --threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+from bench.suite import BenchSuite
+
+NOISE_FLOOR_MS = 0.05  # Differences below this are timer noise, never a regression
+
+
+def compare(results, baseline, threshold):
+    """Print old vs new for every metric; return the names that regressed."""
+    regressions = []
+    print(f"\n{'metric':<24}{'stat':>6}{'baseline':>11}{'now':>11}{'change':>9}")
+    for name, summary in results.items():
+        old = baseline.get(name)
+        if not old:
+            print(f"{name:<24}{'':>6}{'-':>11}{summary['p50_ms']:>11.3f}   (new)")
+            continue
+        for stat in ("p50_ms", "p95_ms"):
+            before, now = old[stat], summary[stat]
+            change = (now - before) / before if before else 0.0
+            slower = change > threshold and now - before > NOISE_FLOOR_MS
+            flag = "  <-- slower" if slower else ""
+            print(f"{name:<24}{stat[:3]:>6}{before:>11.3f}{now:>11.3f}{change:>+9.0%}{flag}")
+            if slower:
+                regressions.append(f"{name} {stat[:3]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chess GUI with fake engine and Gemini backends.")
+    parser.add_argument("--save", help="Write the results as a baseline JSON file")
+    parser.add_argument("--compare", help="Compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before failing (0.10 = 10%%)")
+    parser.add_argument("--quick", action="store_true", help="Fewer samples, for a smoke run")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds the fake Gemini takes per call")
+    parser.add_argument("--ai-time", type=float, default=0.05, help="Search time of the AI reply")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    suite = BenchSuite(seed=args.seed, llm_latency=args.llm_latency, ai_time=args.ai_time)
+    try:
+        results = suite.run(quick=args.quick)
+    finally:
+        suite.close()
+
+    print(f"\n{'metric':<24}{'n':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}  (ms)")
+    for name, summary in results.items():
+        print(f"{name:<24}{summary['n']:>6}{summary['mean_ms']:>10.3f}{summary['p50_ms']:>10.3f}"
+              f"{summary['p95_ms']:>10.3f}{summary['max_ms']:>10.3f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+                       "platform": platform.platform(), "args": vars(args), "results": results}, f, indent=2)
+        print(f"💾 Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ Slower than the baseline: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
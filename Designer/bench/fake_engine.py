@@ -0,0 +1,129 @@
+"""A tiny UCI engine for benchmarks: instant, deterministic, no Stockfish needed.
+
+It answers `go` with the first legal move by a fixed preference (captures
+and checks first), streams a few `info` lines per depth so pondering and
+multipv work, and honours movetime, depth, infinite and stop.
+
+    python bench/fake_engine.py
+"""
+import sys
+import threading
+import time
+
+import chess
+
+DEPTH_MS = 5  # Pretend every depth takes this long
+
+
+class FakeEngine:
+    """Reads UCI commands from stdin and answers on stdout."""
+
+    def __init__(self):
+        self.board = chess.Board()
+        self.multipv = 1
+        self.search = None
+        self.stop_flag = threading.Event()
+        self.out_lock = threading.Lock()
+
+    def out(self, line):
+        with self.out_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    def ranked_moves(self):
+        """Legal moves, most forcing first, ties in UCI order so replies are reproducible."""
+        board = self.board
+
+        def key(move):
+            return (not board.is_capture(move), not board.gives_check(move), move.uci())
+
+        return sorted(board.legal_moves, key=key)
+
+    def run_search(self, movetime, depth_limit, infinite):
+        """Search thread: one set of info lines per depth until a limit or `stop`."""
+        moves = self.ranked_moves()
+        start = time.monotonic()
+        depth = 0
+        while moves:
+            depth += 1
+            for slot, move in enumerate(moves[:self.multipv], 1):
+                board = self.board.copy(stack=False)
+                board.push(move)
+                reply = next(iter(board.legal_moves), None)
+                pv = move.uci() + (f" {reply.uci()}" if reply else "")
+                score = 20 - 10 * slot
+                self.out(f"info depth {depth} multipv {slot} score cp {score} nodes {depth * 1000} pv {pv}")
+            if self.stop_flag.wait(DEPTH_MS / 1000):
+                break
+            if not infinite:
+                if depth_limit and depth >= depth_limit:
+                    break
+                if movetime is not None and (time.monotonic() - start) * 1000 >= movetime:
+                    break
+                if depth >= 64:
+                    break
+        if infinite:
+            self.stop_flag.wait()  # UCI: never report bestmove before `stop` in infinite mode
+        best = moves[0].uci() if moves else "0000"
+        self.out(f"bestmove {best}")
+
+    def stop_search(self):
+        if self.search:
+            self.stop_flag.set()
+            self.search.join()
+            self.search = None
+
+    def handle(self, line):
+        parts = line.split()
+        if not parts:
+            return True
+        command = parts[0]
+        if command == "uci":
+            self.out("id name FakeEngine")
+            self.out("option name Hash type spin default 16 min 1 max 4096")
+            self.out("option name Threads type spin default 1 min 1 max 64")
+            self.out("option name MultiPV type spin default 1 min 1 max 500")
+            self.out("option name UCI_LimitStrength type check default false")
+            self.out("option name UCI_Elo type spin default 1320 min 1320 max 3190")
+            self.out("uciok")
+        elif command == "isready":
+            self.out("readyok")
+        elif command == "setoption" and "name" in parts and "value" in parts:
+            name = " ".join(parts[parts.index("name") + 1:parts.index("value")])
+            if name.lower() == "multipv":
+                self.multipv = max(1, int(parts[parts.index("value") + 1]))
+        elif command == "ucinewgame":
+            self.board = chess.Board()
+        elif command == "position":
+            moves_at = parts.index("moves") if "moves" in parts else len(parts)
+            if parts[1] == "startpos":
+                self.board = chess.Board()
+            else:
+                self.board = chess.Board(" ".join(parts[2:moves_at]))
+            for uci in parts[moves_at + 1:]:
+                self.board.push_uci(uci)
+        elif command == "go":
+            self.stop_search()
+            self.stop_flag.clear()
+            movetime = int(parts[parts.index("movetime") + 1]) if "movetime" in parts else None
+            depth = int(parts[parts.index("depth") + 1]) if "depth" in parts else None
+            infinite = "infinite" in parts or (movetime is None and depth is None)
+            self.search = threading.Thread(target=self.run_search, args=(movetime, depth, infinite), daemon=True)
+            self.search.start()
+        elif command == "stop":
+            self.stop_search()
+        elif command == "quit":
+            self.stop_search()
+            return False
+        return True
+
+
+def main():
+    engine = FakeEngine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+
+
+if __name__ == "__main__":
+    main()
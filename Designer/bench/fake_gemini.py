@@ -0,0 +1,51 @@
+import json
+import time
+
+
+class FakeChunk:
+    """One streamed piece of a fake reply."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeResponse:
+    """Whole fake reply, shaped like the google-generativeai response."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel with a fixed, configurable latency.
+
+    Prompts that ask for JSON get every insight key back, so the per-ply
+    insight path is exercised exactly like with the real model.
+    """
+
+    def __init__(self, latency=0.2, chunk_delay=0.01):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+
+    def reply_for(self, prompt):
+        if "JSON" in prompt:
+            return json.dumps({
+                "commentary": "White keeps a small space advantage in the centre.",
+                "suggestion": "e2e4 - takes the centre.",
+            })
+        return "Develop your pieces and keep the king safe."
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        text = self.reply_for(prompt)
+        if not stream:
+            time.sleep(self.latency)
+            return FakeResponse(text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        time.sleep(self.latency)
+        for word in text.split(" "):
+            time.sleep(self.chunk_delay)
+            yield FakeChunk(word + " ")
@@ -0,0 +1,179 @@
+"""Load generator for the game server: many simulated players, moves/sec and reply latency.
+
+Starts the server in-process on a free port (fake engine and fake Gemini
+unless --engine is given) and lets `--players` clients play random legal
+moves over keep-alive HTTP, asking for a hint or a chat reply now and then.
+Run from the Designer directory:
+
+    python -m bench.load --players 200 --duration 30
+    python -m bench.load --url http://127.0.0.1:8765 --players 50    # Against a running server
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from urllib.parse import urlparse
+
+import server
+
+
+class Client:
+    """One keep-alive HTTP connection speaking the server's JSON."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        """(status, payload) of one request."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+class LoadStats:
+    def __init__(self):
+        self.move_times = []
+        self.hint_times = []
+        self.chat_times = []
+        self.games_finished = 0
+        self.errors = 0
+
+
+async def player(client, stats, deadline, rng, hint_rate, chat_rate):
+    """Play games until `deadline`, timing every request."""
+    status, state = await client.request("POST", "/games", {"ai_elo": rng.choice([1320, 1600, 2000])})
+    if status != 201:
+        stats.errors += 1
+        return
+    game = f"/games/{state['id']}"
+    while time.perf_counter() < deadline:
+        if state["status"] != "ongoing":
+            stats.games_finished += 1
+            status, state = await client.request("POST", game + "/new")
+            continue
+        if state["turn"] == "black":
+            # The engine failed on the last move, the AI reply is still owed
+            status, new_state = await client.request("POST", game + "/reply")
+            if status == 200:
+                state = new_state
+            else:
+                stats.errors += 1
+            continue
+        if rng.random() < hint_rate:
+            start = time.perf_counter()
+            status, _ = await client.request("GET", game + "/hint")
+            stats.hint_times.append(time.perf_counter() - start)
+        if rng.random() < chat_rate:
+            start = time.perf_counter()
+            status, _ = await client.request("POST", game + "/chat", {"message": "What is my plan here?"})
+            stats.chat_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        status, new_state = await client.request("POST", game + "/move", {"move": rng.choice(state["legal_moves"])})
+        if status != 200:
+            stats.errors += 1
+            status, state = await client.request("GET", game)
+            continue
+        stats.move_times.append(time.perf_counter() - start)
+        state = new_state
+
+
+async def run(args):
+    task = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port
+    else:
+        os.environ.setdefault("GEMINI_RPM", "0")  # The fake model has no quota to protect
+        server_args = server.build_parser().parse_args([
+            "--port", "0", "--engines", str(args.engines), "--time", str(args.ai_time),
+            "--hint-time", str(args.ai_time), "--max-sessions", str(max(1000, args.players))]
+            + (["--engine", args.engine] if args.engine else ["--fake-engine"]) + ["--fake-gemini"])
+        ready = asyncio.Event()
+        task = asyncio.create_task(server.serve(server_args, ready))
+        await ready.wait()
+        host, port = server_args.host, server_args.port
+
+    stats = LoadStats()
+    clients = [Client(host, port) for _ in range(args.players)]
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(player(client, stats, deadline, random.Random(args.seed + i), args.hint_rate, args.chat_rate)
+                           for i, client in enumerate(clients)))
+    elapsed = time.perf_counter() - start
+
+    _, server_stats = await clients[0].request("GET", "/stats")
+    for client in clients:
+        client.close()
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    return stats, elapsed, server_stats
+
+
+def summarize(samples):
+    """Milliseconds summary with p99, which is what a server is judged on."""
+    ms = sorted(sample * 1000 for sample in samples)
+    return {
+        "n": len(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": ms[len(ms) // 2],
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        "p99_ms": ms[min(len(ms) - 1, int(len(ms) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the game server with simulated players.")
+    parser.add_argument("--url", help="A running server; by default one is started in-process")
+    parser.add_argument("--engine", help="Real UCI engine for the in-process server (default: fake engine)")
+    parser.add_argument("--engines", type=int, default=4, help="Engine pool size of the in-process server")
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds to play")
+    parser.add_argument("--ai-time", type=float, default=0.02, help="Search time of AI replies and hints")
+    parser.add_argument("--hint-rate", type=float, default=0.1, help="Share of moves preceded by a hint")
+    parser.add_argument("--chat-rate", type=float, default=0.02, help="Share of moves preceded by a chat message")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stats, elapsed, server_stats = asyncio.run(run(args))
+    print(f"\n{len(stats.move_times)} moves by {args.players} players in {elapsed:.1f}s: "
+          f"{len(stats.move_times) / elapsed:.1f} moves/sec, {stats.games_finished} games finished, "
+          f"{stats.errors} errors")
+    print(f"{'request':<8}{'n':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for name, samples in (("move", stats.move_times), ("hint", stats.hint_times), ("chat", stats.chat_times)):
+        if samples:
+            summary = summarize(samples)
+            print(f"{name:<8}{summary['n']:>7}{summary['mean_ms']:>10.1f}{summary['p50_ms']:>10.1f}"
+                  f"{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}")
+    print(f"server: {json.dumps(server_stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import chess
+import chess.engine
+
+import app
+from engine_worker import EnginePool
+from game_session import GameSession
+
+from bench.fake_gemini import FakeModel
+
+FAKE_ENGINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_engine.py")
+
+
+class QuietMessagebox:
+    """Game-over and error dialogs would block the run; print them instead."""
+
+    @staticmethod
+    def showinfo(title, message, **kwargs):
+        print(f"[{title}] {message}")
+
+    @staticmethod
+    def showerror(title, message, **kwargs):
+        print(f"[{title}] {message}")
+
+
+class BenchGUI(app.ChessGUI):
+    """The real GUI wired to the fake engine and the fake Gemini model."""
+
+    LLM_LATENCY = 0.2
+
+    def initialize_gemini_api(self):
+        self.model = FakeModel(latency=self.LLM_LATENCY)
+        self.model_lock = threading.Lock()
+
+    def initialize_stockfish(self):
+        self.engine_pool = EnginePool([sys.executable, FAKE_ENGINE], self.post_to_ui,
+                                      size=self.ENGINE_POOL_SIZE, options=self.ENGINE_OPTIONS,
+                                      request_timeout=self.ENGINE_TIMEOUT)
+        self.engine_pool.start()
+
+
+class ClickEvent:
+    """Just enough of a Tk event for on_click."""
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def summarize(samples):
+    """Milliseconds summary of a list of durations in seconds."""
+    ms = sorted(sample * 1000 for sample in samples)
+    return {
+        "n": len(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": ms[len(ms) // 2],
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        "max_ms": ms[-1],
+    }
+
+
+def random_game(plies, seed):
+    """A reproducible game of exactly `plies` moves that never ends early."""
+    rng = random.Random(seed)
+    while True:
+        board = chess.Board()
+        moves = []
+        while len(moves) < plies:
+            candidates = []
+            for move in board.legal_moves:
+                board.push(move)
+                if not board.is_game_over(claim_draw=True):
+                    candidates.append(move)
+                board.pop()
+            if not candidates:
+                break
+            move = rng.choice(candidates)
+            board.push(move)
+            moves.append(move)
+        if len(moves) == plies:
+            return moves
+        seed += 1
+        rng = random.Random(seed)
+
+
+def pump(root, until, timeout=10.0):
+    """Run the Tk loop until `until()` is true; False on timeout."""
+    deadline = time.perf_counter() + timeout
+    while not until():
+        if time.perf_counter() > deadline:
+            return False
+        root.update()
+        time.sleep(0.0005)
+    return True
+
+
+class BenchSuite:
+    """Builds one GUI under a (virtual) display and measures it."""
+
+    def __init__(self, seed=0, llm_latency=0.2, ai_time=0.05):
+        self.seed = seed
+        self.ai_time = ai_time
+        # Nothing from a previous run may answer from a cache
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["LLM_CACHE_PATH"] = os.path.join(self.tmpdir.name, "llm_cache.db")
+        os.environ.pop("ENGINE_CACHE_PATH", None)
+        os.environ["OPENING_BOOK_PATH"] = os.path.join(self.tmpdir.name, "no-book.bin")
+        os.environ["GEMINI_MODEL_CACHE"] = os.path.join(self.tmpdir.name, "gemini_model")
+        os.environ["GAME_JOURNAL_PATH"] = os.path.join(self.tmpdir.name, "game_journal.bin")
+        os.environ["GEMINI_RPM"] = "0"  # The fake model has no quota, measure latency not the rate limit
+        app.messagebox = QuietMessagebox
+
+        BenchGUI.LLM_LATENCY = llm_latency
+        self.root = app.tk.Tk()
+        self.gui = BenchGUI(self.root)
+        self.gui.AI_SEARCH_LIMIT = chess.engine.Limit(time=ai_time)
+        self.gui.session.search_limit = self.gui.AI_SEARCH_LIMIT
+        self.root.update()
+        if not pump(self.root, lambda: len(self.gui.piece_images) == 12):
+            raise RuntimeError("piece sprites never loaded")
+
+    def close(self):
+        self.gui.close_engine()
+        self.gui.llm_scheduler.stop()
+        self.gui.session.journal.close()
+        self.gui.llm_cache.close()
+        self.root.destroy()
+        self.tmpdir.cleanup()
+
+    def new_game(self):
+        self.gui.reset_game()
+        self.gui.engine_cache.entries.clear()
+        self.root.update()
+
+    def bench_redraw(self, plies=80):
+        """draw_board() plus the Tk redraw it causes, one sample per ply of a game."""
+        self.new_game()
+        samples = []
+        for move in random_game(plies, self.seed):
+            self.gui.session.push_move(move)
+            start = time.perf_counter()
+            self.gui.draw_board()
+            self.root.update_idletasks()
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+
+    def bench_highlight(self, plies=40):
+        """highlight_moves() for every movable piece of the side to move, across a game."""
+        self.new_game()
+        samples = []
+        for move in random_game(plies, self.seed + 1):
+            self.gui.session.push_move(move)
+            for square in self.gui.session.state.moves_from:
+                start = time.perf_counter()
+                self.gui.highlight_moves(square)
+                self.root.update_idletasks()
+                samples.append(time.perf_counter() - start)
+        self.gui.clear_highlights()
+        return summarize(samples)
+
+    def bench_context(self, plies, repeats=200):
+        """Rendering the Gemini prompt context for a game of `plies` moves, history not cached."""
+        session = GameSession()
+        for move in random_game(plies, self.seed + plies):
+            session.push_move(move)
+        samples = []
+        for _ in range(repeats):
+            session.game_context.rendered = None  # As right after a new move
+            start = time.perf_counter()
+            session.get_context()
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+
+    def bench_ply(self, plies=12, commentary=False):
+        """Human click to AI reply on the board; `click` is how long on_click held the UI thread.
+
+        `total` includes the GUI's deliberate 500 ms pause before the AI moves.
+        """
+        self.new_game()
+        self.gui.show_commentary.set(commentary)
+        self.gui.show_move_judgment.set(commentary)
+        rng = random.Random(self.seed + 7)
+        clicks, totals = [], []
+        for _ in range(plies):
+            session = self.gui.session
+            if session.state.is_game_over or session.board.turn != chess.WHITE:
+                self.new_game()
+                session = self.gui.session
+            moves = [move for move in session.state.legal_moves if not move.promotion]
+            move = rng.choice(sorted(moves, key=lambda move: move.uci()))
+
+            self.gui.on_click(ClickEvent(*self.gui.square_center(move.from_square)))
+            start = time.perf_counter()
+            self.gui.on_click(ClickEvent(*self.gui.square_center(move.to_square)))
+            clicks.append(time.perf_counter() - start)
+            replied = pump(self.root, lambda: session.board.turn == chess.WHITE or session.state.is_game_over)
+            if not replied:
+                raise RuntimeError("the AI never replied")
+            totals.append(time.perf_counter() - start)
+            pump(self.root, lambda: self.gui.llm_scheduler.is_idle() and not self.gui.chat_streamer.is_streaming(),
+                 timeout=30)
+        self.gui.show_commentary.set(False)
+        self.gui.show_move_judgment.set(False)
+        return {"click": summarize(clicks), "total": summarize(totals)}
+
+    def run(self, quick=False):
+        """Every benchmark, as {name: summary}."""
+        scale = 0.25 if quick else 1
+        results = {
+            "redraw": self.bench_redraw(int(80 * scale)),
+            "highlight": self.bench_highlight(int(40 * scale)),
+        }
+        for plies in (10, 50, 150):
+            results[f"context_{plies}_plies"] = self.bench_context(plies, int(200 * scale))
+        for commentary in (False, True):
+            ply = self.bench_ply(max(3, int(12 * scale)), commentary)
+            suffix = "_commentary" if commentary else ""
+            results[f"ply_click{suffix}"] = ply["click"]
+            results[f"ply_total{suffix}"] = ply["total"]
+        return results
@@ -0,0 +1,133 @@
+import threading
+import tkinter as tk
+from collections import deque
+
+
+class ChatStream:
+    """One streamed reply: filled by a background thread, drained by the Tk loop."""
+
+    def __init__(self, label, open_stream, on_done, is_stale=None, close=None):
+        self.label = label
+        self.open_stream = open_stream
+        self.on_done = on_done
+        self.is_stale = is_stale  # Checked before the stream starts showing
+        self.close = close  # Drops the connection under the stream when it is stopped
+        self.buffer = []  # Chunks not yet shown
+        self.parts = []  # Everything received, for the cache
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.done = False
+        self.error = None
+
+
+class ChatStreamer:
+    """Streams Gemini replies into a Tk Text widget one at a time.
+
+    A background thread reads the stream and only appends to a buffer; the
+    Tk loop drains that buffer every `flush_ms` with a single insert, so a
+    fast stream never floods the event loop. Replies that arrive while one
+    is streaming wait their turn instead of interleaving in the panel.
+    """
+
+    def __init__(self, root, text_widget, flush_ms=50, tracer=None):
+        self.root = root
+        self.text_widget = text_widget
+        self.flush_ms = flush_ms
+        self.tracer = tracer  # Records skipped replies as events
+        self.pending = deque()
+        self.active = None
+
+    def start(self, label, open_stream, on_done=None, is_stale=None, close=None):
+        """Queue a stream; `open_stream()` runs off the UI thread and returns an iterable of text chunks.
+
+        `on_done(text, error, stopped)` runs on the UI thread when it ends.
+        A stream whose `is_stale()` is true by its turn is skipped. `close()`
+        is called when the stream is stopped or skipped, so the reader thread
+        blocked on it wakes up and the connection is released.
+        """
+        self.pending.append(ChatStream(label, open_stream, on_done, is_stale, close))
+        if self.active is None:
+            self._next()
+
+    def stop(self):
+        """Cancel the reply that is streaming now.
+
+        The panel moves on at the next flush without waiting for the reader
+        thread, which ends once the closed stream raises or returns.
+        """
+        if self.active:
+            self.active.stopped.set()
+            self._close(self.active)
+
+    def _close(self, stream):
+        """Release the connection behind a stream that will not be read to the end."""
+        if stream.close:
+            try:
+                stream.close()
+            except Exception as e:
+                print(f"⚠️ Could not close chat stream: {e}")
+
+    def is_streaming(self):
+        """True while a reply is streaming or waiting."""
+        return self.active is not None
+
+    def _next(self):
+        """Start the next queued stream, if any."""
+        while self.pending and self.pending[0].is_stale and self.pending[0].is_stale():
+            stream = self.pending.popleft()
+            if self.tracer:
+                self.tracer.event("chat.skipped", label=stream.label)
+            self._close(stream)
+            if stream.on_done:
+                stream.on_done("", None, True)
+        if not self.pending:
+            self.active = None
+            return
+        stream = self.active = self.pending.popleft()
+        self.text_widget.insert(tk.END, f"\n{stream.label}: ")
+        self.text_widget.see(tk.END)
+        threading.Thread(target=self._read, args=(stream,), name="chat-stream", daemon=True).start()
+        self.root.after(self.flush_ms, self._flush)
+
+    def _read(self, stream):
+        """Background thread: pull chunks into the buffer until done or stopped."""
+        try:
+            for chunk in stream.open_stream():
+                if stream.stopped.is_set():
+                    break
+                if chunk:
+                    with stream.lock:
+                        stream.buffer.append(chunk)
+                        stream.parts.append(chunk)
+        except Exception as e:
+            if not stream.stopped.is_set():  # A closed stream raising is the stop, not an error
+                stream.error = e
+        finally:
+            stream.done = True
+
+    def _flush(self):
+        """Tk loop: show whatever arrived since the last flush in one insert."""
+        stream = self.active
+        if stream is None:
+            return
+        with stream.lock:
+            text = "".join(stream.buffer)
+            stream.buffer.clear()
+            finished = stream.done or stream.stopped.is_set()
+        if text:
+            self.text_widget.insert(tk.END, text)
+            self.text_widget.see(tk.END)
+
+        if not finished:
+            self.root.after(self.flush_ms, self._flush)
+            return
+
+        stopped = stream.stopped.is_set()
+        self.text_widget.insert(tk.END, " [stopped]\n" if stopped else "\n")
+        self.text_widget.see(tk.END)
+        if stream.on_done:
+            try:
+                stream.on_done("".join(stream.parts), stream.error, stopped)
+            except Exception as e:
+                print(f"❌ Error finishing chat stream: {e}")
+        self._next()
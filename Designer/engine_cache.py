@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import chess
+import chess.engine
+import chess.polyglot
+
+
+def score_to_json(score):
+    """PovScore -> {"cp": ...} or {"mate": ...} from the side to move, None stays None."""
+    if score is None:
+        return None
+    relative = score.relative
+    return {"mate": relative.mate()} if relative.is_mate() else {"cp": relative.score()}
+
+
+def score_from_json(data, turn):
+    """Inverse of `score_to_json` for a position with `turn` to move."""
+    if not data:
+        return None
+    if "mate" in data:
+        relative = chess.engine.Mate(data["mate"])
+    else:
+        relative = chess.engine.Cp(data["cp"])
+    return chess.engine.PovScore(relative, turn)
+
+
+class CachedResult:
+    """Best move, score and principal variation the engine found for a position."""
+
+    def __init__(self, move, score=None, pv=None, depth=0, alternatives=None):
+        self.move = move
+        self.score = score  # chess.engine.PovScore relative to the side to move, or None
+        self.pv = pv or [move]
+        self.depth = depth
+        self.alternatives = alternatives or []  # (move, PovScore) of the next multipv lines, best first
+
+    def lines(self):
+        """Every known (move, score), best first."""
+        return [(self.move, self.score)] + self.alternatives
+
+    def to_json(self):
+        """Serialize to a JSON-friendly dict."""
+        data = {
+            "move": self.move.uci(),
+            "score": score_to_json(self.score),
+            "pv": [move.uci() for move in self.pv],
+            "depth": self.depth,
+        }
+        if self.alternatives:
+            data["alternatives"] = [[move.uci(), score_to_json(score)] for move, score in self.alternatives]
+        return data
+
+    @classmethod
+    def from_json(cls, data, turn):
+        """Rebuild a result stored by `to_json` for a position with `turn` to move."""
+        pv = [chess.Move.from_uci(uci) for uci in data.get("pv", [])]
+        alternatives = [(chess.Move.from_uci(uci), score_from_json(score, turn))
+                        for uci, score in data.get("alternatives", [])]
+        return cls(chess.Move.from_uci(data["move"]), score_from_json(data.get("score"), turn), pv,
+                   data.get("depth", 0), alternatives)
+
+
+def limit_key(limit):
+    """Stable text form of a search limit ("time=1", "depth=12", "ponder", ...)."""
+    if isinstance(limit, chess.engine.Limit):
+        parts = [f"{name}={value}" for name, value in
+                 (("time", limit.time), ("depth", limit.depth), ("nodes", limit.nodes))
+                 if value is not None]
+        return ",".join(parts) or "infinite"
+    return str(limit)
+
+
+class EngineCache:
+    """Bounded LRU cache of engine results.
+
+    Entries are keyed on the Zobrist hash of the position, the Elo the engine
+    was limited to (None for full strength) and the search limit, so
+    transpositions and revisited positions skip the engine entirely. When a
+    path is given the cache is loaded from and saved to a JSON file.
+    """
+
+    def __init__(self, max_entries=4096, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()  # key -> CachedResult.to_json()
+        self.lock = threading.Lock()  # Filled from engine callbacks and read by the UI
+        self.hits = 0
+        self.misses = 0
+        if self.path:
+            self.load()
+
+    @staticmethod
+    def key(board, elo, limit):
+        """Cache key for a position searched at `elo` with `limit`."""
+        return f"{chess.polyglot.zobrist_hash(board):016x}:{elo}:{limit_key(limit)}"
+
+    def get(self, board, elo, limit):
+        """Return the CachedResult for this search, or None."""
+        key = self.key(board, elo, limit)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        result = CachedResult.from_json(entry, board.turn)
+        if result.move not in board.legal_moves:  # Hash collision, treat as a miss
+            return None
+        return result
+
+    def put(self, board, elo, limit, move, score=None, pv=None, depth=0, alternatives=None):
+        """Store a search result, evicting the least recently used entry when full."""
+        if not move:
+            return
+        key = self.key(board, elo, limit)
+        entry = CachedResult(move, score, pv, depth, alternatives).to_json()
+        with self.lock:
+            old = self.entries.get(key)
+            if old is not None and old.get("depth", 0) > depth:
+                return  # Keep the deeper result
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def load(self):
+        """Load entries saved by a previous session."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self.lock:
+                for key, entry in data.get("entries", []):
+                    self.entries[key] = entry
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            print(f"📂 Loaded {len(self.entries)} cached engine results from {self.path}")
+        except Exception as e:
+            print(f"❌ Error loading engine cache: {e}")
+
+    def save(self):
+        """Write the cache to disk (oldest entries first, so LRU order survives)."""
+        if not self.path:
+            return
+        try:
+            with self.lock:
+                data = {"entries": list(self.entries.items())}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            print(f"💾 Saved {len(data['entries'])} engine results to {self.path}")
+        except Exception as e:
+            print(f"❌ Error saving engine cache: {e}")
@@ -0,0 +1,428 @@
+import queue
+import threading
+import time
+
+import chess
+import chess.engine
+
+
+class SearchJob:
+    """A single engine search, tagged with the position it was asked about."""
+
+    def __init__(self, kind, board, limit, callback, options=None, timeout=None, multipv=None):
+        self.kind = kind  # "reply" for the AI move, "ponder" for the human's turn, "analyse" for multipv lines
+        self.board = board.copy()  # Snapshot, the UI board keeps changing while we search
+        self.fen = board.fen()  # Tag used by the UI to drop results for stale positions
+        self.limit = limit
+        self.callback = callback
+        self.options = options or {}
+        self.timeout = timeout  # Seconds before the supervisor kills a hung engine
+        self.multipv = multipv  # Lines to return; set for "analyse" jobs, whose result is a list of InfoDicts
+        self.cancelled = False
+        self.worker = None  # EngineWorker that owns the job, set on submit
+        # time.perf_counter() stamps for latency tracing: queued, search started, search done
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+
+    def cancel(self):
+        """Mark the job so the worker skips it (or drops its result)."""
+        self.cancelled = True
+
+
+class PonderJob(SearchJob):
+    """Open-ended analysis of the human's position while they think.
+
+    The multipv lines double as the hint (best line, first move) and as a
+    prediction of the AI reply (each line's second move).
+    """
+
+    def __init__(self, board, callback, multipv):
+        super().__init__("ponder", board, None, callback,
+                         options={"UCI_LimitStrength": False})  # Ponder at full strength
+        self.multipv = multipv
+        self.lines = {}  # multipv slot -> latest InfoDict with a pv
+        self.updates = 0  # Bumped on every info, lets a UI poll skip redraws when nothing changed
+        self.analysis = None
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        """Stop the running analysis, keeping the lines found so far."""
+        with self.lock:
+            self.cancelled = True
+            if self.analysis:
+                try:
+                    self.analysis.stop()
+                except chess.engine.EngineTerminatedError:
+                    pass  # Engine already gone, nothing left to stop
+
+    def update(self, info):
+        """Record an info update from the engine."""
+        with self.lock:
+            self.lines[info.get("multipv", 1)] = info
+            self.updates += 1
+
+    def snapshot(self):
+        """Return the current lines, best first."""
+        with self.lock:
+            return [self.lines[slot] for slot in sorted(self.lines)]
+
+    def best_move(self):
+        """Best move found so far for the side to move, or None."""
+        lines = self.snapshot()
+        return lines[0]["pv"][0] if lines else None
+
+    def depth(self):
+        """Depth of the best line so far."""
+        lines = self.snapshot()
+        return lines[0].get("depth", 0) if lines else 0
+
+    def predicted_reply(self, move):
+        """Return the engine's expected answer to `move`, if a line covers it."""
+        for info in self.snapshot():
+            pv = info["pv"]
+            if pv[0] == move and len(pv) > 1:
+                return pv[1]
+        return None
+
+
+class EngineWorker:
+    """One supervised Stockfish process with its own background thread.
+
+    Results are never delivered on the worker thread: they are handed to
+    `dispatch`, which the GUI wires to its `root.after` polling loop so all
+    Tk calls stay on the main thread. The worker pings the engine while
+    idle, respawns it after a crash or timeout, and remembers the UCI
+    options it has set so a new process starts in the same state.
+    """
+
+    PONDER_STOP_GRACE = 2.0  # Seconds a stopped ponder gets to send its bestmove before the engine is killed
+
+    def __init__(self, engine_path, dispatch, name="engine-worker", options=None, ping_interval=5.0):
+        self.engine_path = engine_path
+        self.dispatch = dispatch
+        self.name = name
+        self.ping_interval = ping_interval
+        self.engine = None
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.ponder_job = None
+        self.option_state = dict(options or {})  # Hash, Threads, UCI_Elo, ... as last set
+        self.busy_job = None  # Search or ponder in progress, watched by the supervisor
+        self.deadline = None
+        self.restarts = 0
+        self.ready = threading.Event()  # Set once the first engine process has started (or failed to)
+
+    def start(self):
+        """Start the worker thread; the engine process is spawned there so the caller never waits on it."""
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def _spawn(self):
+        """Start a fresh engine process and replay the option state into it."""
+        self.engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+        if self.option_state:
+            self.engine.configure(self.option_state)
+
+    def _restart(self, reason):
+        """Replace a crashed or hung engine process."""
+        print(f"♻️ Restarting {self.name}: {reason}")
+        self.restarts += 1
+        try:
+            self.engine.close()
+        except Exception:
+            pass
+        self.engine = None
+        try:
+            self._spawn()
+        except Exception as e:
+            print(f"❌ Could not restart {self.name}: {e}")
+
+    def configure(self, options):
+        """Send only the UCI options that differ from this process's current state."""
+        changed = {name: value for name, value in options.items() if self.option_state.get(name) != value}
+        if changed:
+            self.engine.configure(changed)
+            self.option_state.update(changed)
+
+    def load(self):
+        """Rough measure of how busy the worker is, lower is better."""
+        busy = 2 if self.busy_job and self.busy_job.kind != "ponder" else 0
+        pondering = 1 if self.ponder_job else 0
+        return busy + pondering + 2 * self.jobs.qsize()
+
+    def submit(self, kind, board, limit, callback, options=None, timeout=None, multipv=None):
+        """Queue a search and return its job; `callback(job, result, error)` runs on the UI thread.
+
+        With `multipv` the engine analyses instead of playing and `result`
+        is the list of InfoDicts, best line first.
+        """
+        job = SearchJob(kind, board, limit, callback, options, timeout, multipv)
+        job.worker = self
+        self.stop_ponder()  # A real search always takes priority over pondering
+        self.jobs.put(job)
+        return job
+
+    def start_ponder(self, board, callback, multipv=3):
+        """Start pondering `board`; `callback(job)` runs on the UI thread as lines deepen."""
+        self.stop_ponder()
+        job = PonderJob(board, callback, multipv)
+        job.worker = self
+        self.ponder_job = job
+        self.jobs.put(job)
+        return job
+
+    def stop_ponder(self):
+        """Stop the current ponder search and return it (with its lines), if any."""
+        job, self.ponder_job = self.ponder_job, None
+        if job:
+            job.cancel()
+            if self.busy_job is job:
+                # A hung engine never answers the stop, and everything queued behind it would wait forever
+                self.deadline = time.monotonic() + self.PONDER_STOP_GRACE
+        return job
+
+    def cancel_all(self):
+        """Cancel every search that has not started yet."""
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None:
+                job.cancel()
+
+    def check_deadline(self):
+        """Called by the supervisor: kill the engine if the current search overran its timeout."""
+        deadline, engine = self.deadline, self.engine
+        if self.busy_job is None:
+            return  # A ponder that ended right as it was stopped leaves a deadline with nothing to guard
+        if deadline is not None and engine is not None and time.monotonic() > deadline:
+            print(f"⏰ {self.name} missed its deadline, killing the engine")
+            self.deadline = None
+            try:
+                # Kill the process from the engine's own loop; the blocked search raises and the worker respawns
+                engine.protocol.loop.call_soon_threadsafe(engine.transport.kill)
+            except Exception:
+                pass
+
+    def _run(self):
+        """Worker loop: take jobs one by one, ping the engine while idle."""
+        try:
+            self._spawn()  # Jobs queued meanwhile simply wait for the process
+        except Exception as e:
+            print(f"❌ Could not start {self.name}: {e}")
+        finally:
+            self.ready.set()
+        while True:
+            try:
+                job = self.jobs.get(timeout=self.ping_interval)
+            except queue.Empty:
+                self._ping()
+                continue
+            if job is None:  # Shutdown sentinel
+                break
+            if job.cancelled:
+                continue
+            if self.engine is None:
+                self._restart("no engine process")
+            if job.kind == "ponder":
+                self._ponder(job)
+                continue
+
+            result, error = None, None
+            job.started = time.perf_counter()
+            for attempt in range(2):  # One retry on a fresh process
+                try:
+                    result, error = self._search(job), None
+                    break
+                except Exception as e:
+                    error = e
+                    self._restart(f"{type(e).__name__} during {job.kind} search")
+            job.finished = time.perf_counter()
+
+            self._deliver(job, result, error)
+
+    def _search(self, job):
+        """Run one search under the supervisor's deadline."""
+        self.busy_job = job
+        if job.timeout:
+            self.deadline = time.monotonic() + job.timeout
+        try:
+            if job.options:
+                self.configure(job.options)
+            if job.multipv:
+                return self.engine.analyse(job.board, job.limit, multipv=job.multipv,
+                                           info=chess.engine.INFO_SCORE | chess.engine.INFO_PV)
+            return self.engine.play(job.board, job.limit,
+                                    info=chess.engine.INFO_SCORE | chess.engine.INFO_PV)
+        finally:
+            self.busy_job = None
+            self.deadline = None
+
+    def _ping(self):
+        """Check that an idle engine still answers, respawn it if not."""
+        if self.engine is None:
+            self._restart("no engine process")
+            return
+        try:
+            self.engine.ping()
+        except Exception as e:
+            self._restart(f"ping failed ({type(e).__name__})")
+
+    def _ponder(self, job):
+        """Run an open-ended multipv analysis until the job is cancelled, or killed if it ignores the stop."""
+        self.deadline = None
+        self.busy_job = job
+        if job.cancelled:  # Stopped while queued, stop_ponder saw no running search to guard
+            self.busy_job = None
+            return
+        try:
+            with self.engine.analysis(job.board, multipv=job.multipv, options=job.options) as analysis:
+                with job.lock:
+                    job.analysis = analysis
+                    if job.cancelled:
+                        analysis.stop()
+
+                last_depth = 0
+                for info in analysis:
+                    if "pv" not in info or not info["pv"]:
+                        continue
+                    job.update(info)
+                    # Tell the UI once per completed depth of the best line
+                    depth = info.get("depth", 0)
+                    if info.get("multipv", 1) == 1 and depth > last_depth:
+                        last_depth = depth
+                        self._deliver_update(job)
+        except Exception as e:
+            print(f"❌ Error while pondering: {e}")
+            self._restart(f"{type(e).__name__} while pondering")
+        finally:
+            self.busy_job = None
+            self.deadline = None
+
+    def _deliver_update(self, job):
+        """Hand a ponder progress update back to the UI thread."""
+        def deliver():
+            if not job.cancelled:
+                job.callback(job)
+        self.dispatch(deliver)
+
+    def _deliver(self, job, result, error):
+        """Hand a finished search back to the UI thread."""
+        def deliver():
+            if not job.cancelled:
+                job.callback(job, result, error)
+        self.dispatch(deliver)
+
+    def stop(self):
+        """Stop the worker thread and quit the engine."""
+        self.stop_ponder()
+        self.cancel_all()
+        if self.thread:
+            self.jobs.put(None)
+            self.thread.join(timeout=5)
+            self.thread = None
+        if self.engine:
+            try:
+                self.engine.quit()
+            except Exception:
+                self.engine.close()
+            self.engine = None
+
+
+class EnginePool:
+    """A fixed set of supervised EngineWorkers sharing the search load.
+
+    Jobs go to the least busy worker unless the caller asks for a specific
+    one (the AI reply prefers the worker whose hash is warm from pondering),
+    so a hint or analysis never waits behind the AI reply. A supervisor
+    thread enforces per-request timeouts.
+    """
+
+    def __init__(self, engine_path, dispatch, size=2, options=None, request_timeout=10.0, ping_interval=5.0):
+        self.workers = [EngineWorker(engine_path, dispatch, name=f"engine-{i}",
+                                     options=options, ping_interval=ping_interval)
+                        for i in range(max(1, size))]
+        self.request_timeout = request_timeout
+        self.running = False
+        self.supervisor = None
+
+    def start(self):
+        """Start every worker and the supervisor thread; engine processes spawn in the workers."""
+        for worker in self.workers:
+            worker.start()
+        self.running = True
+        self.supervisor = threading.Thread(target=self._supervise, name="engine-supervisor", daemon=True)
+        self.supervisor.start()
+
+    def wait_ready(self, timeout=None):
+        """Block until every worker has tried to start its engine; True if at least one is running."""
+        for worker in self.workers:
+            worker.ready.wait(timeout)
+        return any(worker.engine is not None for worker in self.workers)
+
+    def _supervise(self):
+        """Watch every worker's deadline."""
+        while self.running:
+            for worker in self.workers:
+                worker.check_deadline()
+            time.sleep(0.25)
+
+    def pick(self, prefer=None, exclude=None, pondering=True):
+        """Choose a worker: `prefer` if given, otherwise the least busy one not excluded.
+
+        With `pondering=False` workers running a ponder are skipped too, so
+        the search cannot cut a ponder short.
+        """
+        if prefer in self.workers:
+            return prefer
+        candidates = [worker for worker in self.workers
+                      if worker is not exclude and (pondering or worker.ponder_job is None)]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda worker: worker.load())
+
+    def submit(self, kind, board, limit, callback, options=None, worker=None, timeout=None, multipv=None,
+               exclude=None, preempt=True):
+        """Queue a search on a worker; see EngineWorker.submit.
+
+        `exclude` is avoided unless it is the only worker. With
+        `preempt=False` neither `exclude` nor a pondering worker is used,
+        and None is returned when no other worker is free.
+        """
+        if preempt:
+            worker = self.pick(prefer=worker, exclude=exclude) or self.pick()
+        else:
+            worker = self.pick(prefer=worker, exclude=exclude, pondering=False)
+            if worker is None:
+                return None
+        timeout = timeout or self.request_timeout + (limit.time or 0)
+        return worker.submit(kind, board, limit, callback, options, timeout, multipv)
+
+    def start_ponder(self, board, callback, multipv=3, worker=None, exclude=None):
+        """Start pondering on a worker; returns None if no worker qualifies."""
+        worker = self.pick(prefer=worker, exclude=exclude)
+        if worker is None:
+            return None
+        return worker.start_ponder(board, callback, multipv)
+
+    def stop_ponder(self, job):
+        """Stop a ponder job started through the pool and return it."""
+        if job and job.worker and job.worker.ponder_job is job:
+            job.worker.stop_ponder()
+        elif job:
+            job.cancel()
+        return job
+
+    def cancel_all(self):
+        """Cancel queued searches and pondering on every worker."""
+        for worker in self.workers:
+            worker.stop_ponder()
+            worker.cancel_all()
+
+    def stop(self):
+        """Stop the supervisor and every worker."""
+        self.running = False
+        for worker in self.workers:
+            worker.stop()
@@ -0,0 +1,65 @@
+from collections import deque
+
+
+class GameContext:
+    """Game history for Gemini prompts, built one move at a time.
+
+    Moves are kept as SAN text grouped per full move ("12. Nf3 Nc6"). Only
+    the current FEN is sent, never one per move, and the oldest moves are
+    dropped once the history would exceed `token_budget`, so the prompt
+    stays the same size from move 1 to move 150.
+    """
+
+    CHARS_PER_TOKEN = 4  # Rough size of a token for English and chess notation
+
+    def __init__(self, token_budget=800):
+        self.token_budget = token_budget
+        self.chunks = deque()  # Rendered full moves, oldest first
+        self.chunk_chars = 0  # Characters held in `chunks`, separators included
+        self.ply_count = 0
+        self.omitted_moves = 0  # Full moves dropped to stay in budget
+        self.rendered = None  # Cached history text, rebuilt only after a change
+
+    def reset(self):
+        """Forget the game."""
+        self.chunks.clear()
+        self.chunk_chars = 0
+        self.ply_count = 0
+        self.omitted_moves = 0
+        self.rendered = None
+
+    def add_move(self, san):
+        """Append one ply in SAN."""
+        if self.ply_count % 2 == 0:
+            chunk = f"{self.ply_count // 2 + 1}. {san}"
+            self.chunks.append(chunk)
+            self.chunk_chars += len(chunk) + 1
+        else:
+            last = self.chunks.pop()
+            self.chunk_chars -= len(last)
+            last = f"{last} {san}"
+            self.chunks.append(last)
+            self.chunk_chars += len(last)
+        self.ply_count += 1
+
+        # Drop whole moves from the front until the history fits again
+        max_chars = self.token_budget * self.CHARS_PER_TOKEN
+        while self.chunk_chars > max_chars and len(self.chunks) > 1:
+            self.chunk_chars -= len(self.chunks.popleft()) + 1
+            self.omitted_moves += 1
+        self.rendered = None
+
+    def history(self):
+        """The move list part of the prompt, cached between moves."""
+        if self.rendered is None:
+            lines = ["Game History:"]
+            if self.omitted_moves:
+                lines.append(f"(moves 1-{self.omitted_moves} omitted)")
+            lines.append(" ".join(self.chunks) if self.chunks else "(no moves yet)")
+            self.rendered = "\n".join(lines)
+        return self.rendered
+
+    def render(self, board):
+        """Full prompt context: cached history plus the current position."""
+        turn = "White" if board.turn else "Black"
+        return f"{self.history()}\n\nCurrent Position: {board.fen()}\nCurrent Turn: {turn}"
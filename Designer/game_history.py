@@ -0,0 +1,120 @@
+import os
+import struct
+from array import array
+
+import chess
+
+
+def pack_move(move):
+    """Move -> 16-bit code: from square, to square and promotion piece in 6 + 6 + 3 bits."""
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def unpack_move(code):
+    """Inverse of `pack_move`."""
+    return chess.Move(code & 0x3F, code >> 6 & 0x3F, code >> 12 or None)
+
+
+class GameHistory:
+    """Moves of one game as packed 16-bit codes, two bytes a ply."""
+
+    def __init__(self):
+        self.moves = array("H")
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __iter__(self):
+        return (unpack_move(code) for code in self.moves)
+
+    def clear(self):
+        del self.moves[:]
+
+    def append(self, move):
+        self.moves.append(pack_move(move))
+
+
+class GameJournal:
+    """Append-only binary log of the current game and the match score.
+
+    Every move is appended (and flushed) as it is played, so after a crash
+    or a close the game resumes at the exact position. A new game rewrites
+    the file with just its start record, which keeps it from growing. A
+    record cut short by a crash is ignored on reading, and a game is ended
+    at most once.
+    """
+
+    MAGIC = b"CHJ1"
+    SCORE = struct.Struct("<HII")  # ai_elo, user_wins, ai_wins
+    MOVE = struct.Struct("<H")
+    GAME_START, MOVE_PLAYED, GAME_END = b"G", b"M", b"E"
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.ended = False  # The current game's end record is written
+
+    def read(self):
+        """Saved (score, moves, finished) where score is (ai_elo, user_wins, ai_wins) or None."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None, [], False
+        if not data.startswith(self.MAGIC):
+            print(f"❌ {self.path} is not a game journal, starting fresh")
+            return None, [], False
+
+        score, moves, finished = None, [], False
+        offset = len(self.MAGIC)
+        while offset < len(data):
+            tag = data[offset:offset + 1]
+            offset += 1
+            record = self.MOVE if tag == self.MOVE_PLAYED else self.SCORE
+            if tag not in (self.GAME_START, self.MOVE_PLAYED, self.GAME_END) or offset + record.size > len(data):
+                break  # Torn write at the end
+            values = record.unpack_from(data, offset)
+            offset += record.size
+            if tag == self.MOVE_PLAYED:
+                moves.append(unpack_move(values[0]))
+                finished = False  # Played on past an end record: the game is still going
+            else:
+                score = values
+                finished = tag == self.GAME_END
+                if tag == self.GAME_START:
+                    moves = []
+        return score, moves, finished
+
+    def start_game(self, score, moves=()):
+        """Replace the journal with a game starting from `score`, after `moves` if resuming."""
+        self.close()
+        parts = [self.MAGIC, self.GAME_START, self.SCORE.pack(*score)]
+        for move in moves:
+            parts += [self.MOVE_PLAYED, self.MOVE.pack(pack_move(move))]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, "ab")
+        self.ended = False
+
+    def record_move(self, move):
+        self._append(self.MOVE_PLAYED + self.MOVE.pack(pack_move(move)))
+
+    def end_game(self, score):
+        """Mark the game as over with the score it left behind; later calls for the same game do nothing."""
+        if self.ended:
+            return
+        self.ended = True
+        self._append(self.GAME_END + self.SCORE.pack(*score))
+
+    def _append(self, record):
+        if self.file is None:
+            return
+        self.file.write(record)
+        self.file.flush()  # Handed to the OS at once, so a crash of the app loses nothing
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
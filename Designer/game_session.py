@@ -0,0 +1,217 @@
+import random
+
+import chess
+import chess.engine
+
+from game_context import GameContext
+from game_history import GameHistory
+from position_state import PositionState
+from search_budget import SearchBudget
+
+TABLEBASE_DRAW = "tablebase_draw"  # Termination reported when the tablebase adjudicates a draw
+
+
+class GameSession:
+    """One game and the running match score, with no Tk in sight.
+
+    Holds the board, its derived PositionState, the move history and the
+    prompt context, picks AI moves that need no search (book, tablebase,
+    engine cache), decides when the game is over and adapts `ai_elo` to
+    the results. With a GameJournal every move and result is logged, and
+    `resume()` picks the game up again after a restart. The GUI wraps one
+    session; the self-play runner drives sessions headless. The human is
+    always White, the AI Black.
+    """
+
+    MIN_ELO = 1320
+    MAX_ELO = 3000
+    ELO_STEP = 100
+    WIN_MARGIN = 2  # Lead in wins that makes the AI stronger or weaker
+
+    def __init__(self, opening_book=None, tablebase=None, engine_cache=None,
+                 token_budget=800, ai_elo=1320, search_limit=None, journal=None):
+        self.opening_book = opening_book
+        self.tablebase = tablebase
+        self.engine_cache = engine_cache
+        self.search_limit = search_limit or chess.engine.Limit(time=1)  # Nominal budget, also the engine cache key
+        self.search_budget = SearchBudget()  # Scales the nominal budget per position and Elo
+        self.journal = journal  # GameJournal, or None to keep nothing on disk
+
+        self.board = chess.Board()
+        self.state = PositionState(self.board)  # Legal moves and outcome, refreshed on every push
+        self.previous_move = None  # Store last move
+        self.generation = 0  # Bumped on every move and new game; per-ply work tagged with an older one is stale
+
+        # Track game history
+        self.history = GameHistory()  # Packed moves, what the server reports
+        self.game_context = GameContext(token_budget=token_budget)  # Prompt context, one SAN move at a time
+
+        # Track wins for adaptive AI
+        self.user_wins = 0
+        self.ai_wins = 0
+        self.ai_elo = ai_elo  # Stockfish UCI_Elo, moved by adjust_ai_difficulty
+
+        self.in_book = True  # Cleared once the game leaves the book, skips further lookups
+        self.adjudicated = False  # Set when the tablebase ends the game as a draw
+        self.result_recorded = False  # The game's result has been scored and journaled
+
+    def reset(self):
+        """Start a new game; the score and the AI strength carry over."""
+        self.board.reset()
+        self.state = PositionState(self.board)
+        self.previous_move = None
+        self.generation += 1
+        self.history.clear()
+        self.game_context.reset()
+        self.in_book = True
+        self.adjudicated = False
+        self.result_recorded = False
+        if self.journal:
+            self.journal.start_game(self.score())
+
+    def score(self):
+        """(ai_elo, user_wins, ai_wins), what carries over from game to game."""
+        return self.ai_elo, self.user_wins, self.ai_wins
+
+    def resume(self):
+        """Continue the game saved in the journal; returns the number of moves replayed.
+
+        A game that had already ended is not replayed, a new one starts
+        with the saved score. Without a journal there is nothing to resume.
+        """
+        if self.journal is None:
+            return 0
+        score, moves, finished = self.journal.read()
+        if score:
+            self.ai_elo, self.user_wins, self.ai_wins = score
+        if finished:
+            moves = []
+        for move in moves:
+            if not self.board.is_legal(move):
+                print(f"❌ Journal move {move} is illegal here, resuming before it")
+                break
+            self._push(move)
+        self.journal.start_game(self.score(), self.board.move_stack)
+        return self.board.ply()
+
+    def push_move(self, move):
+        """Play a move, refresh the derived position state and record history; returns its SAN."""
+        san = self._push(move)
+        if self.journal:
+            self.journal.record_move(move)
+        return san
+
+    def _push(self, move):
+        san = self.board.san(move)
+        self.board.push(move)
+        self.state = PositionState(self.board)
+        self.previous_move = move
+        self.generation += 1
+        self.history.append(move)
+        self.game_context.add_move(san)
+        return san
+
+    def get_context(self):
+        """Game history and current position for a Gemini prompt."""
+        return self.game_context.render(self.board)
+
+    def get_book_move(self, elo=None, rng=random):
+        """Book move for the current position (weighted for `elo`, main line if None)."""
+        if not self.in_book or self.opening_book is None:
+            return None
+        if elo is None:
+            move = self.opening_book.best_move(self.board)
+        else:
+            move = self.opening_book.pick_move(self.board, elo, rng)
+        if move is None:
+            self.in_book = False
+            print("📕 Out of the opening book, the engine takes over")
+        return move
+
+    def instant_ai_move(self, elo=None, rng=random):
+        """An AI move that needs no search, as (move, source), or (None, None).
+
+        Tries a forced move, the opening book, the tablebase, then the
+        engine cache, all at `elo` (the session's `ai_elo` by default).
+        """
+        elo = self.ai_elo if elo is None else elo
+
+        # Only one legal move: nothing to search
+        if len(self.state.legal_moves) == 1:
+            return next(iter(self.state.legal_moves)), "forced"
+
+        # Still in the opening book: answer without the engine
+        move = self.get_book_move(elo, rng)
+        if move:
+            return move, "book"
+
+        # Few pieces left: the tablebase knows the exact answer
+        if self.tablebase:
+            move = self.tablebase.pick_move(self.board, elo, rng)
+            if move:
+                return move, "tablebase"
+
+        # Seen this position at this Elo before: no engine round-trip at all
+        if self.engine_cache:
+            cached = self.engine_cache.get(self.board, elo, self.search_limit)
+            if cached:
+                return cached.move, "cache"
+        return None, None
+
+    def plan_search(self, elo=None):
+        """Engine limit for the side to move at `elo`, scaled from the nominal `search_limit`."""
+        return self.search_budget.plan(self.board, self.ai_elo if elo is None else elo, self.search_limit)
+
+    def check_game_status(self):
+        """Return (termination, winner) once the game is over, else (None, None).
+
+        A checkmate counts towards the score and may change `ai_elo`; a
+        tablebase draw sets `adjudicated` and reports TABLEBASE_DRAW. Asking
+        again about a finished game reports the same result without scoring
+        or journaling it twice.
+        """
+        outcome = self.state.outcome
+        if outcome:
+            if outcome.termination == chess.Termination.CHECKMATE and not self.result_recorded:
+                if outcome.winner == chess.BLACK:
+                    self.ai_wins += 1
+                else:
+                    self.user_wins += 1
+                self.adjust_ai_difficulty()
+            self.record_result()
+            return outcome.termination, outcome.winner
+
+        if self.adjudicated:
+            return TABLEBASE_DRAW, None
+        wdl = self.tablebase.probe_wdl(self.board) if self.tablebase else None
+        if wdl is not None and abs(wdl) < 2:  # Draw, or a win/loss spoiled by the fifty-move rule
+            self.adjudicated = True
+            self.record_result()
+            return TABLEBASE_DRAW, None
+        return None, None
+
+    def record_result(self):
+        """Journal the end of the game, once."""
+        if self.result_recorded:
+            return
+        self.result_recorded = True
+        if self.journal:
+            self.journal.end_game(self.score())
+
+    def tablebase_winner(self):
+        """Color with a forced tablebase win, or None."""
+        wdl = self.tablebase.probe_wdl(self.board) if self.tablebase else None
+        if wdl is None or abs(wdl) < 2:
+            return None
+        return self.board.turn if wdl > 0 else not self.board.turn
+
+    def adjust_ai_difficulty(self):
+        """Adjust AI difficulty based on game results."""
+        # If player is winning too much, increase AI difficulty
+        if self.user_wins > self.ai_wins + self.WIN_MARGIN:
+            self.ai_elo = min(self.MAX_ELO, self.ai_elo + self.ELO_STEP)
+            print(f"🔼 Increasing AI difficulty to ELO {self.ai_elo}")
+        # If AI is winning too much, decrease difficulty
+        elif self.ai_wins > self.user_wins + self.WIN_MARGIN:
+            self.ai_elo = max(self.MIN_ELO, self.ai_elo - self.ELO_STEP)
+            print(f"🔽 Decreasing AI difficulty to ELO {self.ai_elo}")
@@ -0,0 +1,93 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+import chess.polyglot
+
+
+class LLMCache:
+    """SQLite-backed cache of Gemini replies.
+
+    Replies are keyed on the prompt kind (template), the Zobrist hash of the
+    position, the last move and the normalized user text, so a repeated
+    position or question is answered locally. Entries expire after
+    `ttl_seconds`; past `max_entries` the least recently used are evicted.
+    """
+
+    def __init__(self, path, ttl_seconds=7 * 24 * 3600, max_entries=5000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()  # One connection shared by the UI and LLM threads
+        self.db = None
+        try:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                text TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL)""")
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self.db.commit()
+        except sqlite3.Error as e:
+            print(f"❌ Error opening LLM cache at {path}: {e}")
+            self.db = None
+
+    @staticmethod
+    def normalize(text):
+        """Lower-case, collapse whitespace and drop trailing punctuation so trivial variants match."""
+        text = re.sub(r"\s+", " ", (text or "").strip().lower())
+        return text.rstrip("?!. ")
+
+    def key(self, kind, board, last_move, user_text=""):
+        """Cache key for a prompt of `kind` about `board`."""
+        parts = [
+            kind,
+            f"{chess.polyglot.zobrist_hash(board):016x}",
+            last_move.uci() if last_move else "-",
+            self.normalize(user_text),
+        ]
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, kind, board, last_move, user_text=""):
+        """Return the cached reply text, or None."""
+        if not self.db:
+            return None
+        key = self.key(kind, board, last_move, user_text)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT text, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            text, created = row
+            if now - created > self.ttl_seconds:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.db.commit()
+        return text
+
+    def put(self, kind, board, last_move, text, user_text=""):
+        """Store a reply and evict expired and least recently used entries."""
+        if not self.db or not text:
+            return
+        key = self.key(kind, board, last_move, user_text)
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO responses (key, kind, text, created, last_used) "
+                            "VALUES (?, ?, ?, ?, ?)", (key, kind, text, now, now))
+            self.db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            self.db.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                            "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+            self.db.commit()
+
+    def close(self):
+        """Close the database."""
+        if self.db:
+            with self.lock:
+                self.db.close()
+            self.db = None
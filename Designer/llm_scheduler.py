@@ -0,0 +1,165 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class TokenBucket:
+    """Rate limit: `rate` requests per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate  # 0 disables the limit
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """Seconds until a token is available, 0 if one is available now."""
+        if not self.rate:
+            return 0
+        self._refill()
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate:
+            self._refill()
+            self.tokens -= 1
+
+
+class LLMRequest:
+    """One Gemini call waiting for its turn, tagged with the ply it was asked for."""
+
+    def __init__(self, kind, priority, generation, work, callback):
+        self.kind = kind
+        self.priority = priority
+        self.generation = generation  # None: never goes stale (the user's own chat)
+        self.work = work  # Runs on a scheduler thread and makes the API call
+        self.callback = callback
+        self.cancelled = False
+        # time.perf_counter() stamps for latency tracing: queued, sent, answered
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+
+
+class LLMScheduler:
+    """Sends Gemini requests by priority, within a rate limit, and only while they are fresh.
+
+    Requests wait in a priority queue (chat, then suggestions, move
+    explanations, commentary) and a few threads send them as the token
+    bucket allows. Each request carries the generation of the ply it was
+    made for, read from `generation_source()`; once the game has moved on
+    it is dropped before sending, and a reply that comes back for an old
+    ply is dropped instead of delivered. `callback(request, result, error)`
+    runs through `dispatch`, on the UI thread. Drops are counted, and
+    recorded as events on `tracer` when one is given.
+    """
+
+    PRIORITIES = {"chat": 0, "suggestion": 1, "explain": 2, "commentary": 3, "insight": 3}
+
+    def __init__(self, dispatch, generation_source, rate_per_minute=15, burst=3, workers=2, tracer=None):
+        self.dispatch = dispatch
+        self.generation_source = generation_source
+        self.tracer = tracer
+        self.bucket = TokenBucket(rate_per_minute / 60, burst)
+        self.workers = workers
+        self.heap = []
+        self.order = itertools.count()  # FIFO within a priority
+        self.cond = threading.Condition()
+        self.in_flight = 0  # Popped but not yet delivered
+        self.dropped = 0
+        self.stopped = False
+        self.threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"llm-scheduler-{index + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, kind, work, callback, ply_bound=True):
+        """Queue `work()`; `kind` ("chat", "insight:commentary", ...) picks the priority."""
+        priority = self.PRIORITIES.get(kind.split(":")[0], len(self.PRIORITIES))
+        generation = self.generation_source() if ply_bound else None
+        request = LLMRequest(kind, priority, generation, work, callback)
+        with self.cond:
+            heapq.heappush(self.heap, (priority, next(self.order), request))
+            self.cond.notify()
+        return request
+
+    def is_stale(self, request):
+        return request.cancelled or (request.generation is not None and
+                                     request.generation != self.generation_source())
+
+    def is_idle(self):
+        """True when nothing is queued, being sent or waiting for delivery."""
+        with self.cond:
+            return not self.heap and not self.in_flight
+
+    def stop(self):
+        """Drop everything queued and let the threads exit."""
+        with self.cond:
+            self.stopped = True
+            for _, _, request in self.heap:
+                request.cancelled = True
+            self.heap.clear()
+            self.cond.notify_all()
+
+    def _drop(self, request, reason):
+        self.dropped += 1
+        if self.tracer:
+            self.tracer.event("gemini.dropped", kind=request.kind, reason=reason)
+
+    def _next_request(self):
+        """Block until a fresh request may be sent within the rate limit; None on stop."""
+        with self.cond:
+            while not self.stopped:
+                fresh = [entry for entry in self.heap if not self.is_stale(entry[2])]
+                if len(fresh) != len(self.heap):
+                    for _, _, request in self.heap:
+                        if self.is_stale(request):
+                            self._drop(request, "stale")
+                    heapq.heapify(fresh)
+                    self.heap = fresh
+                if not self.heap:
+                    self.cond.wait()
+                    continue
+                wait = self.bucket.delay()
+                if wait > 0:
+                    self.cond.wait(wait)  # A new request or the stop wakes us early
+                    continue
+                self.bucket.take()
+                self.in_flight += 1
+                return heapq.heappop(self.heap)[2]
+        return None
+
+    def _run(self):
+        """Scheduler thread: send requests one at a time."""
+        while True:
+            request = self._next_request()
+            if request is None:
+                break
+            result, error = None, None
+            request.started = time.perf_counter()
+            try:
+                result = request.work()
+            except Exception as e:
+                error = e
+            request.finished = time.perf_counter()
+            self._deliver(request, result, error)
+
+    def _deliver(self, request, result, error):
+        """Hand the reply to the UI thread, unless the game has moved on by then."""
+        def deliver():
+            with self.cond:
+                self.in_flight -= 1
+            if self.is_stale(request):
+                self._drop(request, "outdated")
+                return
+            request.callback(request, result, error)
+        self.dispatch(deliver)
@@ -0,0 +1,76 @@
+import chess
+
+MATE_CP = 100000  # Centipawn stand-in for a forced mate when comparing scores
+GRADES = ((20, "Excellent"), (60, "Good"), (150, "Questionable"))  # Max centipawn loss per grade, else "Poor"
+ONLY_MOVE_GAP = 150  # Best line this far ahead of the second one: the best move is the only move
+WINNING_CP = 300  # A missed mate that still leaves this much is a slip, not a blunder
+
+
+class MoveJudgment:
+    """The engine's verdict on one move."""
+
+    def __init__(self, move, san, grade, cp_loss, best_move, best_san, only_move=False, missed_mate=False):
+        self.move = move
+        self.san = san
+        self.grade = grade  # Excellent, Good, Questionable or Poor
+        self.cp_loss = cp_loss  # Centipawns the move gave away against the best line
+        self.best_move = best_move
+        self.best_san = best_san
+        self.only_move = only_move  # Played the one move that was clearly better than all others
+        self.missed_mate = missed_mate
+
+    def summary(self):
+        """One line for the chat panel."""
+        if self.only_move:
+            return f"{self.san} - {self.grade}, the only good move here"
+        if self.missed_mate:
+            return f"{self.san} - {self.grade}, missed a forced mate with {self.best_san}"
+        if self.move == self.best_move or self.cp_loss == 0:
+            return f"{self.san} - {self.grade}, the engine's top choice"
+        return f"{self.san} - {self.grade} ({self.cp_loss} cp lost, best was {self.best_san})"
+
+
+def lines_from_infos(infos):
+    """(move, PovScore) per analysis line that has both, best first."""
+    return [(info["pv"][0], info["score"]) for info in infos if info.get("pv") and info.get("score")]
+
+
+def centipawns(score, color):
+    """Score from `color`'s point of view, mates mapped onto MATE_CP."""
+    return score.pov(color).score(mate_score=MATE_CP)
+
+
+def judge_move(board, move, lines, score_after=None):
+    """Grade `move` played in `board` from multipv `lines` of that position.
+
+    `lines` are (move, PovScore) pairs, best first. When the move is not
+    one of them the score of the position after it, `score_after`, is
+    needed; without it None is returned so the caller can search it.
+    """
+    if not lines:
+        return None
+    mover = board.turn
+    best_move, best_score = lines[0]
+    played_score = next((score for line_move, score in lines if line_move == move), score_after)
+    if played_score is None:
+        return None
+
+    best_cp = centipawns(best_score, mover)
+    cp_loss = max(0, best_cp - centipawns(played_score, mover))
+    only_move = (move == best_move and len(lines) > 1 and
+                 best_cp - centipawns(lines[1][1], mover) >= ONLY_MOVE_GAP)
+    missed_mate = (best_score.pov(mover).is_mate() and best_score.pov(mover).mate() > 0 and
+                   not played_score.pov(mover).is_mate())
+
+    grade = "Poor"
+    for max_loss, name in GRADES:
+        if cp_loss <= max_loss:
+            grade = name
+            break
+    if only_move:
+        grade = "Excellent"
+    if missed_mate and centipawns(played_score, mover) >= WINNING_CP:
+        grade = "Questionable"  # Still clearly winning, just no longer by force
+
+    return MoveJudgment(move, board.san(move), grade, min(cp_loss, MATE_CP), best_move,
+                        board.san(best_move), only_move, missed_mate)
@@ -0,0 +1,65 @@
+import os
+import random
+
+import chess
+import chess.polyglot
+
+
+class OpeningBook:
+    """Polyglot opening book that answers opening moves without the engine.
+
+    Moves are drawn in proportion to their book weight. The AI's Elo bends
+    the weights: weak settings flatten them so sidelines come up more often,
+    strong settings sharpen them towards the main line.
+    """
+
+    MIN_ELO = 1320
+    MAX_ELO = 3000
+
+    def __init__(self, path):
+        self.path = path
+        self.reader = None
+        if path and os.path.exists(path):
+            try:
+                self.reader = chess.polyglot.open_reader(path)
+                print(f"📖 Opening book loaded from {path}")
+            except Exception as e:
+                print(f"❌ Error loading opening book: {e}")
+        else:
+            print(f"📖 No opening book at {path}, using the engine from move one")
+
+    def entries(self, board):
+        """Book entries for the position, or an empty list."""
+        if not self.reader:
+            return []
+        try:
+            return [entry for entry in self.reader.find_all(board) if entry.weight > 0]
+        except Exception as e:
+            print(f"❌ Error reading opening book: {e}")
+            return []
+
+    def pick_move(self, board, elo=None, rng=random):
+        """Pick a weighted book move adjusted for `elo`, or None once out of book."""
+        entries = self.entries(board)
+        if not entries:
+            return None
+        if elo is None:
+            sharpness = 1.0
+        else:
+            strength = (min(max(elo, self.MIN_ELO), self.MAX_ELO) - self.MIN_ELO) / (self.MAX_ELO - self.MIN_ELO)
+            sharpness = 0.5 + 2.0 * strength  # 0.5 at the weakest setting, 2.5 at the strongest
+        weights = [entry.weight ** sharpness for entry in entries]
+        return rng.choices(entries, weights=weights)[0].move
+
+    def best_move(self, board):
+        """The main-line (highest weight) book move, or None."""
+        entries = self.entries(board)
+        if not entries:
+            return None
+        return max(entries, key=lambda entry: entry.weight).move
+
+    def close(self):
+        """Close the book file."""
+        if self.reader:
+            self.reader.close()
+            self.reader = None
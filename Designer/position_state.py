@@ -0,0 +1,38 @@
+import chess
+
+
+class PositionState:
+    """Everything the UI asks about a position, computed once per push/pop.
+
+    Move generation runs a single time here; clicks, highlights and the
+    end-of-game checks then read plain dicts and sets.
+    """
+
+    def __init__(self, board):
+        self.legal_moves = set()
+        self.moves_from = {}  # from square -> [legal moves]
+        self.promotions = {}  # (from square, to square) -> [promotion piece types]
+
+        for move in board.legal_moves:
+            self.legal_moves.add(move)
+            self.moves_from.setdefault(move.from_square, []).append(move)
+            if move.promotion:
+                self.promotions.setdefault((move.from_square, move.to_square), []).append(move.promotion)
+
+        self.is_check = board.is_check()
+        self.outcome = board.outcome()
+        if self.outcome is None:
+            # Same claimable draws the status check always announced; announced, they end the game
+            if board.is_fifty_moves():
+                self.outcome = chess.Outcome(chess.Termination.FIFTY_MOVES, None)
+            elif board.is_repetition():
+                self.outcome = chess.Outcome(chess.Termination.THREEFOLD_REPETITION, None)
+        self.is_game_over = self.outcome is not None
+
+    def is_legal(self, move):
+        """True if `move` is legal in this position."""
+        return move in self.legal_moves
+
+    def is_promotion(self, from_square, to_square):
+        """True if moving from `from_square` to `to_square` is a legal promotion."""
+        return (from_square, to_square) in self.promotions
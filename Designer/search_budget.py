@@ -0,0 +1,96 @@
+import chess
+import chess.engine
+
+PIECE_VALUES = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0}
+
+
+class SearchBudget:
+    """Scales the engine's nominal search limit to the position and the target Elo.
+
+    The nominal limit (one second in the app) is what every position gets
+    at full strength, at least; checks and capture-heavy positions get a
+    little more. Below `FULL_STRENGTH_ELO` Stockfish picks its handicapped
+    move from a shallow search, so the time shrinks with the Elo, simple
+    positions, obvious recaptures, the opening and the endgame get less
+    still, and a depth cap ends the search once the rest would be
+    discarded anyway.
+    """
+
+    MIN_TIME = 0.05  # Seconds, below this the engine's own overhead dominates
+    MAX_SCALE = 1.5  # Most a volatile position may get over the nominal time
+    FULL_STRENGTH_ELO = 2800  # From here on the nominal budget applies unchanged
+    MIN_ELO_SCALE = 0.3  # Time share left at the lowest Elo
+
+    def plan(self, board, elo, nominal):
+        """The chess.engine.Limit for the side to move in `board` playing at `elo`."""
+        if not nominal.time:
+            return nominal  # Depth or node limits are already position independent
+        scale = self.position_scale(board, elo) * self.elo_scale(elo)
+        floor = min(self.MIN_TIME, nominal.time)
+        seconds = min(nominal.time * self.MAX_SCALE, max(floor, nominal.time * scale))
+        return chess.engine.Limit(time=round(seconds, 3), depth=self.depth_cap(elo))
+
+    def position_scale(self, board, elo=None):
+        """Share of the nominal time the position deserves, before the Elo; never below 1.0 at full strength."""
+        legal = board.legal_moves.count()
+        scale = 1.0
+        if elo is not None and elo < self.FULL_STRENGTH_ELO:
+            # Cuts only for a handicapped engine, at full strength every position keeps the whole budget
+            if legal <= 3:
+                scale *= 0.3  # Little to choose from
+            elif legal <= 8:
+                scale *= 0.6
+
+            if self.is_obvious_recapture(board):
+                scale *= 0.4
+
+            # Phase: book-like openings and thin endgames resolve quickly
+            material = sum(PIECE_VALUES[piece.piece_type] for piece in board.piece_map().values())
+            if board.fullmove_number <= 8 and material >= 70:
+                scale *= 0.5
+            elif material <= 20:
+                scale *= 0.7
+
+        # Volatility: a check or many captures on the board need a deeper look
+        captures = sum(1 for move in board.legal_moves if board.is_capture(move))
+        if board.is_check() and legal > 3:
+            scale *= 1.3
+        elif captures >= 4:
+            scale *= 1.2
+        return scale
+
+    def elo_scale(self, elo):
+        """1.0 at full strength down to MIN_ELO_SCALE at the lowest Elo."""
+        if elo is None or elo >= self.FULL_STRENGTH_ELO:
+            return 1.0
+        low = 1320
+        share = max(0.0, (elo - low) / (self.FULL_STRENGTH_ELO - low))
+        return self.MIN_ELO_SCALE + (1 - self.MIN_ELO_SCALE) * share
+
+    def depth_cap(self, elo):
+        """Depth past which a strength-limited search only burns time, None at full strength."""
+        if elo is None or elo >= self.FULL_STRENGTH_ELO:
+            return None
+        # Stockfish's skill level runs 0..20 over its Elo range and decides at about depth 1 + level;
+        # a few plies of margin keep the handicapped move exactly as strong as intended
+        level = max(0, min(20, (elo - 1320) * 20 // (3190 - 1320)))
+        return 1 + level + 4
+
+    @staticmethod
+    def is_obvious_recapture(board):
+        """The last move captured, and taking back on that square costs nothing."""
+        if not board.move_stack:
+            return False
+        last = board.pop()
+        try:
+            was_capture = board.is_capture(last)
+        finally:
+            board.push(last)
+        if not was_capture:
+            return False
+        square = last.to_square
+        captured = PIECE_VALUES[board.piece_at(square).piece_type]
+        defended = board.is_attacked_by(not board.turn, square)
+        return any(move.to_square == square and
+                   (not defended or PIECE_VALUES[board.piece_at(move.from_square).piece_type] <= captured)
+                   for move in board.legal_moves)
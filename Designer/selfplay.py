@@ -0,0 +1,218 @@
+"""Engine-vs-engine self-play for tuning the adaptive difficulty offline.
+
+Every worker process owns one Stockfish and plays headless GameSessions:
+White stands in for a player of a given Elo, Black is the AI at `ai_elo`.
+
+    python selfplay.py --players 1400 1800 2200 --elos 1320 1600 2000 --games 200
+    python selfplay.py --adaptive --players 1400 1800 2200 --series 20 --series-games 40
+
+The grid mode reports the score at every (player, AI) Elo pair next to
+what the Elo formula expects; the adaptive mode replays the GUI's
+difficulty rule game after game and reports where `ai_elo` settles.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import util
+
+import chess
+import chess.engine
+
+from game_session import GameSession
+from opening_book import OpeningBook
+from tablebase import Tablebase
+
+MAX_PLIES = 400  # Safety net, the 75-move rule ends real games earlier
+
+# One engine, book and tablebase per worker process, opened by init_worker
+_engine = None
+_opening_book = None
+_tablebase = None
+
+
+def init_worker(engine_path, book_path, syzygy_path, hash_mb, verbose):
+    """Process pool initializer: open the per-process resources."""
+    global _engine, _opening_book, _tablebase
+    if not verbose:
+        sys.stdout = open(os.devnull, "w")  # Thousands of games of per-move prints help nobody
+    _engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+    _engine.configure({"Threads": 1, "Hash": hash_mb})
+    _opening_book = OpeningBook(book_path) if book_path else None
+    _tablebase = Tablebase(syzygy_path) if syzygy_path else None
+    # Runs before the worker joins its threads at exit, which would otherwise wait on the engine's loop forever
+    util.Finalize(None, close_worker, exitpriority=10)
+
+
+def close_worker():
+    """Quit the worker's engine when the process exits."""
+    if _engine:
+        try:
+            _engine.quit()
+        except Exception:
+            pass
+
+
+def new_session(ai_elo, limit):
+    """A headless session on this worker's resources."""
+    return GameSession(_opening_book, _tablebase, None, ai_elo=ai_elo, search_limit=limit)
+
+
+def choose_move(session, elo, rng, game):
+    """Forced, book or tablebase move, or a strength-limited engine search at `elo`."""
+    move, _ = session.instant_ai_move(elo, rng)
+    if move:
+        return move
+    result = _engine.play(session.board, session.plan_search(elo), game=game,  # A new `game` sends ucinewgame
+                          options={"UCI_LimitStrength": True, "UCI_Elo": elo})
+    return result.move
+
+
+def play_game(session, player_elo, rng):
+    """Play one game to the end; returns (result string, termination name, plies)."""
+    game = object()
+    termination, winner = None, None
+    while len(session.board.move_stack) < MAX_PLIES:
+        elo = player_elo if session.board.turn == chess.WHITE else session.ai_elo
+        session.push_move(choose_move(session, elo, rng, game))
+        termination, winner = session.check_game_status()
+        if termination is not None:
+            break
+
+    if winner == chess.WHITE:
+        result = "1-0"
+    elif winner == chess.BLACK:
+        result = "0-1"
+    else:
+        result = "1/2-1/2"
+    name = termination.name if isinstance(termination, chess.Termination) else (termination or "MAX_PLIES")
+    return result, name.lower(), len(session.board.move_stack)
+
+
+def run_match(player_elo, ai_elo, seconds, seed):
+    """Worker task: one game at a fixed AI strength."""
+    limit = chess.engine.Limit(time=seconds)
+    session = new_session(ai_elo, limit)
+    result, termination, plies = play_game(session, player_elo, random.Random(seed))
+    return {"player_elo": player_elo, "ai_elo": ai_elo, "result": result,
+            "termination": termination, "plies": plies}
+
+
+def run_series(player_elo, start_elo, games, seconds, seed):
+    """Worker task: consecutive games with the adaptive difficulty rule moving `ai_elo`."""
+    limit = chess.engine.Limit(time=seconds)
+    session = new_session(start_elo, limit)
+    rng = random.Random(seed)
+    trajectory = [session.ai_elo]
+    for _ in range(games):
+        play_game(session, player_elo, rng)
+        trajectory.append(session.ai_elo)
+        session.reset()
+    return {"player_elo": player_elo, "trajectory": trajectory, "final_elo": session.ai_elo,
+            "user_wins": session.user_wins, "ai_wins": session.ai_wins}
+
+
+def expected_score(player_elo, ai_elo):
+    """Score the Elo formula expects for the player."""
+    return 1 / (1 + 10 ** ((ai_elo - player_elo) / 400))
+
+
+def summarize_grid(games):
+    """Per (player, AI) pair: games played, player score, expected score and mean length."""
+    pairs = defaultdict(list)
+    for game in games:
+        pairs[(game["player_elo"], game["ai_elo"])].append(game)
+    points = {"1-0": 1.0, "1/2-1/2": 0.5, "0-1": 0.0}
+    summary = []
+    for (player_elo, ai_elo), pair in sorted(pairs.items()):
+        summary.append({
+            "player_elo": player_elo,
+            "ai_elo": ai_elo,
+            "games": len(pair),
+            "player_score": sum(points[game["result"]] for game in pair) / len(pair),
+            "expected_score": expected_score(player_elo, ai_elo),
+            "mean_plies": sum(game["plies"] for game in pair) / len(pair),
+        })
+    return summary
+
+
+def summarize_series(series):
+    """Per player Elo: mean and spread of where the AI strength ended up."""
+    by_player = defaultdict(list)
+    for run in series:
+        by_player[run["player_elo"]].append(run["final_elo"])
+    return [{"player_elo": player_elo, "runs": len(finals), "mean_final_elo": sum(finals) / len(finals),
+             "min_final_elo": min(finals), "max_final_elo": max(finals)}
+            for player_elo, finals in sorted(by_player.items())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play games to calibrate the adaptive AI difficulty.")
+    parser.add_argument("--engine", default=os.getenv("STOCKFISH_PATH", "stockfish"), help="UCI engine binary")
+    parser.add_argument("--players", type=int, nargs="+", default=[1400, 1800, 2200],
+                        help="Elo of the simulated player (White)")
+    parser.add_argument("--elos", type=int, nargs="+", default=[1320, 1600, 2000, 2400],
+                        help="AI Elo levels to test in grid mode")
+    parser.add_argument("--games", type=int, default=100, help="Games per (player, AI) pair in grid mode")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Run game series with the adaptive difficulty rule instead of a fixed grid")
+    parser.add_argument("--series", type=int, default=10, help="Series per player Elo in adaptive mode")
+    parser.add_argument("--series-games", type=int, default=30, help="Games per series in adaptive mode")
+    parser.add_argument("--start-elo", type=int, default=GameSession.MIN_ELO, help="AI Elo a series starts at")
+    parser.add_argument("--time", type=float, default=0.05, help="Nominal seconds per engine move, scaled per position and Elo")
+    parser.add_argument("--hash", type=int, default=16, help="Engine hash per worker in MB")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes, one engine each")
+    parser.add_argument("--book", default=os.getenv("OPENING_BOOK_PATH"), help="Polyglot opening book")
+    parser.add_argument("--syzygy", default=os.getenv("SYZYGY_PATH"), help="Syzygy tablebase directories")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed for book and tablebase choices")
+    parser.add_argument("--out", help="Write every game and the summary as JSON here")
+    parser.add_argument("--verbose", action="store_true", help="Keep the per-move output of the workers")
+    args = parser.parse_args()
+
+    if args.adaptive:
+        tasks = [(run_series, (player_elo, args.start_elo, args.series_games, args.time,
+                               args.seed + i * 7919 + player_elo))
+                 for player_elo in args.players for i in range(args.series)]
+    else:
+        tasks = [(run_match, (player_elo, ai_elo, args.time, args.seed + i * 7919 + player_elo * 31 + ai_elo))
+                 for player_elo in args.players for ai_elo in args.elos for i in range(args.games)]
+
+    print(f"♟️ {len(tasks)} {'series' if args.adaptive else 'games'} on {args.workers} workers")
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.engine, args.book, args.syzygy, args.hash, args.verbose)) as pool:
+        futures = [pool.submit(task, *task_args) for task, task_args in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"❌ Self-play task failed: {e}")
+            if done % max(1, len(tasks) // 20) == 0 or done == len(tasks):
+                print(f"  {done}/{len(tasks)} done, {time.perf_counter() - start:.0f}s")
+
+    if args.adaptive:
+        summary = summarize_series(results)
+        print(f"\n{'player':>8}{'runs':>6}{'mean AI Elo':>13}{'min':>7}{'max':>7}")
+        for row in summary:
+            print(f"{row['player_elo']:>8}{row['runs']:>6}{row['mean_final_elo']:>13.0f}"
+                  f"{row['min_final_elo']:>7}{row['max_final_elo']:>7}")
+    else:
+        summary = summarize_grid(results)
+        print(f"\n{'player':>8}{'AI':>6}{'games':>7}{'score':>8}{'expected':>10}{'plies':>7}")
+        for row in summary:
+            print(f"{row['player_elo']:>8}{row['ai_elo']:>6}{row['games']:>7}{row['player_score']:>8.2f}"
+                  f"{row['expected_score']:>10.2f}{row['mean_plies']:>7.0f}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "summary": summary, "results": results}, f, indent=2)
+        print(f"💾 Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,577 @@
+"""Local game server: many players against the adaptive AI, one shared engine pool.
+
+Every player gets a headless GameSession with its own `ai_elo` and win
+counters; all of them share a bounded pool of UCI engines driven through
+`chess.engine.popen_uci` on one asyncio loop, and one LLM scheduler for
+chat. Endpoints (JSON over HTTP, keep-alive):
+
+    POST /games                 {"ai_elo": 1320}      new session
+    GET  /games/<id>                                  state
+    POST /games/<id>/new                              next game, score kept
+    POST /games/<id>/move       {"move": "e2e4"}      human move + AI reply
+    POST /games/<id>/reply                            retry an AI reply the engine failed to give
+    GET  /games/<id>/hint                             best move for White
+    POST /games/<id>/chat       {"message": "..."}    Gemini reply
+    GET  /stats                                       sessions, pool, latency
+    GET  /games/<id>/ws                               WebSocket, {"op": "move", ...} per message
+
+    python server.py --engine /path/to/stockfish --port 8765
+    python server.py --fake-engine --fake-gemini    # No Stockfish or API key needed
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import os
+import struct
+import sys
+import time
+from collections import deque
+
+import chess
+import chess.engine
+
+from engine_cache import EngineCache
+from game_session import GameSession
+from llm_cache import LLMCache
+from llm_scheduler import LLMScheduler
+from opening_book import OpeningBook
+from tablebase import Tablebase
+
+FAKE_ENGINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench", "fake_engine.py")
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"  # RFC 6455 handshake constant
+
+
+class HTTPError(Exception):
+    """Ends a request with `status` and a JSON error body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class EngineSlot:
+    """One engine process of the pool and the UCI options it currently has."""
+
+    def __init__(self, name):
+        self.name = name
+        self.transport = None
+        self.engine = None
+        self.option_state = {}
+
+
+class AsyncEnginePool:
+    """A fixed number of UCI engines shared by every session on the loop.
+
+    A search borrows an idle engine and waits in line when all are busy,
+    so the number of processes stays bounded however many players there
+    are. Options are sent only when they differ from what the engine has,
+    and an engine that fails or overruns its limit is replaced.
+    """
+
+    def __init__(self, engine_command, size=2, options=None, request_timeout=10.0):
+        self.engine_command = engine_command
+        self.size = size
+        self.options = options or {}
+        self.request_timeout = request_timeout  # Seconds past the search limit before an engine is replaced
+        self.idle = asyncio.Queue()
+        self.slots = []
+        self.searches = 0
+        self.restarts = 0
+
+    async def start(self):
+        for index in range(self.size):
+            slot = EngineSlot(f"engine-{index + 1}")
+            await self._spawn(slot)
+            self.slots.append(slot)
+            self.idle.put_nowait(slot)
+        print(f"✅ {self.size} engines ready")
+
+    async def _spawn(self, slot):
+        slot.transport, slot.engine = await chess.engine.popen_uci(self.engine_command)
+        slot.option_state = {}
+        await self._configure(slot, self.options)
+
+    async def _configure(self, slot, options):
+        changed = {name: value for name, value in options.items() if slot.option_state.get(name) != value}
+        if changed:
+            await slot.engine.configure(changed)
+            slot.option_state.update(changed)
+
+    async def _restart(self, slot, reason):
+        print(f"🔁 Restarting {slot.name}: {reason}")
+        self.restarts += 1
+        try:
+            slot.transport.close()
+        except Exception:
+            pass
+        try:
+            await self._spawn(slot)
+        except Exception as e:
+            print(f"❌ Could not restart {slot.name}: {e}")
+
+    async def _run(self, search, limit, options):
+        """Borrow an engine, run `search(engine)` on it and give the engine back."""
+        slot = await self.idle.get()
+        try:
+            await self._configure(slot, options or {})
+            self.searches += 1
+            return await asyncio.wait_for(search(slot.engine), (limit.time or 0) + self.request_timeout)
+        except (asyncio.TimeoutError, chess.engine.EngineError, chess.engine.EngineTerminatedError) as e:
+            await self._restart(slot, type(e).__name__)
+            raise HTTPError(503, "the engine failed, try again")
+        finally:
+            self.idle.put_nowait(slot)
+
+    async def play(self, board, limit, options=None):
+        return await self._run(lambda engine: engine.play(
+            board, limit, info=chess.engine.INFO_SCORE | chess.engine.INFO_PV), limit, options)
+
+    async def analyse(self, board, limit, options=None):
+        return await self._run(lambda engine: engine.analyse(board, limit), limit, options)
+
+    async def stop(self):
+        for slot in self.slots:
+            try:
+                await asyncio.wait_for(slot.engine.quit(), 2)
+            except Exception:
+                slot.transport.close()
+
+
+class PlayerGame:
+    """A session on the server, with a lock so one player's requests run in order."""
+
+    def __init__(self, game_id, session):
+        self.id = game_id
+        self.session = session
+        self.lock = asyncio.Lock()
+        self.termination = None
+        self.winner = None
+        self.last_seen = time.monotonic()
+
+    def check_status(self):
+        termination, winner = self.session.check_game_status()
+        if termination:
+            self.termination, self.winner = termination, winner
+
+    def status(self):
+        """"ongoing", a chess.Termination name such as "checkmate", or "tablebase_draw"."""
+        if self.termination is None:
+            return "ongoing"
+        return self.termination.name.lower() if isinstance(self.termination, chess.Termination) else self.termination
+
+    def state(self):
+        session = self.session
+        board = session.board
+        return {
+            "id": self.id,
+            "fen": board.fen(),
+            "moves": [move.uci() for move in session.history],
+            "turn": "white" if board.turn == chess.WHITE else "black",
+            "legal_moves": sorted(move.uci() for move in session.state.legal_moves) if not self.termination else [],
+            "status": self.status(),
+            "winner": None if self.winner is None else ("white" if self.winner == chess.WHITE else "black"),
+            "ai_elo": session.ai_elo,
+            "user_wins": session.user_wins,
+            "ai_wins": session.ai_wins,
+        }
+
+
+class GameServer:
+    """Routes requests to player sessions, the engine pool and the LLM scheduler."""
+
+    CHAT_TIMEOUT = 60  # Seconds a chat may wait in the rate-limited queue plus the call itself
+    STATS_WINDOW = 5000  # AI replies the latency percentiles are taken over
+
+    def __init__(self, pool, model, search_limit, hint_limit, max_sessions=1000,
+                 opening_book=None, tablebase=None, engine_cache=None, llm_cache=None):
+        self.pool = pool
+        self.model = model
+        self.search_limit = search_limit
+        self.hint_limit = hint_limit
+        self.max_sessions = max_sessions
+        self.opening_book = opening_book
+        self.tablebase = tablebase
+        self.engine_cache = engine_cache or EngineCache()
+        self.llm_cache = llm_cache
+        self.games = {}
+        self.ids = itertools.count(1)
+        self.loop = None
+        self.llm_scheduler = None
+        self.reply_times = deque(maxlen=self.STATS_WINDOW)  # Seconds per recent AI reply, for /stats
+        self.requests = 0
+
+    async def start(self, host, port):
+        self.loop = asyncio.get_running_loop()
+        # Chat is never tied to a ply, so the generation source is not consulted
+        self.llm_scheduler = LLMScheduler(self.loop.call_soon_threadsafe, lambda: 0,
+                                          rate_per_minute=float(os.getenv("GEMINI_RPM", "15")),
+                                          burst=int(os.getenv("GEMINI_BURST", "3")))
+        self.llm_scheduler.start()
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def game(self, game_id):
+        game = self.games.get(game_id)
+        if game is None:
+            raise HTTPError(404, f"no game {game_id}")
+        game.last_seen = time.monotonic()
+        return game
+
+    # Endpoints
+
+    async def new_session(self, body):
+        if len(self.games) >= self.max_sessions:
+            self.evict_idle()
+        if len(self.games) >= self.max_sessions:
+            raise HTTPError(503, "too many sessions")
+        ai_elo = int(body.get("ai_elo", GameSession.MIN_ELO))
+        ai_elo = max(GameSession.MIN_ELO, min(GameSession.MAX_ELO, ai_elo))
+        session = GameSession(self.opening_book, self.tablebase, self.engine_cache,
+                              ai_elo=ai_elo, search_limit=self.search_limit)
+        game = PlayerGame(str(next(self.ids)), session)
+        self.games[game.id] = game
+        return game.state()
+
+    def evict_idle(self):
+        """Drop the least recently used session to make room."""
+        oldest = min(self.games.values(), key=lambda game: game.last_seen)
+        print(f"♻️ Evicting idle game {oldest.id}")
+        del self.games[oldest.id]
+
+    async def next_game(self, game):
+        async with game.lock:
+            game.session.reset()
+            game.termination = game.winner = None
+            return game.state()
+
+    async def move(self, game, body):
+        async with game.lock:
+            session = game.session
+            if game.termination:
+                raise HTTPError(409, "the game is over, POST /new for the next one")
+            if session.board.turn != chess.WHITE:
+                raise HTTPError(409, "not your turn, POST /reply for the pending AI reply")
+            try:
+                move = chess.Move.from_uci(str(body.get("move", "")))
+            except ValueError:
+                raise HTTPError(400, "move must be UCI, e.g. e2e4")
+            if not session.state.is_legal(move):
+                raise HTTPError(400, f"illegal move {move.uci()}")
+
+            session.push_move(move)
+            game.check_status()
+            return await self.play_reply(game)
+
+    async def reply(self, game):
+        """Retry the AI reply after the engine failed on the last /move."""
+        async with game.lock:
+            if game.termination:
+                raise HTTPError(409, "the game is over, POST /new for the next one")
+            if game.session.board.turn != chess.BLACK:
+                raise HTTPError(409, "no AI reply pending, it is your turn")
+            return await self.play_reply(game)
+
+    async def play_reply(self, game):
+        """The AI's move unless the game just ended; state with `reply` and `reply_source`."""
+        session = game.session
+        reply = source = None
+        if not game.termination:
+            start = time.perf_counter()
+            try:
+                reply, source = await self.ai_reply(session)
+            except HTTPError as e:
+                # The human move stands, Black stays to move until /reply succeeds
+                raise HTTPError(e.status, f"{e}: POST /games/{game.id}/reply for the AI reply")
+            self.reply_times.append(time.perf_counter() - start)
+            session.push_move(reply)
+            game.check_status()
+        state = game.state()
+        state["reply"] = reply.uci() if reply else None
+        state["reply_source"] = source
+        return state
+
+    async def ai_reply(self, session):
+        """Book, tablebase or cache if they know the move, otherwise the engine at the session's Elo."""
+        move, source = session.instant_ai_move()
+        if move:
+            return move, source
+        board = session.board.copy()
+        result = await self.pool.play(board, session.plan_search(),
+                                      {"UCI_LimitStrength": True, "UCI_Elo": session.ai_elo})
+        self.engine_cache.put(board, session.ai_elo, self.search_limit, result.move,
+                              result.info.get("score"), result.info.get("pv"), result.info.get("depth", 0))
+        return result.move, "engine"
+
+    async def hint(self, game):
+        session = game.session
+        if game.termination or session.board.turn != chess.WHITE:
+            raise HTTPError(409, "no hint: not White's turn")
+        cached = self.engine_cache.get(session.board, None, self.hint_limit)
+        if cached is None:
+            board = session.board.copy()
+            info = await self.pool.analyse(board, self.hint_limit, {"UCI_LimitStrength": False})
+            if not info.get("pv"):
+                raise HTTPError(503, "the engine found no move")
+            self.engine_cache.put(board, None, self.hint_limit, info["pv"][0], info.get("score"),
+                                  info["pv"], info.get("depth", 0))
+            cached = self.engine_cache.get(board, None, self.hint_limit)
+        score = cached.score.pov(chess.WHITE).score(mate_score=100000) if cached.score else None
+        return {"move": cached.move.uci(), "san": session.board.san(cached.move), "score_cp": score}
+
+    async def chat(self, game, body):
+        message = str(body.get("message", "")).strip()
+        if not message:
+            raise HTTPError(400, "message is empty")
+        session = game.session
+        cached = self.llm_cache.get("chat", session.board, session.previous_move, message) if self.llm_cache else None
+        if cached is not None:
+            return {"reply": cached, "cached": True}
+
+        prompt = f"""You are a chess assistant. Current game state:
+
+{session.get_context()}
+
+User: {message}
+
+Provide a brief, direct response in 1-2 sentences."""
+        board, last_move = session.board.copy(stack=False), session.previous_move
+        future = self.loop.create_future()
+
+        def on_reply(request, text, error):
+            if future.done():
+                return
+            if error:
+                future.set_exception(HTTPError(502, f"Gemini failed: {error}"))
+            else:
+                future.set_result(text)
+
+        self.llm_scheduler.submit("chat", lambda: self.model.generate_content(prompt).text,
+                                  on_reply, ply_bound=False)
+        try:
+            text = await asyncio.wait_for(future, self.CHAT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPError(504, "Gemini did not answer in time")
+        if self.llm_cache:
+            self.llm_cache.put("chat", board, last_move, text, message)
+        return {"reply": text, "cached": False}
+
+    def stats(self):
+        times = sorted(self.reply_times)
+
+        def percentile(q):
+            return times[min(len(times) - 1, int(len(times) * q))] * 1000 if times else None
+
+        return {
+            "sessions": len(self.games),
+            "requests": self.requests,
+            "engine_searches": self.pool.searches,
+            "engine_restarts": self.pool.restarts,
+            "engines_idle": self.pool.idle.qsize(),
+            "llm_dropped": self.llm_scheduler.dropped,
+            "reply_p50_ms": percentile(0.5),
+            "reply_p99_ms": percentile(0.99),
+        }
+
+    async def dispatch(self, method, path, body):
+        """(status, payload) for one request."""
+        self.requests += 1
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if parts == ["stats"] and method == "GET":
+            return 200, self.stats()
+        if parts == ["games"] and method == "POST":
+            return 201, await self.new_session(body)
+        if len(parts) >= 2 and parts[0] == "games":
+            game = self.game(parts[1])
+            action = parts[2] if len(parts) > 2 else None
+            if action is None and method == "GET":
+                return 200, game.state()
+            if action == "new" and method == "POST":
+                return 200, await self.next_game(game)
+            if action == "move" and method == "POST":
+                return 200, await self.move(game, body)
+            if action == "reply" and method == "POST":
+                return 200, await self.reply(game)
+            if action == "hint" and method == "GET":
+                return 200, await self.hint(game)
+            if action == "chat" and method == "POST":
+                return 200, await self.chat(game, body)
+        raise HTTPError(404, f"no route for {method} {path}")
+
+    # HTTP and WebSocket plumbing
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(path, headers, reader, writer)
+                    break
+
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+                try:
+                    payload = json.loads(body) if body else {}
+                    if not isinstance(payload, dict):
+                        raise ValueError("body must be a JSON object")
+                    status, response = await self.dispatch(method, path, payload)
+                except HTTPError as e:
+                    status, response = e.status, {"error": str(e)}
+                except ValueError as e:
+                    status, response = 400, {"error": str(e)}
+                except Exception as e:
+                    print(f"❌ Error handling {method} {path}: {e}")
+                    status, response = 500, {"error": "internal error"}
+
+                data = json.dumps(response).encode()
+                writer.write(f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"Connection: keep-alive\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_websocket(self, path, headers, reader, writer):
+        """One JSON message per frame: {"op": "move"|"reply"|"hint"|"chat"|"new"|"state", ...}, one JSON answer each."""
+        accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + WS_GUID).encode()).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        await writer.drain()
+        base = "/" + "/".join([part for part in path.split("/") if part][:2])  # /games/<id>
+        routes = {"state": ("GET", ""), "new": ("POST", "/new"), "move": ("POST", "/move"),
+                  "reply": ("POST", "/reply"), "hint": ("GET", "/hint"), "chat": ("POST", "/chat")}
+        while True:
+            opcode, payload = await self.read_frame(reader)
+            if opcode == 0x8:  # Close
+                self.write_frame(writer, 0x8, b"")
+                break
+            if opcode == 0x9:  # Ping
+                self.write_frame(writer, 0xA, payload)
+                continue
+            if opcode != 0x1:
+                continue
+            try:
+                message = json.loads(payload)
+                method, suffix = routes.get(message.get("op"), ("GET", "/unknown"))
+                status, response = await self.dispatch(method, base + suffix, message)
+            except HTTPError as e:
+                response = {"error": str(e), "status": e.status}
+            except ValueError as e:
+                response = {"error": str(e), "status": 400}
+            self.write_frame(writer, 0x1, json.dumps(response).encode())
+            await writer.drain()
+
+    @staticmethod
+    async def read_frame(reader):
+        """(opcode, payload) of one client frame; client frames are always masked."""
+        first, second = await reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", await reader.readexactly(8))[0]
+        mask = await reader.readexactly(4) if second & 0x80 else b"\0\0\0\0"
+        data = await reader.readexactly(length)
+        return first & 0x0F, bytes(byte ^ mask[i % 4] for i, byte in enumerate(data))
+
+    @staticmethod
+    def write_frame(writer, opcode, payload):
+        """Unmasked, unfragmented server frame."""
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 1 << 16:
+            header += bytes([126]) + struct.pack(">H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack(">Q", len(payload))
+        writer.write(header + payload)
+
+
+def load_model(fake_gemini):
+    """The Gemini model, or the benchmark's fake one."""
+    if fake_gemini:
+        from bench.fake_gemini import FakeModel
+        return FakeModel(latency=float(os.getenv("FAKE_GEMINI_LATENCY", "0.2")))
+    import google.generativeai as genai
+    from dotenv import load_dotenv
+    load_dotenv()
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    try:
+        with open(os.getenv("GEMINI_MODEL_CACHE", ".gemini_model"), encoding="utf-8") as f:
+            model_name = f.read().strip()
+    except OSError:
+        model_name = "gemini-1.5-pro"
+    return genai.GenerativeModel(model_name or "gemini-1.5-pro")
+
+
+async def serve(args, ready=None):
+    """Run the server until cancelled; `ready` (an asyncio.Event) is set once it listens."""
+    command = [sys.executable, FAKE_ENGINE] if args.fake_engine else args.engine
+    pool = AsyncEnginePool(command, size=args.engines, options={"Hash": args.hash, "Threads": 1})
+    await pool.start()
+    server = GameServer(
+        pool, load_model(args.fake_gemini),
+        search_limit=chess.engine.Limit(time=args.time), hint_limit=chess.engine.Limit(time=args.hint_time),
+        max_sessions=args.max_sessions,
+        opening_book=OpeningBook(args.book) if args.book else None,
+        tablebase=Tablebase(args.syzygy) if args.syzygy else None,
+        llm_cache=LLMCache(args.llm_cache) if args.llm_cache else None)
+    listener = await server.start(args.host, args.port)
+    args.port = listener.sockets[0].getsockname()[1]  # The real one when --port 0
+    print(f"🌐 Serving on http://{args.host}:{args.port} with {args.engines} engines")
+    if ready:
+        ready.set()
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.llm_scheduler.stop()
+        await pool.stop()
+        if server.llm_cache:
+            server.llm_cache.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve the adaptive chess AI to many players over local HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--engine", default=os.getenv("STOCKFISH_PATH", "stockfish"), help="UCI engine binary")
+    parser.add_argument("--fake-engine", action="store_true", help="Use the benchmark's instant fake engine")
+    parser.add_argument("--fake-gemini", action="store_true", help="Use a local fake Gemini model")
+    parser.add_argument("--engines", type=int, default=int(os.getenv("ENGINE_POOL_SIZE", "2")),
+                        help="Engine processes shared by all sessions")
+    parser.add_argument("--hash", type=int, default=16, help="Engine hash per process in MB")
+    parser.add_argument("--time", type=float, default=0.1, help="Nominal seconds per AI reply, scaled per position and Elo")
+    parser.add_argument("--hint-time", type=float, default=0.1, help="Seconds per hint search")
+    parser.add_argument("--max-sessions", type=int, default=1000, help="Idle sessions are evicted past this")
+    parser.add_argument("--book", default=os.getenv("OPENING_BOOK_PATH"), help="Polyglot opening book")
+    parser.add_argument("--syzygy", default=os.getenv("SYZYGY_PATH"), help="Syzygy tablebase directories")
+    parser.add_argument("--llm-cache", default=os.getenv("LLM_CACHE_PATH"), help="SQLite cache of Gemini replies")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("🔻 Server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import threading
+
+from PIL import Image
+
+
+class SpriteAtlas:
+    """Piece sprites pre-scaled per size bucket and cached on disk.
+
+    Each bucket is one PNG strip holding all 12 pieces side by side,
+    written to `atlas_dir` (next to the source images) the first time that
+    size is needed and reused on later runs until a source PNG changes.
+    Loading a bucket is a decode and 12 crops, never a resample, so it is
+    cheap enough to do on every resize. Only PIL is used here; the caller
+    turns the sprites into Tk images on the UI thread.
+    """
+
+    PIECES = {"p": "pawn", "n": "knight", "b": "bishop", "r": "rook", "q": "queen", "k": "king"}
+    COLORS = {"w": "white", "b": "black"}
+    SIZES = (24, 30, 36, 42, 48, 54, 60, 72, 84, 96, 108, 120, 144, 168, 192, 216, 240, 288)
+
+    def __init__(self, image_dir, atlas_dir=None):
+        self.image_dir = image_dir
+        self.atlas_dir = atlas_dir or os.path.join(image_dir, "atlas")
+        self.keys = [f"{piece}{color}" for color in self.COLORS for piece in self.PIECES]
+        self.loaded = {}  # bucket -> {piece key: PIL image}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def bucket_for(cls, size):
+        """Largest bucket that fits in `size` pixels (the smallest one if none does)."""
+        fitting = [bucket for bucket in cls.SIZES if bucket <= size]
+        return fitting[-1] if fitting else cls.SIZES[0]
+
+    def source_path(self, piece_key):
+        """Source PNG for a piece key such as "nw"."""
+        piece, color = piece_key
+        return os.path.join(self.image_dir, f"{self.COLORS[color]}-{self.PIECES[piece]}.png")
+
+    def atlas_path(self, bucket):
+        """On-disk strip for one bucket."""
+        return os.path.join(self.atlas_dir, f"pieces-{bucket}.png")
+
+    def is_fresh(self, bucket):
+        """True if the strip for `bucket` exists and is newer than every source PNG."""
+        try:
+            built = os.path.getmtime(self.atlas_path(bucket))
+            return all(os.path.getmtime(self.source_path(key)) <= built for key in self.keys)
+        except OSError:
+            return False
+
+    def load(self, bucket):
+        """Return {piece key: PIL image} at `bucket` pixels, building the strip if needed."""
+        with self.lock:
+            if bucket not in self.loaded:
+                if self.is_fresh(bucket):
+                    try:
+                        self.loaded[bucket] = self._read(bucket)
+                    except Exception as e:
+                        print(f"❌ Error reading sprite atlas {self.atlas_path(bucket)}: {e}")
+                if bucket not in self.loaded:
+                    self.loaded[bucket] = self._build(bucket)
+            return self.loaded[bucket]
+
+    def _read(self, bucket):
+        """Cut a stored strip back into sprites."""
+        with Image.open(self.atlas_path(bucket)) as strip:
+            strip = strip.convert("RGBA")
+        return {key: strip.crop((i * bucket, 0, (i + 1) * bucket, bucket))
+                for i, key in enumerate(self.keys)}
+
+    def _build(self, bucket):
+        """Resample every source PNG to `bucket` pixels and store the strip."""
+        print(f"🎨 Building {bucket}px piece sprites...")
+        sprites = {}
+        strip = Image.new("RGBA", (bucket * len(self.keys), bucket))
+        for i, key in enumerate(self.keys):
+            path = self.source_path(key)
+            try:
+                with Image.open(path) as img:
+                    sprite = img.convert("RGBA").resize((bucket, bucket), Image.LANCZOS)
+            except Exception as e:
+                print(f"❌ Error loading {path}: {e}")
+                continue
+            sprites[key] = sprite
+            strip.paste(sprite, (i * bucket, 0))
+
+        if len(sprites) == len(self.keys):  # Never store a strip with holes in it
+            try:
+                os.makedirs(self.atlas_dir, exist_ok=True)
+                tmp_path = self.atlas_path(bucket) + ".tmp"
+                strip.save(tmp_path, format="PNG")
+                os.replace(tmp_path, self.atlas_path(bucket))
+            except Exception as e:
+                print(f"❌ Error saving sprite atlas: {e}")
+        return sprites
@@ -0,0 +1,92 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Times the startup phases for the `--profile-startup` report.
+
+    Phases may run on the Tk thread or in background threads; each one is
+    recorded with its start offset, duration and thread. When disabled
+    every call is a no-op, so the timing hooks can stay in the code.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.t0 = time.perf_counter()
+        self.phases = []  # (name, start offset, duration, thread name)
+        self.open_phases = 0
+        self.reported = False
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a `with` block as one phase."""
+        if not self.enabled:
+            yield
+            return
+        with self.lock:
+            self.open_phases += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._close(name, start)
+
+    def background(self, name, target):
+        """Run `target` in a daemon thread, timed as phase `name`.
+
+        The phase counts as open from this call on, so the report never
+        prints before the thread has even started.
+        """
+        if self.enabled:
+            with self.lock:
+                self.open_phases += 1
+
+        def run():
+            start = time.perf_counter()
+            try:
+                target()
+            except Exception as e:
+                print(f"❌ Error in {name}: {e}")
+            finally:
+                if self.enabled:
+                    self._close(name, start)
+
+        thread = threading.Thread(target=run, name=name, daemon=True)
+        thread.start()
+        return thread
+
+    def _close(self, name, start):
+        """Record a finished phase."""
+        end = time.perf_counter()
+        with self.lock:
+            self.phases.append((name, start - self.t0, end - start, threading.current_thread().name))
+            self.open_phases -= 1
+
+    def mark(self, name):
+        """Record a point in time, such as the first paint of the window."""
+        if self.enabled:
+            with self.lock:
+                self.phases.append((name, time.perf_counter() - self.t0, 0.0, threading.current_thread().name))
+
+    def report(self):
+        """The phases in start order as a printable table."""
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        lines = ["⏱️ Startup profile", f"{'phase':<28}{'start ms':>10}{'took ms':>10}  thread"]
+        for name, start, duration, thread in phases:
+            lines.append(f"{name:<28}{start * 1000:>10.1f}{duration * 1000:>10.1f}  {thread}")
+        return "\n".join(lines)
+
+    def report_when_done(self, root, poll_ms=100):
+        """Print the report from the Tk loop once every background phase has finished."""
+        if not self.enabled or self.reported:
+            return
+        with self.lock:
+            busy = self.open_phases
+        if busy:
+            root.after(poll_ms, self.report_when_done, root, poll_ms)
+            return
+        self.reported = True
+        print(self.report())
@@ -0,0 +1,112 @@
+import os
+import random
+
+import chess
+import chess.syzygy
+
+
+class Tablebase:
+    """Optional Syzygy endgame tablebases for exact, instant endgame play.
+
+    `path` may list several directories separated by os.pathsep. Positions
+    with more pieces than the largest loaded table are never probed.
+    """
+
+    MIN_ELO = 1320
+    MAX_ELO = 3000
+
+    def __init__(self, path):
+        self.tablebase = None
+        self.max_pieces = 0
+        if not path:
+            return
+        try:
+            tablebase = chess.syzygy.Tablebase()
+            for directory in path.split(os.pathsep):
+                if os.path.isdir(directory):
+                    tablebase.add_directory(directory)
+            if tablebase.wdl:
+                self.tablebase = tablebase
+                # Table names look like "KQvK": every letter but the "v" is a piece
+                self.max_pieces = max(len(name) - 1 for name in tablebase.wdl)
+                print(f"🏁 Syzygy tables loaded, up to {self.max_pieces} pieces")
+            else:
+                print(f"🏁 No Syzygy tables found in {path}")
+        except Exception as e:
+            print(f"❌ Error loading Syzygy tables: {e}")
+
+    def covers(self, board):
+        """True if the position is small enough to be probed."""
+        return (self.tablebase is not None and
+                chess.popcount(board.occupied) <= self.max_pieces and
+                not board.castling_rights)
+
+    def probe_wdl(self, board):
+        """Win/draw/loss for the side to move (2 win, 0 draw, -2 loss), or None."""
+        if not self.covers(board):
+            return None
+        return self.tablebase.get_wdl(board)
+
+    def probe_dtz(self, board):
+        """Distance to zeroing for the side to move, or None without DTZ tables."""
+        if not self.covers(board):
+            return None
+        return self.tablebase.get_dtz(board)
+
+    def rank_moves(self, board):
+        """Return (move, wdl, dtz) for every legal move, best first, from the mover's view."""
+        ranked = []
+        for move in board.legal_moves:
+            board.push(move)
+            try:
+                wdl = self.probe_wdl(board)
+                dtz = self.probe_dtz(board) or 0
+            finally:
+                board.pop()
+            if wdl is None:
+                return []  # Missing table, do not trust a partial ranking
+            ranked.append((move, -wdl, dtz))
+
+        def key(entry):
+            _, wdl, dtz = entry
+            if wdl > 0:
+                return (wdl, -abs(dtz))  # Win as fast as possible
+            if wdl < 0:
+                return (wdl, abs(dtz))  # Lose as slowly as possible
+            return (0, 0)
+
+        ranked.sort(key=key, reverse=True)
+        return ranked
+
+    def best_move(self, board):
+        """The tablebase-perfect move, or None when the position is not covered."""
+        ranked = self.rank_moves(board) if self.covers(board) else []
+        return ranked[0][0] if ranked else None
+
+    def pick_move(self, board, elo, rng=random):
+        """Pick a tablebase move with a strength handicap that grows as `elo` drops.
+
+        Weak settings often pick any move that keeps the result instead of
+        the fastest one, and occasionally let a win slip to a draw.
+        """
+        ranked = self.rank_moves(board) if self.covers(board) else []
+        if not ranked:
+            return None
+        strength = (min(max(elo, self.MIN_ELO), self.MAX_ELO) - self.MIN_ELO) / (self.MAX_ELO - self.MIN_ELO)
+        best_wdl = ranked[0][1]
+
+        if rng.random() < 0.1 * (1 - strength):
+            # Slip: any move that does not turn the result into a loss
+            candidates = [move for move, wdl, _ in ranked if wdl >= min(best_wdl, 0)]
+        elif rng.random() < 0.5 * (1 - strength):
+            # Drift: any move that keeps the result, however slowly
+            candidates = [move for move, wdl, _ in ranked if wdl == best_wdl]
+        else:
+            return ranked[0][0]
+        return rng.choice(candidates)
+
+    def close(self):
+        """Close the table files."""
+        if self.tablebase:
+            self.tablebase.close()
+            self.tablebase = None
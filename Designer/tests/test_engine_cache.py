@@ -0,0 +1,103 @@
+import chess
+import chess.engine
+
+from engine_cache import CachedResult, EngineCache, limit_key, score_from_json, score_to_json
+
+LIMIT = chess.engine.Limit(time=1)
+E4 = chess.Move.from_uci("e2e4")
+D4 = chess.Move.from_uci("d2d4")
+
+
+def board_after(*ucis):
+    board = chess.Board()
+    for uci in ucis:
+        board.push_uci(uci)
+    return board
+
+
+def test_score_json_round_trip():
+    for score in (chess.engine.PovScore(chess.engine.Cp(35), chess.WHITE),
+                  chess.engine.PovScore(chess.engine.Mate(-2), chess.BLACK)):
+        assert score_from_json(score_to_json(score), score.turn) == score
+    assert score_to_json(None) is None
+    assert score_from_json(None, chess.WHITE) is None
+
+
+def test_limit_key():
+    assert limit_key(chess.engine.Limit(time=1)) == "time=1"
+    assert limit_key(chess.engine.Limit(depth=12, time=0.5)) == "time=0.5,depth=12"
+    assert limit_key(chess.engine.Limit()) == "infinite"
+    assert limit_key("ponder") == "ponder"
+
+
+def test_put_and_get():
+    cache = EngineCache()
+    board = chess.Board()
+    score = chess.engine.PovScore(chess.engine.Cp(30), chess.WHITE)
+    cache.put(board, 1320, LIMIT, E4, score, [E4, chess.Move.from_uci("e7e5")], 14,
+              [(D4, chess.engine.PovScore(chess.engine.Cp(25), chess.WHITE))])
+    result = cache.get(board, 1320, LIMIT)
+    assert result.move == E4
+    assert result.score == score
+    assert result.depth == 14
+    assert [move for move, _ in result.lines()] == [E4, D4]
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_key_separates_elo_and_limit():
+    cache = EngineCache()
+    board = chess.Board()
+    cache.put(board, 1320, LIMIT, E4)
+    assert cache.get(board, 2000, LIMIT) is None
+    assert cache.get(board, 1320, chess.engine.Limit(depth=12)) is None
+    assert cache.get(board, None, LIMIT) is None
+    assert cache.misses == 3
+
+
+def test_transposition_hits():
+    cache = EngineCache()
+    reply = chess.Move.from_uci("e7e5")
+    cache.put(board_after("g1f3", "g8f6", "b1c3"), None, LIMIT, reply)
+    assert cache.get(board_after("b1c3", "g8f6", "g1f3"), None, LIMIT).move == reply
+
+
+def test_deeper_result_is_kept():
+    cache = EngineCache()
+    board = chess.Board()
+    cache.put(board, None, LIMIT, E4, depth=20)
+    cache.put(board, None, LIMIT, D4, depth=12)
+    assert cache.get(board, None, LIMIT).move == E4
+    cache.put(board, None, LIMIT, D4, depth=20)  # As deep replaces
+    assert cache.get(board, None, LIMIT).move == D4
+
+
+def test_lru_eviction():
+    cache = EngineCache(max_entries=2)
+    first, second, third = board_after("e2e4"), board_after("d2d4"), board_after("c2c4")
+    cache.put(first, None, LIMIT, chess.Move.from_uci("e7e5"))
+    cache.put(second, None, LIMIT, chess.Move.from_uci("d7d5"))
+    assert cache.get(first, None, LIMIT)  # Now the most recently used
+    cache.put(third, None, LIMIT, chess.Move.from_uci("c7c5"))
+    assert len(cache.entries) == 2
+    assert cache.get(second, None, LIMIT) is None
+    assert cache.get(first, None, LIMIT) and cache.get(third, None, LIMIT)
+
+
+def test_illegal_cached_move_is_a_miss():
+    cache = EngineCache()
+    board = chess.Board()
+    cache.entries[EngineCache.key(board, None, LIMIT)] = CachedResult(chess.Move.from_uci("e2e5")).to_json()
+    assert cache.get(board, None, LIMIT) is None
+
+
+def test_save_and_load_keep_lru_order(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = EngineCache(max_entries=2, path=path)
+    cache.put(board_after("e2e4"), None, LIMIT, chess.Move.from_uci("e7e5"))
+    cache.put(board_after("d2d4"), None, LIMIT, chess.Move.from_uci("d7d5"))
+    cache.save()
+
+    loaded = EngineCache(max_entries=2, path=path)
+    assert list(loaded.entries) == list(cache.entries)
+    loaded.put(board_after("c2c4"), None, LIMIT, chess.Move.from_uci("c7c5"))
+    assert loaded.get(board_after("e2e4"), None, LIMIT) is None  # Oldest went first
@@ -0,0 +1,128 @@
+import chess
+import pytest
+
+from game_history import GameHistory, GameJournal, pack_move, unpack_move
+from game_session import GameSession
+
+SCORE = (1320, 2, 1)
+
+
+@pytest.mark.parametrize("uci", ["e2e4", "g1f3", "e1g1", "a7a8q", "b2b1n", "h7g8r", "c7c8b"])
+def test_pack_round_trip(uci):
+    move = chess.Move.from_uci(uci)
+    code = pack_move(move)
+    assert 0 <= code < 1 << 16
+    assert unpack_move(code) == move
+
+
+def test_every_legal_move_packs_uniquely():
+    board = chess.Board("r3k2r/1P6/8/8/8/8/6p1/R3K2R w KQkq - 0 1")
+    codes = {pack_move(move) for move in board.legal_moves}
+    assert len(codes) == board.legal_moves.count()
+
+
+def test_history_keeps_moves_in_order():
+    history = GameHistory()
+    moves = [chess.Move.from_uci(uci) for uci in "e2e4 e7e5 g1f3 b8c6 e1g1 a7a8q".split()]
+    for move in moves:
+        history.append(move)
+    assert len(history) == len(moves)
+    assert list(history) == moves
+
+    history.clear()
+    assert len(history) == 0
+    assert list(history) == []
+
+
+def write_game(path, moves, end=False):
+    journal = GameJournal(str(path))
+    journal.start_game(SCORE)
+    for uci in moves:
+        journal.record_move(chess.Move.from_uci(uci))
+    if end:
+        journal.end_game(SCORE)
+    journal.close()
+
+
+def test_journal_replay(tmp_path):
+    path = tmp_path / "journal.bin"
+    write_game(path, ["e2e4", "e7e5", "g1f3"])
+    score, moves, finished = GameJournal(str(path)).read()
+    assert score == SCORE
+    assert [move.uci() for move in moves] == ["e2e4", "e7e5", "g1f3"]
+    assert not finished
+
+
+def test_journal_missing_file(tmp_path):
+    assert GameJournal(str(tmp_path / "none.bin")).read() == (None, [], False)
+
+
+def test_journal_rejects_foreign_file(tmp_path):
+    path = tmp_path / "journal.bin"
+    path.write_bytes(b"not a journal")
+    assert GameJournal(str(path)).read() == (None, [], False)
+
+
+@pytest.mark.parametrize("cut", [1, 2])
+def test_journal_ignores_torn_tail(tmp_path, cut):
+    path = tmp_path / "journal.bin"
+    write_game(path, ["e2e4", "e7e5", "g1f3"])
+    path.write_bytes(path.read_bytes()[:-cut])  # Crash in the middle of the last move record
+    _, moves, _ = GameJournal(str(path)).read()
+    assert [move.uci() for move in moves] == ["e2e4", "e7e5"]
+
+
+def test_journal_ignores_torn_end_record(tmp_path):
+    path = tmp_path / "journal.bin"
+    write_game(path, ["e2e4"], end=True)
+    path.write_bytes(path.read_bytes()[:-3])
+    _, moves, finished = GameJournal(str(path)).read()
+    assert [move.uci() for move in moves] == ["e2e4"]
+    assert not finished
+
+
+def test_journal_end_written_once(tmp_path):
+    path = tmp_path / "journal.bin"
+    journal = GameJournal(str(path))
+    journal.start_game(SCORE)
+    journal.end_game((1320, 3, 1))
+    size = path.stat().st_size
+    journal.end_game((1320, 3, 1))
+    journal.close()
+    assert path.stat().st_size == size
+    assert GameJournal(str(path)).read() == ((1320, 3, 1), [], True)
+
+
+def test_journal_moves_after_end_continue_the_game(tmp_path):
+    path = tmp_path / "journal.bin"
+    journal = GameJournal(str(path))
+    journal.start_game(SCORE)
+    journal.record_move(chess.Move.from_uci("e2e4"))
+    journal.end_game(SCORE)
+    journal.record_move(chess.Move.from_uci("e7e5"))
+    journal.close()
+    _, moves, finished = GameJournal(str(path)).read()
+    assert [move.uci() for move in moves] == ["e2e4", "e7e5"]
+    assert not finished
+
+
+def test_journal_new_game_replaces_the_old_one(tmp_path):
+    path = tmp_path / "journal.bin"
+    write_game(path, ["e2e4", "e7e5"], end=True)
+    journal = GameJournal(str(path))
+    journal.start_game((1420, 3, 1), [chess.Move.from_uci("d2d4")])
+    journal.close()
+    assert GameJournal(str(path)).read() == ((1420, 3, 1), [chess.Move.from_uci("d2d4")], False)
+
+
+def test_session_resumes_from_journal(tmp_path):
+    path = tmp_path / "journal.bin"
+    write_game(path, ["e2e4", "e7e5"])
+    session = GameSession(journal=GameJournal(str(path)))
+    assert session.resume() == 2
+    assert list(session.history) == [chess.Move.from_uci("e2e4"), chess.Move.from_uci("e7e5")]
+    session.journal.close()
+
+
+def test_session_without_journal_resumes_nothing():
+    assert GameSession().resume() == 0
@@ -0,0 +1,80 @@
+import chess
+import chess.engine
+import pytest
+
+from search_budget import SearchBudget
+
+NOMINAL = chess.engine.Limit(time=1)
+MIDDLEGAME = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 10"
+POSITIONS = [
+    chess.STARTING_FEN,
+    MIDDLEGAME,
+    "8/8/4k3/8/8/4K3/4P3/8 w - - 0 60",  # Thin endgame
+    "4k3/8/8/8/8/8/8/R3K2R w KQ - 0 40",
+    "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3",  # Mated, no legal move
+]
+
+
+@pytest.fixture
+def budget():
+    return SearchBudget()
+
+
+@pytest.mark.parametrize("fen", POSITIONS)
+@pytest.mark.parametrize("elo", [None, 2800, 3000])
+def test_full_strength_never_gets_less_than_nominal(budget, fen, elo):
+    limit = budget.plan(chess.Board(fen), elo, NOMINAL)
+    assert limit.time >= NOMINAL.time
+    assert limit.time <= NOMINAL.time * SearchBudget.MAX_SCALE
+    assert limit.depth is None
+
+
+def test_time_grows_with_elo(budget):
+    board = chess.Board(MIDDLEGAME)
+    times = [budget.plan(board, elo, NOMINAL).time for elo in (1320, 1600, 2000, 2400, 2800)]
+    assert times == sorted(times)
+    assert times[0] < times[-1]
+
+
+def test_depth_cap_grows_with_elo(budget):
+    caps = [budget.depth_cap(elo) for elo in (1320, 1600, 2000, 2400, 2799)]
+    assert caps == sorted(caps)
+    assert caps[0] == 5
+    assert budget.depth_cap(2800) is None
+
+
+def test_opening_gets_less_than_middlegame_below_full_strength(budget):
+    opening = budget.plan(chess.Board(), 2000, NOMINAL).time
+    middlegame = budget.plan(chess.Board(MIDDLEGAME), 2000, NOMINAL).time
+    assert opening < middlegame
+
+
+def test_obvious_recapture(budget):
+    board = chess.Board()
+    for uci in "e2e4 d7d5 e4d5".split():
+        board.push_uci(uci)
+    assert budget.is_obvious_recapture(board)  # The queen takes back a pawn nobody defends
+    board.push_uci("d8d5")
+    assert not budget.is_obvious_recapture(board)  # Nothing of White's reaches d5
+    board.push_uci("b1c3")
+    assert not budget.is_obvious_recapture(board)  # Last move was no capture
+    assert not budget.is_obvious_recapture(chess.Board())
+
+
+def test_recapture_check_leaves_the_board_unchanged(budget):
+    board = chess.Board()
+    for uci in "e2e4 d7d5 e4d5".split():
+        board.push_uci(uci)
+    before = board.move_stack[:]
+    budget.is_obvious_recapture(board)
+    assert board.move_stack == before
+
+
+def test_tiny_nominal_time_is_not_raised(budget):
+    tiny = chess.engine.Limit(time=0.01)
+    assert budget.plan(chess.Board(MIDDLEGAME), 1320, tiny).time <= 0.01
+
+
+def test_depth_limits_pass_through(budget):
+    limit = chess.engine.Limit(depth=12)
+    assert budget.plan(chess.Board(), 1320, limit) is limit
@@ -0,0 +1,155 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Span:
+    """One timed stage: what ran, during which ply, on which thread and for how long.
+
+    An instant span marks an event (a click, a ponder hit) rather than a stage.
+    """
+
+    __slots__ = ("name", "ply", "start", "end", "thread", "args", "instant")
+
+    def __init__(self, name, ply, start, end, thread, args=None, instant=False):
+        self.name = name
+        self.ply = ply
+        self.start = start  # time.perf_counter() seconds
+        self.end = end
+        self.thread = thread
+        self.args = args or {}
+        self.instant = instant
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def to_json(self):
+        """One JSON-lines record, times in milliseconds."""
+        return {"name": self.name, "ply": self.ply, "start_ms": self.start * 1000,
+                "duration_ms": self.duration * 1000, "thread": self.thread, "args": self.args,
+                "instant": self.instant}
+
+
+class Tracer:
+    """Per-ply latency spans kept in a fixed-size ring buffer.
+
+    Recording is a Span append under a lock, cheap enough to leave on in
+    the hot path. Spans can be timed with `span()` / `@traced`, or recorded
+    afterwards from timestamps taken elsewhere (engine worker threads) with
+    `record()`. `event()` marks what happened in between, in place of debug
+    prints; with `echo` those marks are printed as well. `ply_source()` tags
+    each span with the ply it belongs to.
+    """
+
+    def __init__(self, capacity=4096, ply_source=None, echo=False):
+        self.spans_buffer = deque(maxlen=capacity)
+        self.ply_source = ply_source or (lambda: 0)
+        self.echo = echo
+        self.lock = threading.Lock()
+        self.t0 = time.perf_counter()
+
+    def record(self, name, start, end, ply=None, **args):
+        """Store a finished span; `start` and `end` are time.perf_counter() values."""
+        span = Span(name, self.ply_source() if ply is None else ply, start, end,
+                    threading.current_thread().name, args)
+        with self.lock:
+            self.spans_buffer.append(span)
+        return span
+
+    def event(self, name, **args):
+        """Store an instant span, e.g. event("click.select", square="e2")."""
+        now = time.perf_counter()
+        span = Span(name, self.ply_source(), now, now, threading.current_thread().name, args, instant=True)
+        with self.lock:
+            self.spans_buffer.append(span)
+        if self.echo:
+            details = " ".join(f"{key}={value}" for key, value in args.items())
+            print(f"[ply {span.ply}] {name} {details}".rstrip())
+        return span
+
+    @contextmanager
+    def span(self, name, **args):
+        """Time the body of a `with` block."""
+        ply = self.ply_source()
+        start = time.perf_counter()
+        try:
+            yield args  # The body may add details, e.g. args["source"] = "cache"
+        finally:
+            self.record(name, start, time.perf_counter(), ply, **args)
+
+    def spans(self, name=None):
+        """Snapshot of the buffer, oldest first, optionally for one stage only."""
+        with self.lock:
+            spans = list(self.spans_buffer)
+        return [span for span in spans if name is None or span.name == name]
+
+    def clear(self):
+        with self.lock:
+            self.spans_buffer.clear()
+
+    def stats(self):
+        """{stage: {"n", "p50_ms", "p95_ms"}} over what is in the buffer, events left out."""
+        durations = {}
+        for span in self.spans():
+            if span.instant:
+                continue
+            durations.setdefault(span.name, []).append(span.duration * 1000)
+        stats = {}
+        for name, values in durations.items():
+            values.sort()
+            stats[name] = {
+                "n": len(values),
+                "p50_ms": values[len(values) // 2],
+                "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+            }
+        return stats
+
+    def export_jsonl(self, path):
+        """One JSON object per span."""
+        with open(path, "w", encoding="utf-8") as f:
+            for span in self.spans():
+                f.write(json.dumps(span.to_json()) + "\n")
+
+    def export_chrome(self, path):
+        """Chrome trace format, for chrome://tracing or Perfetto."""
+        threads = {}
+        events = []
+        for span in self.spans():
+            tid = threads.setdefault(span.thread, len(threads) + 1)
+            event = {
+                "name": span.name, "cat": "ply", "ph": "X", "pid": os.getpid(), "tid": tid,
+                "ts": (span.start - self.t0) * 1e6, "dur": span.duration * 1e6,
+                "args": dict(span.args, ply=span.ply),
+            }
+            if span.instant:
+                del event["dur"]
+                event.update(ph="i", s="t")  # Thread-scoped instant event
+            events.append(event)
+        for thread, tid in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                           "args": {"name": thread}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export(self, path):
+        """Chrome trace for a .json path, JSON lines for anything else."""
+        if path.endswith(".json"):
+            self.export_chrome(path)
+        else:
+            self.export_jsonl(path)
+
+
+def traced(name):
+    """Method decorator: time every call as span `name` on `self.tracer`."""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate